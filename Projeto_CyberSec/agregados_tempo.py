@@ -0,0 +1,225 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+import ingestao
+
+# ==============================================================================
+# AGREGADOS POR JANELA DE TEMPO (MINUTO E HORA) E CLASSE
+# ==============================================================================
+# Mantidos durante a carga, pedaço a pedaço, como o resumo por classe: para cada
+# arquivo, janela (início em epoch) e classe, o número de fluxos e a contagem e a soma
+# de cada coluna agregada. As horas saem dos minutos já agregados, sem outra passada.
+# Séries temporais e a busca de janelas de ataque consultam esta tabela (milhares de
+# linhas) em vez da tabela de fluxos (milhões).
+
+TABELA_AGREGADOS_TEMPO = 'agregados_tempo'
+GRANULARIDADES = {'minuto': 60, 'hora': 3600} # Nome -> largura da janela em segundos
+
+
+def segundos_desde_epoch(serie, formato):
+    """Tempo em segundos desde 1970: colunas já convertidas na carga (compacta) ou texto no `formato`."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype('float64')
+    return ingestao.converter_datas(serie, formato).astype('float64')
+
+
+class DestinoAgregadosTempo:
+    """
+    Acumula, durante a carga, fluxos e somas por (arquivo, minuto, classe). Ao terminar
+    cada arquivo, grava os minutos e as horas e apaga os da versão antiga do arquivo.
+    """
+
+    def __init__(self, caminho_db, coluna_grupo, coluna_tempo, formato_tempo, colunas=()):
+        self.caminho_db = caminho_db
+        self.coluna_grupo = coluna_grupo
+        self.coluna_tempo = coluna_tempo
+        self.formato_tempo = formato_tempo
+        self.colunas = list(colunas)
+        self.parciais = {} # {id do arquivo: [agregados parciais por minuto]}
+        conn = sqlite3.connect(caminho_db)
+        criar_tabela_agregados(conn)
+        conn.close()
+
+    def processar(self, chunk):
+        """Agrega o pedaço por (arquivo, minuto, classe) e guarda o resultado parcial."""
+        if chunk.empty or self.coluna_tempo not in chunk.columns:
+            return
+        tempo = segundos_desde_epoch(chunk[self.coluna_tempo], self.formato_tempo)
+        validos = tempo.notna()
+        if not validos.any():
+            return
+        chunk, tempo = chunk[validos], tempo[validos]
+        minuto = (tempo // GRANULARIDADES['minuto'] * GRANULARIDADES['minuto']).astype('int64')
+        chaves = [chunk[ingestao.COLUNA_ID_ARQUIVO], minuto, ingestao.coluna_ou_nula(chunk, self.coluna_grupo)]
+        # Colunas que o arquivo não tem ficam fora dos agregados do pedaço
+        colunas = [col for col in self.colunas if col in chunk.columns]
+        valores = chunk[colunas].astype('float64')
+        valores = valores.where(np.isfinite(valores))
+        grupos = valores.groupby(chaves, dropna=False)
+        parcial = pd.concat({'n': grupos.count().stack(), 'soma': grupos.sum().stack()}, axis=1)
+        # Linha extra '*' com o número de fluxos da janela e classe
+        total = pd.DataFrame({'n': chunk.groupby(chaves, dropna=False).size()})
+        total = total.assign(coluna=ingestao.COLUNA_CONTAGEM).set_index('coluna', append=True)
+        total.index.names = parcial.index.names = [ingestao.COLUNA_ID_ARQUIVO, 'inicio', 'grupo', 'coluna']
+        parcial = pd.concat([parcial, total])
+        for id_arquivo, parte in parcial.groupby(level=0):
+            self.parciais.setdefault(id_arquivo, []).append(parte)
+
+    def concluir_arquivo(self, info):
+        """Grava os minutos e as horas do arquivo concluído e apaga os da versão antiga."""
+        partes = self.parciais.pop(info['id'], [])
+        conn = sqlite3.connect(self.caminho_db)
+        remover_agregados(conn, info['ids_antigos'])
+        # Numa carga retomada só o final do arquivo passou por aqui: os agregados desse
+        # arquivo ficam para sincronizar_agregados, que os calcula a partir da tabela
+        if partes and 'retomada' not in info:
+            gravar_agregados(conn, pd.concat(partes))
+        conn.commit()
+        conn.close()
+
+    def finalizar(self):
+        """Nada a fazer: cada arquivo já foi gravado ao terminar."""
+
+# ==============================================================================
+# GRAVAÇÃO E SINCRONIZAÇÃO NO BANCO
+# ==============================================================================
+def criar_tabela_agregados(conn):
+    """Cria a tabela dos agregados por tempo e os seus índices, se ainda não existirem."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_AGREGADOS_TEMPO} (
+            {ingestao.COLUNA_ID_ARQUIVO} INTEGER,
+            segundos INTEGER,
+            inicio INTEGER,
+            grupo TEXT,
+            coluna TEXT,
+            n INTEGER,
+            soma REAL
+        )""")
+    # Consultas por intervalo de tempo em uma granularidade
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABELA_AGREGADOS_TEMPO}_tempo "
+                 f"ON {TABELA_AGREGADOS_TEMPO} (segundos, inicio)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABELA_AGREGADOS_TEMPO}_arquivo "
+                 f"ON {TABELA_AGREGADOS_TEMPO} ({ingestao.COLUNA_ID_ARQUIVO})")
+
+def gravar_agregados(conn, parciais):
+    """Combina os parciais por minuto de um arquivo, deriva as horas e insere as duas granularidades."""
+    minutos = parciais.groupby(level=[0, 1, 2, 3], dropna=False).agg(n=('n', 'sum'), soma=('soma', 'sum'))
+    for segundos in GRANULARIDADES.values():
+        linhas = minutos.reset_index()
+        linhas['inicio'] = linhas['inicio'] // segundos * segundos
+        linhas = linhas.groupby([ingestao.COLUNA_ID_ARQUIVO, 'inicio', 'grupo', 'coluna'], dropna=False).agg(
+            n=('n', 'sum'), soma=('soma', 'sum')).reset_index()
+        # A linha '*' só tem a contagem
+        linhas.loc[linhas['coluna'] == ingestao.COLUNA_CONTAGEM, 'soma'] = np.nan
+        linhas.insert(1, 'segundos', segundos)
+        linhas = linhas.astype(object).where(linhas.notna(), None)
+        conn.executemany(
+            f"INSERT INTO {TABELA_AGREGADOS_TEMPO} ({ingestao.COLUNA_ID_ARQUIVO}, segundos, inicio, grupo, "
+            f"coluna, n, soma) VALUES (?, ?, ?, ?, ?, ?, ?)", linhas.itertuples(index=False, name=None))
+
+def remover_agregados(conn, ids_arquivos):
+    """Apaga os agregados dos arquivos indicados."""
+    if ids_arquivos:
+        marcadores = ', '.join('?' * len(ids_arquivos))
+        conn.execute(f"DELETE FROM {TABELA_AGREGADOS_TEMPO} WHERE {ingestao.COLUNA_ID_ARQUIVO} IN ({marcadores})",
+                     list(ids_arquivos))
+
+def sincronizar_agregados(caminho_db, tabela, coluna_grupo, coluna_tempo, formato_tempo, colunas=()):
+    """
+    Confere os agregados com o manifesto: apaga os de arquivos que não existem mais e
+    calcula, lendo a tabela, os dos arquivos que ficaram sem (bancos anteriores aos
+    agregados ou cargas retomadas).
+    """
+    conn = sqlite3.connect(caminho_db)
+    criar_tabela_agregados(conn)
+    conn.execute(f"DELETE FROM {TABELA_AGREGADOS_TEMPO} WHERE {ingestao.COLUNA_ID_ARQUIVO} NOT IN "
+                 f"(SELECT id FROM {ingestao.TABELA_MANIFESTO} WHERE situacao = 'ok')")
+    faltantes = [linha[0] for linha in conn.execute(
+        f"SELECT id FROM {ingestao.TABELA_MANIFESTO} WHERE situacao = 'ok' AND id NOT IN "
+        f"(SELECT DISTINCT {ingestao.COLUNA_ID_ARQUIVO} FROM {TABELA_AGREGADOS_TEMPO})")]
+    conn.commit()
+    if faltantes:
+        print(f"Calculando os agregados por minuto e hora de {len(faltantes)} arquivo(s) a partir da tabela...")
+        tipos_colunas = ingestao.tipos_da_tabela(conn, tabela)
+        colunas = [col for col in colunas if tipos_colunas.get(col) in ('INTEGER', 'REAL')]
+        lidas = [col for col in [coluna_grupo, coluna_tempo] + colunas if col in tipos_colunas]
+        lista = ', '.join(f'"{col}"' for col in lidas)
+        destino = DestinoAgregadosTempo(caminho_db, coluna_grupo, coluna_tempo, formato_tempo, colunas)
+        for id_arquivo in faltantes:
+            consulta = f"SELECT {ingestao.COLUNA_ID_ARQUIVO}, {lista} FROM {tabela} WHERE {ingestao.COLUNA_ID_ARQUIVO} = ?"
+            for chunk in pd.read_sql_query(consulta, conn, params=(id_arquivo,), chunksize=ingestao.TAMANHO_CHUNK):
+                destino.processar(ingestao.decodificar_colunas(conn, tabela, chunk))
+            destino.concluir_arquivo({'id': id_arquivo, 'ids_antigos': []})
+    conn.close()
+
+# ==============================================================================
+# CONSULTAS AOS AGREGADOS
+# ==============================================================================
+def ler_agregados(conn, granularidade='minuto', colunas=(), inicio=None, fim=None, grupos=None):
+    """
+    Fluxos por janela e classe, com a soma e a média de cada coluna pedida, somando os
+    arquivos carregados por completo. `inicio` e `fim` (epoch ou data) limitam as janelas
+    ao intervalo [inicio, fim). Retorna um DataFrame com as colunas inicio (data), grupo,
+    fluxos, soma_<coluna> e media_<coluna>, ordenado por tempo.
+    """
+    condicoes = ["m.situacao = 'ok'", 'a.segundos = ?']
+    parametros = [GRANULARIDADES[granularidade]]
+    colunas_lidas = [ingestao.COLUNA_CONTAGEM] + list(colunas)
+    condicoes.append(f"a.coluna IN ({', '.join('?' * len(colunas_lidas))})")
+    parametros += colunas_lidas
+    if inicio is not None:
+        condicoes.append('a.inicio >= ?')
+        parametros.append(para_epoch(inicio))
+    if fim is not None:
+        condicoes.append('a.inicio < ?')
+        parametros.append(para_epoch(fim))
+    if grupos is not None:
+        condicoes.append(f"a.grupo IN ({', '.join('?' * len(grupos))})")
+        parametros += list(grupos)
+    consulta = (f"SELECT a.inicio, a.grupo, a.coluna, SUM(a.n) AS n, SUM(a.soma) AS soma "
+                f"FROM {TABELA_AGREGADOS_TEMPO} a JOIN {ingestao.TABELA_MANIFESTO} m "
+                f"ON m.id = a.{ingestao.COLUNA_ID_ARQUIVO} WHERE {' AND '.join(condicoes)} "
+                f"GROUP BY a.inicio, a.grupo, a.coluna")
+    linhas = pd.read_sql_query(consulta, conn, params=parametros).set_index(['inicio', 'grupo', 'coluna'])
+    contagens, somas = linhas['n'].unstack('coluna'), linhas['soma'].unstack('coluna')
+    resultado = pd.DataFrame({'fluxos': contagens.get(ingestao.COLUNA_CONTAGEM)}, index=contagens.index)
+    for col in colunas:
+        if col in somas.columns:
+            resultado[f'soma_{col}'] = somas[col].astype('float64')
+            resultado[f'media_{col}'] = resultado[f'soma_{col}'] / contagens[col]
+        else:
+            resultado[f'soma_{col}'] = resultado[f'media_{col}'] = np.nan
+    resultado = resultado.reset_index()
+    resultado = resultado.sort_values(['inicio', 'grupo'], na_position='last').reset_index(drop=True)
+    resultado['inicio'] = pd.to_datetime(resultado['inicio'], unit='s')
+    return resultado
+
+def para_epoch(valor):
+    """Aceita epoch (número) ou data (texto, datetime) e retorna segundos desde 1970."""
+    if isinstance(valor, (int, float, np.integer, np.floating)):
+        return int(valor)
+    return int((pd.Timestamp(valor) - pd.Timestamp(0)) // pd.Timedelta(seconds=1))
+
+def janelas_ativas(conn, excluidos=(), granularidade='minuto', minimo_fluxos=1):
+    """
+    Junta as janelas seguidas em que cada classe (fora as `excluidos`, ex.: a classe
+    normal) teve pelo menos `minimo_fluxos` fluxos. Retorna uma linha por período:
+    grupo, inicio, fim, janelas e fluxos, do maior para o menor em fluxos.
+    """
+    segundos = GRANULARIDADES[granularidade]
+    agregados = ler_agregados(conn, granularidade)
+    agregados = agregados[agregados['grupo'].notna() & ~agregados['grupo'].isin(list(excluidos))
+                          & (agregados['fluxos'] >= minimo_fluxos)]
+    if agregados.empty:
+        return pd.DataFrame(columns=['grupo', 'inicio', 'fim', 'janelas', 'fluxos'])
+    agregados = agregados.sort_values(['grupo', 'inicio'])
+    # Um novo período começa quando a classe muda ou há uma janela vazia no meio
+    salto = agregados.groupby('grupo')['inicio'].diff() != pd.Timedelta(seconds=segundos)
+    periodo = salto.cumsum()
+    periodos = agregados.groupby(periodo).agg(
+        grupo=('grupo', 'first'), inicio=('inicio', 'min'), fim=('inicio', 'max'),
+        janelas=('inicio', 'size'), fluxos=('fluxos', 'sum'))
+    periodos['fim'] += pd.Timedelta(seconds=segundos)
+    return periodos.sort_values('fluxos', ascending=False).reset_index(drop=True)
@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# ==============================================================================
+# CONEXÕES SOMENTE LEITURA (FASE DE ANÁLISE)
+# ==============================================================================
+# Na análise, o banco é aberto uma única vez por thread (e por processo), em modo
+# somente leitura e com o arquivo mapeado em memória (mmap). As consultas seguintes
+# reaproveitam a conexão, o cache de páginas já aquecido e as instruções preparadas,
+# em vez de abrir e fechar o banco a cada consulta.
+
+PRAGMAS_LEITURA = {
+    'mmap_size': 1024 * 1024 * 1024, # Até 1 GiB do arquivo lido direto do mapeamento
+    'cache_size': -131072, # Valor negativo = tamanho em KiB (128 MiB)
+    'temp_store': 'MEMORY', # Ordenações (ORDER BY dos quartis) sem arquivos temporários
+}
+INSTRUCOES_EM_CACHE = 256 # Instruções preparadas mantidas por conexão (reaproveitadas pelo texto do SQL)
+
+_locais = threading.local()
+
+
+def abrir_leitura(caminho_db, check_same_thread=True):
+    """Abre uma conexão nova, somente leitura (URI mode=ro), com os PRAGMAs de leitura."""
+    uri = f"{Path(caminho_db).resolve().as_uri()}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, cached_statements=INSTRUCOES_EM_CACHE,
+                           check_same_thread=check_same_thread)
+    for nome, valor in PRAGMAS_LEITURA.items():
+        conn.execute(f"PRAGMA {nome} = {valor}")
+    return conn
+
+
+def conexao_leitura(caminho_db):
+    """
+    Conexão somente leitura da thread atual para o banco, aberta na primeira chamada e
+    reutilizada nas seguintes. Não deve ser fechada por quem a usa (ver fechar_conexoes).
+    """
+    # A chave inclui o processo: uma conexão herdada de outro processo (fork) não é reutilizada
+    chave = (os.getpid(), str(Path(caminho_db).resolve()))
+    conexoes = getattr(_locais, 'conexoes', None)
+    if conexoes is None:
+        conexoes = _locais.conexoes = {}
+    if chave not in conexoes:
+        conexoes[chave] = abrir_leitura(caminho_db)
+    return conexoes[chave]
+
+
+def fechar_conexoes():
+    """Fecha as conexões de leitura abertas pela thread atual (ex.: antes de uma nova carga)."""
+    conexoes = getattr(_locais, 'conexoes', {})
+    for (pid, _), conn in list(conexoes.items()):
+        if pid == os.getpid():
+            conn.close()
+    conexoes.clear()
+
+
+def consultar_em_threads(caminho_db, funcao, itens, threads=4):
+    """
+    Executa funcao(conn, item) para cada item em um pool de threads, cada thread com a
+    sua própria conexão de leitura. O sqlite3 libera o GIL enquanto a consulta roda,
+    então consultas independentes avançam ao mesmo tempo. Retorna os resultados na ordem dos itens.
+    """
+    locais = threading.local()
+    abertas = []
+
+    def executar(item):
+        if not hasattr(locais, 'conn'):
+            # Fechada pela thread principal no final, por isso check_same_thread=False
+            locais.conn = abrir_leitura(caminho_db, check_same_thread=False)
+            abertas.append(locais.conn)
+        return funcao(locais.conn, item)
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            return list(pool.map(executar, itens))
+    finally:
+        for conn in abertas:
+            conn.close()
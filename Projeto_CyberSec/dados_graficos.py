@@ -0,0 +1,142 @@
+import numpy as np
+
+# ==============================================================================
+# DADOS AGREGADOS PARA OS GRÁFICOS
+# ==============================================================================
+# As funções abaixo calculam no SQLite (ou em uma única passada pelo cursor) apenas o
+# resultado pequeno que o matplotlib precisa: contagens por faixa, grades de densidade
+# e quartis. Assim a memória usada não cresce junto com a tabela.
+
+# Em SQLite, 9e999 vira infinito: o filtro descarta nulos e valores infinitos
+FILTRO_FINITO = 'ABS("{coluna}") < 9e999'
+TAMANHO_LOTE_CURSOR = 50000 # Linhas buscadas por vez ao percorrer um cursor ordenado
+
+
+def _montar_where(*condicoes):
+    """Junta as condições não vazias em uma cláusula WHERE."""
+    condicoes = [c for c in condicoes if c]
+    return f"WHERE {' AND '.join(condicoes)}" if condicoes else ''
+
+
+def limites(conn, tabela, coluna, onde=None, parametros=()):
+    """Retorna (mínimo, máximo, quantidade) dos valores finitos de uma coluna."""
+    where = _montar_where(FILTRO_FINITO.format(coluna=coluna), onde)
+    consulta = f'SELECT MIN("{coluna}"), MAX("{coluna}"), COUNT("{coluna}") FROM {tabela} {where}'
+    return conn.execute(consulta, parametros).fetchone()
+
+
+def _expressao_faixa(coluna, minimo, largura, faixas):
+    """Expressão SQL que devolve o índice da faixa (0 .. faixas-1) de cada valor."""
+    if largura == 0:
+        return '0'
+    return f'MIN(CAST(("{coluna}" - {minimo!r}) / {largura!r} AS INTEGER), {faixas - 1})'
+
+
+def histograma(conn, tabela, coluna, faixas=30, onde=None, parametros=()):
+    """
+    Calcula o histograma de uma coluna com GROUP BY no próprio SQLite.
+    Retorna (contagens, bordas), no mesmo formato do numpy.histogram.
+    """
+    minimo, maximo, total = limites(conn, tabela, coluna, onde, parametros)
+    if not total:
+        return np.zeros(faixas, dtype=np.int64), np.linspace(0, 1, faixas + 1)
+    largura = (maximo - minimo) / faixas
+    faixa = _expressao_faixa(coluna, minimo, largura, faixas)
+    where = _montar_where(FILTRO_FINITO.format(coluna=coluna), onde)
+    consulta = f'SELECT {faixa} AS faixa, COUNT(*) FROM {tabela} {where} GROUP BY faixa'
+    contagens = np.zeros(faixas, dtype=np.int64)
+    for indice, quantidade in conn.execute(consulta, parametros):
+        contagens[indice] = quantidade
+    bordas = np.linspace(minimo, maximo if largura else minimo + 1, faixas + 1)
+    return contagens, bordas
+
+
+def grade_densidade(conn, tabela, coluna_x, coluna_y, faixas=(60, 60), onde=None, parametros=()):
+    """
+    Conta quantos pontos caem em cada célula de uma grade 2D (como um hexbin/hist2d),
+    agrupando no SQLite. Retorna (contagens[faixas_x, faixas_y], bordas_x, bordas_y).
+    """
+    faixas_x, faixas_y = faixas
+    condicoes = [FILTRO_FINITO.format(coluna=coluna_x), FILTRO_FINITO.format(coluna=coluna_y), onde]
+    where = _montar_where(*condicoes)
+    min_x, max_x, min_y, max_y = conn.execute(
+        f'SELECT MIN("{coluna_x}"), MAX("{coluna_x}"), MIN("{coluna_y}"), MAX("{coluna_y}") FROM {tabela} {where}',
+        parametros).fetchone()
+    contagens = np.zeros((faixas_x, faixas_y), dtype=np.int64)
+    if min_x is None:
+        return contagens, np.linspace(0, 1, faixas_x + 1), np.linspace(0, 1, faixas_y + 1)
+    largura_x = (max_x - min_x) / faixas_x
+    largura_y = (max_y - min_y) / faixas_y
+    consulta = (f'SELECT {_expressao_faixa(coluna_x, min_x, largura_x, faixas_x)} AS fx, '
+                f'{_expressao_faixa(coluna_y, min_y, largura_y, faixas_y)} AS fy, COUNT(*) '
+                f'FROM {tabela} {where} GROUP BY fx, fy')
+    for fx, fy, quantidade in conn.execute(consulta, parametros):
+        contagens[fx, fy] = quantidade
+    bordas_x = np.linspace(min_x, max_x if largura_x else min_x + 1, faixas_x + 1)
+    bordas_y = np.linspace(min_y, max_y if largura_y else min_y + 1, faixas_y + 1)
+    return contagens, bordas_x, bordas_y
+
+
+def regressao_linear(conn, tabela, coluna_x, coluna_y, onde=None, parametros=()):
+    """Calcula (inclinação, intercepto) da reta de mínimos quadrados só com somas (REAL) no SQLite."""
+    condicoes = [FILTRO_FINITO.format(coluna=coluna_x), FILTRO_FINITO.format(coluna=coluna_y), onde]
+    n, sx, sy, sxx, sxy = conn.execute(
+        f'SELECT COUNT(*), TOTAL("{coluna_x}"), TOTAL("{coluna_y}"), '
+        f'TOTAL("{coluna_x}" * 1.0 * "{coluna_x}"), TOTAL("{coluna_x}" * 1.0 * "{coluna_y}") '
+        f'FROM {tabela} {_montar_where(*condicoes)}', parametros).fetchone()
+    if not n or n * sxx - sx * sx == 0:
+        return None
+    inclinacao = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+    return inclinacao, (sy - inclinacao * sx) / n
+
+
+def _valores_nas_posicoes(cursor, posicoes):
+    """Percorre um cursor já ordenado e devolve os valores nas posições pedidas (em ordem)."""
+    encontrados = {}
+    pendentes = sorted(set(posicoes))
+    linha_atual = 0
+    while pendentes:
+        lote = cursor.fetchmany(TAMANHO_LOTE_CURSOR)
+        if not lote:
+            break
+        while pendentes and pendentes[0] < linha_atual + len(lote):
+            encontrados[pendentes[0]] = lote[pendentes[0] - linha_atual][0]
+            pendentes.pop(0)
+        linha_atual += len(lote)
+    return [encontrados[p] for p in posicoes]
+
+
+def estatisticas_boxplot(conn, tabela, coluna, coluna_grupo=None, grupos=(None,), onde=None, parametros=()):
+    """
+    Calcula mediana, quartis e bigodes (1,5 x IQR) exatos de cada grupo, no formato
+    aceito por Axes.bxp. O SQLite ordena os valores (em disco, se preciso) e o Python
+    apenas percorre o cursor até as posições dos quartis.
+    """
+    estatisticas = []
+    filtro, parametros_filtro = onde, tuple(parametros)
+    for grupo in grupos:
+        onde, parametros = (f'"{coluna_grupo}" = ?', (grupo,)) if coluna_grupo else (None, ())
+        where = _montar_where(FILTRO_FINITO.format(coluna=coluna), onde, filtro)
+        parametros = parametros + parametros_filtro
+        total, media = conn.execute(f'SELECT COUNT(*), AVG("{coluna}") FROM {tabela} {where}', parametros).fetchone()
+        if not total:
+            continue
+        # Posições (interpolação linear, como no numpy) do 1º quartil, da mediana e do 3º quartil
+        posicoes_reais = [q * (total - 1) for q in (0.25, 0.5, 0.75)]
+        posicoes = sorted({int(np.floor(p)) for p in posicoes_reais} | {int(np.ceil(p)) for p in posicoes_reais})
+        cursor = conn.execute(f'SELECT "{coluna}" FROM {tabela} {where} ORDER BY "{coluna}"', parametros)
+        valores = dict(zip(posicoes, _valores_nas_posicoes(cursor, posicoes)))
+        cursor.close()
+        q1, mediana, q3 = [valores[int(np.floor(p))] + (p - np.floor(p)) * (valores[int(np.ceil(p))] - valores[int(np.floor(p))])
+                           for p in posicoes_reais]
+        iqr = q3 - q1
+        # Bigodes: valores extremos que ainda estão dentro de 1,5 x IQR dos quartis
+        bigode_baixo, bigode_alto = conn.execute(
+            f'SELECT MIN(CASE WHEN "{coluna}" >= ? THEN "{coluna}" END), '
+            f'MAX(CASE WHEN "{coluna}" <= ? THEN "{coluna}" END) FROM {tabela} {where}',
+            (q1 - 1.5 * iqr, q3 + 1.5 * iqr, *parametros)).fetchone()
+        estatisticas.append({
+            'label': grupo, 'med': mediana, 'q1': q1, 'q3': q3, 'mean': media,
+            'whislo': bigode_baixo, 'whishi': bigode_alto, 'fliers': [], 'n': total,
+        })
+    return estatisticas
@@ -0,0 +1,384 @@
+import io
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+import ingestao
+
+# ==============================================================================
+# ESBOÇOS ESTATÍSTICOS (QUANTIS, VALORES DISTINTOS E MAIS FREQUENTES)
+# ==============================================================================
+# Mantidos durante a carga, pedaço a pedaço, e gravados no banco por (arquivo, classe,
+# coluna), como o resumo por classe. São pequenos e combináveis: os de vários arquivos
+# (ou classes) são somados na leitura, então quantis, contagens de distintos e os
+# valores mais frequentes da população inteira saem na hora, com erro limitado:
+# - quantis: histograma em escala logarítmica (como no DDSketch), com erro relativo
+#   de no máximo ERRO_RELATIVO_QUANTIS em cada quantil;
+# - distintos: HyperLogLog com 2^BITS_HLL registros (erro padrão ~1,04 / sqrt(2^BITS_HLL));
+# - mais frequentes: Count-Min (nunca subestima) com uma lista de valores candidatos.
+
+TABELA_ESBOCOS = 'esbocos_estatisticos'
+ERRO_RELATIVO_QUANTIS = 0.01
+GAMA_QUANTIS = (1 + ERRO_RELATIVO_QUANTIS) / (1 - ERRO_RELATIVO_QUANTIS)
+VALOR_MINIMO_QUANTIS = 1e-9 # Valores com módulo menor que isso contam como zero
+# Chave do intervalo de x > 0: ceil(log_gama(x)) + DESLOCAMENTO; de x < 0, o negativo da de |x|.
+# Assim a ordem das chaves é a ordem dos valores (negativos < zero = 0 < positivos).
+DESLOCAMENTO_CHAVES = 100000
+BITS_HLL = 12
+LARGURA_CM = 4096 # Colunas de cada linha do Count-Min (potência de 2)
+# Multiplicadores ímpares (hash multiplicativo) das linhas do Count-Min
+MULTIPLICADORES_CM = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F,
+                               0x165667B19E3779F9, 0xD6E8FEB86659FD93], dtype=np.uint64)
+CANDIDATOS_FREQUENTES = 100 # Valores candidatos guardados por (arquivo, classe, coluna)
+
+
+def hash_valores(valores):
+    """Hash de 64 bits dos valores (sem nulos). Números viram float64 antes, para 3 e 3.0 coincidirem."""
+    if pd.api.types.is_numeric_dtype(valores):
+        return pd.util.hash_array(np.asarray(valores, dtype='float64'))
+    return pd.util.hash_array(np.asarray(valores, dtype=str).astype(object))
+
+# ------------------------------------------------------------------------------
+# Quantis: histograma logarítmico
+# ------------------------------------------------------------------------------
+def chaves_quantis(valores):
+    """Chave do intervalo logarítmico de cada valor (ver DESLOCAMENTO_CHAVES)."""
+    modulo = np.abs(valores)
+    chaves = np.zeros(len(valores), dtype=np.int64)
+    fora_do_zero = modulo >= VALOR_MINIMO_QUANTIS
+    expoentes = np.ceil(np.log(modulo[fora_do_zero]) / np.log(GAMA_QUANTIS)).astype(np.int64)
+    chaves[fora_do_zero] = np.sign(valores[fora_do_zero]).astype(np.int64) * (expoentes + DESLOCAMENTO_CHAVES)
+    return chaves
+
+def valores_das_chaves(chaves):
+    """Valor representativo de cada intervalo (erro relativo de no máximo ERRO_RELATIVO_QUANTIS)."""
+    chaves = np.asarray(chaves, dtype=np.int64)
+    expoentes = np.abs(chaves) - DESLOCAMENTO_CHAVES
+    valores = 2 * GAMA_QUANTIS ** expoentes.astype('float64') / (GAMA_QUANTIS + 1)
+    return np.where(chaves == 0, 0.0, np.sign(chaves) * valores)
+
+def quantis_do_histograma(histograma, quantis):
+    """Quantis de um histograma {chave: contagem} (Series ordenada pela chave)."""
+    acumulado = histograma.to_numpy().cumsum()
+    posicoes = np.searchsorted(acumulado, np.asarray(quantis) * (acumulado[-1] - 1), side='right')
+    return valores_das_chaves(histograma.index.to_numpy()[posicoes])
+
+# ------------------------------------------------------------------------------
+# Valores distintos: HyperLogLog
+# ------------------------------------------------------------------------------
+def posicoes_hll(hashes):
+    """Registro (bits mais altos do hash) e posição do primeiro bit 1 nos bits restantes."""
+    registros = (hashes >> np.uint64(64 - BITS_HLL)).astype(np.int64)
+    # Os 53 bits seguintes cabem exatos em um float64: frexp dá o número de bits significativos
+    resto = ((hashes << np.uint64(BITS_HLL)) >> np.uint64(11)).astype('float64')
+    bits = np.frexp(resto)[1]
+    # Só 64 - BITS_HLL bits sobram depois do registro: sem nenhum bit 1, a posição é a seguinte
+    posicoes = np.minimum(54 - bits, 64 - BITS_HLL + 1).astype(np.uint8)
+    return registros, posicoes
+
+def estimar_distintos(registros):
+    """Estimativa do HyperLogLog, com a correção de contagem linear para poucos valores."""
+    m = len(registros)
+    alfa = 0.7213 / (1 + 1.079 / m)
+    estimativa = alfa * m * m / np.sum(2.0 ** -registros.astype('float64'))
+    vazios = int(np.count_nonzero(registros == 0))
+    if estimativa <= 2.5 * m and vazios:
+        return m * np.log(m / vazios)
+    return estimativa
+
+# ------------------------------------------------------------------------------
+# Mais frequentes: Count-Min
+# ------------------------------------------------------------------------------
+def posicoes_cm(hashes):
+    """Coluna de cada valor em cada linha do Count-Min: matriz (linhas, valores)."""
+    deslocamento = np.uint64(64 - int(np.log2(LARGURA_CM)))
+    return np.stack([((hashes * multiplicador) >> deslocamento).astype(np.int64)
+                     for multiplicador in MULTIPLICADORES_CM])
+
+def estimar_frequencias(tabela_cm, valores):
+    """Frequência estimada de cada valor (o mínimo entre as linhas; nunca menor que a real)."""
+    if len(valores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    posicoes = posicoes_cm(hash_valores(valores))
+    return np.min(tabela_cm[np.arange(len(MULTIPLICADORES_CM))[:, None], posicoes], axis=0)
+
+def manter_candidatos(tabela_cm, candidatos):
+    """Fica só com os CANDIDATOS_FREQUENTES valores de maior frequência estimada."""
+    candidatos = pd.unique(np.asarray(candidatos))
+    frequencias = estimar_frequencias(tabela_cm, candidatos)
+    return candidatos[np.argsort(-frequencias, kind='stable')[:CANDIDATOS_FREQUENTES]]
+
+# ==============================================================================
+# ESBOÇOS NA CARGA
+# ==============================================================================
+class DestinoEsbocos:
+    """
+    Atualiza, a cada pedaço, os esboços de cada (arquivo, classe, coluna): quantis das
+    colunas numéricas, distintos de todas as colunas e mais frequentes das colunas de
+    `colunas_frequentes`. Cada arquivo é gravado ao terminar, como no resumo por classe.
+    """
+
+    def __init__(self, caminho_db, coluna_grupo, tipos_colunas, colunas_frequentes=()):
+        self.caminho_db = caminho_db
+        self.coluna_grupo = coluna_grupo
+        self.colunas_numericas = [col for col, tipo in tipos_colunas.items()
+                                  if tipo in ('INTEGER', 'REAL') and col != coluna_grupo]
+        self.colunas = [col for col in tipos_colunas if col != coluna_grupo]
+        self.colunas_frequentes = [col for col in colunas_frequentes if col in tipos_colunas]
+        self.histogramas = {} # {(arquivo, classe, coluna): [histogramas parciais]}
+        self.registros_hll = {} # {(arquivo, classe, coluna): registros do HyperLogLog}
+        self.contagens_cm = {} # {(arquivo, classe, coluna): (tabela do Count-Min, candidatos)}
+        conn = sqlite3.connect(caminho_db)
+        criar_tabela_esbocos(conn)
+        conn.close()
+
+    def processar(self, chunk):
+        """Atualiza os esboços com as linhas do pedaço (todas do mesmo arquivo)."""
+        if chunk.empty:
+            return
+        id_arquivo = int(chunk[ingestao.COLUNA_ID_ARQUIVO].iat[0])
+        codigos, grupos = pd.factorize(ingestao.coluna_ou_nula(chunk, self.coluna_grupo), use_na_sentinel=False)
+        grupos = [None if pd.isna(grupo) else grupo for grupo in grupos]
+        for col in self.colunas:
+            if col not in chunk.columns:
+                continue
+            serie = chunk[col]
+            presentes = serie.notna().to_numpy()
+            if col in self.colunas_numericas:
+                valores = serie.to_numpy('float64', na_value=np.nan)
+                presentes = presentes & np.isfinite(valores)
+                self._atualizar_quantis(id_arquivo, col, grupos, codigos[presentes], valores[presentes])
+            if not presentes.any():
+                continue
+            hashes = hash_valores(serie[presentes])
+            self._atualizar_hll(id_arquivo, col, grupos, codigos[presentes], hashes)
+            if col in self.colunas_frequentes:
+                self._atualizar_cm(id_arquivo, col, grupos, codigos[presentes], hashes, serie[presentes])
+
+    def _atualizar_quantis(self, id_arquivo, col, grupos, codigos, valores):
+        """Conta os valores de cada classe por intervalo logarítmico."""
+        if len(valores) == 0:
+            return
+        chaves = chaves_quantis(valores)
+        menor = chaves.min()
+        largura = int(chaves.max() - menor) + 1
+        combinadas, contagens = np.unique(codigos * largura + (chaves - menor), return_counts=True)
+        por_grupo = combinadas // largura
+        for codigo in np.unique(por_grupo):
+            selecionadas = por_grupo == codigo
+            histograma = pd.Series(contagens[selecionadas], index=combinadas[selecionadas] % largura + menor)
+            self.histogramas.setdefault((id_arquivo, grupos[codigo], col), []).append(histograma)
+
+    def _atualizar_hll(self, id_arquivo, col, grupos, codigos, hashes):
+        """Guarda, em cada registro de cada classe, a maior posição de bit vista."""
+        m = 1 << BITS_HLL
+        registros, posicoes = posicoes_hll(hashes)
+        maximos = np.zeros(len(grupos) * m, dtype=np.uint8)
+        np.maximum.at(maximos, codigos * m + registros, posicoes)
+        for codigo in np.unique(codigos):
+            chave = (id_arquivo, grupos[codigo], col)
+            novos = maximos[codigo * m:(codigo + 1) * m]
+            self.registros_hll[chave] = np.maximum(self.registros_hll.get(chave, novos), novos)
+
+    def _atualizar_cm(self, id_arquivo, col, grupos, codigos, hashes, valores):
+        """Soma as contagens no Count-Min e renova os candidatos a mais frequentes de cada classe."""
+        posicoes = posicoes_cm(hashes)
+        valores = valores.to_numpy()
+        for codigo in np.unique(codigos):
+            selecionadas = codigos == codigo
+            chave = (id_arquivo, grupos[codigo], col)
+            tabela, candidatos = self.contagens_cm.get(
+                chave, (np.zeros((len(MULTIPLICADORES_CM), LARGURA_CM), dtype=np.int64), valores[:0]))
+            for linha in range(len(MULTIPLICADORES_CM)):
+                tabela[linha] += np.bincount(posicoes[linha, selecionadas], minlength=LARGURA_CM)
+            # Candidatos: os mais comuns do pedaço mais os que já estavam na lista
+            locais = pd.Series(valores[selecionadas]).value_counts().index[:CANDIDATOS_FREQUENTES].to_numpy()
+            self.contagens_cm[chave] = (tabela, manter_candidatos(tabela, np.concatenate([candidatos, locais])))
+
+    def concluir_arquivo(self, info):
+        """Grava os esboços do arquivo concluído e apaga os da versão antiga."""
+        id_arquivo = info['id']
+        linhas = []
+        for chave in [chave for chave in self.histogramas if chave[0] == id_arquivo]:
+            histograma = pd.concat(self.histogramas.pop(chave)).groupby(level=0).sum()
+            linhas.append(chave + ('quantis', serializar(chaves=histograma.index.to_numpy(),
+                                                         contagens=histograma.to_numpy())))
+        for chave in [chave for chave in self.registros_hll if chave[0] == id_arquivo]:
+            linhas.append(chave + ('distintos', serializar(registros=self.registros_hll.pop(chave))))
+        for chave in [chave for chave in self.contagens_cm if chave[0] == id_arquivo]:
+            tabela, candidatos = self.contagens_cm.pop(chave)
+            if candidatos.dtype == object:
+                candidatos = candidatos.astype(str) # Textos gravados sem pickle
+            linhas.append(chave + ('frequentes', serializar(tabela=tabela, candidatos=candidatos)))
+        conn = sqlite3.connect(self.caminho_db)
+        remover_esbocos(conn, info['ids_antigos'])
+        # Numa carga retomada só o final do arquivo passou por aqui: os esboços desse
+        # arquivo ficam para sincronizar_esbocos, que os calcula a partir da tabela
+        if 'retomada' not in info:
+            gravar_esbocos(conn, linhas)
+        conn.commit()
+        conn.close()
+
+    def finalizar(self):
+        """Nada a fazer: cada arquivo já foi gravado ao terminar."""
+
+# ==============================================================================
+# GRAVAÇÃO E SINCRONIZAÇÃO NO BANCO
+# ==============================================================================
+def serializar(**arrays):
+    """Junta os arrays de um esboço em um BLOB (formato .npz compactado, sem pickle)."""
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+def desserializar(dados):
+    """Lê os arrays de um BLOB gravado por serializar."""
+    with np.load(io.BytesIO(dados), allow_pickle=False) as arquivo:
+        return {nome: arquivo[nome] for nome in arquivo.files}
+
+def criar_tabela_esbocos(conn):
+    """Cria a tabela dos esboços, se ainda não existir."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_ESBOCOS} (
+            {ingestao.COLUNA_ID_ARQUIVO} INTEGER,
+            grupo TEXT,
+            coluna TEXT,
+            tipo TEXT,
+            dados BLOB
+        )""")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABELA_ESBOCOS}_arquivo "
+                 f"ON {TABELA_ESBOCOS} ({ingestao.COLUNA_ID_ARQUIVO})")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABELA_ESBOCOS}_coluna ON {TABELA_ESBOCOS} (tipo, coluna)")
+
+def gravar_esbocos(conn, linhas):
+    """Insere linhas (arquivo, grupo, coluna, tipo, dados)."""
+    conn.executemany(f"INSERT INTO {TABELA_ESBOCOS} ({ingestao.COLUNA_ID_ARQUIVO}, grupo, coluna, tipo, dados) "
+                     f"VALUES (?, ?, ?, ?, ?)", linhas)
+
+def remover_esbocos(conn, ids_arquivos):
+    """Apaga os esboços dos arquivos indicados."""
+    if ids_arquivos:
+        marcadores = ', '.join('?' * len(ids_arquivos))
+        conn.execute(f"DELETE FROM {TABELA_ESBOCOS} WHERE {ingestao.COLUNA_ID_ARQUIVO} IN ({marcadores})",
+                     list(ids_arquivos))
+
+def sincronizar_esbocos(caminho_db, tabela, coluna_grupo, colunas_frequentes=()):
+    """
+    Confere os esboços com o manifesto: apaga os de arquivos que não existem mais e
+    calcula, lendo a tabela, os dos arquivos que ficaram sem (bancos anteriores aos
+    esboços ou cargas retomadas).
+    """
+    conn = sqlite3.connect(caminho_db)
+    criar_tabela_esbocos(conn)
+    conn.execute(f"DELETE FROM {TABELA_ESBOCOS} WHERE {ingestao.COLUNA_ID_ARQUIVO} NOT IN "
+                 f"(SELECT id FROM {ingestao.TABELA_MANIFESTO} WHERE situacao = 'ok')")
+    faltantes = [linha[0] for linha in conn.execute(
+        f"SELECT id FROM {ingestao.TABELA_MANIFESTO} WHERE situacao = 'ok' AND id NOT IN "
+        f"(SELECT DISTINCT {ingestao.COLUNA_ID_ARQUIVO} FROM {TABELA_ESBOCOS})")]
+    conn.commit()
+    if faltantes:
+        print(f"Calculando os esboços estatísticos de {len(faltantes)} arquivo(s) a partir da tabela...")
+        destino = DestinoEsbocos(caminho_db, coluna_grupo, ingestao.tipos_da_tabela(conn, tabela), colunas_frequentes)
+        for id_arquivo in faltantes:
+            consulta = f"SELECT * FROM {tabela} WHERE {ingestao.COLUNA_ID_ARQUIVO} = ?"
+            for chunk in pd.read_sql_query(consulta, conn, params=(id_arquivo,), chunksize=ingestao.TAMANHO_CHUNK):
+                destino.processar(ingestao.decodificar_colunas(conn, tabela, chunk))
+            destino.concluir_arquivo({'id': id_arquivo, 'ids_antigos': []})
+    conn.close()
+
+# ==============================================================================
+# CONSULTAS AOS ESBOÇOS
+# ==============================================================================
+def ler_esbocos(conn, tipo, coluna):
+    """Gera (grupo, arrays) dos esboços de um tipo e coluna, só de arquivos carregados por completo."""
+    consulta = (f"SELECT e.grupo, e.dados FROM {TABELA_ESBOCOS} e JOIN {ingestao.TABELA_MANIFESTO} m "
+                f"ON m.id = e.{ingestao.COLUNA_ID_ARQUIVO} WHERE m.situacao = 'ok' AND e.tipo = ? AND e.coluna = ?")
+    for grupo, dados in conn.execute(consulta, (tipo, coluna)):
+        yield grupo, desserializar(dados)
+
+def esbocos_existem(conn):
+    """Diz se o banco tem esboços gravados."""
+    return (ingestao.tabela_existe(conn, TABELA_ESBOCOS)
+            and conn.execute(f"SELECT 1 FROM {TABELA_ESBOCOS} LIMIT 1").fetchone() is not None)
+
+def histogramas_por_grupo(conn, coluna):
+    """Junta os histogramas de quantis de todos os arquivos: {grupo: Series chave -> contagem}."""
+    partes = {}
+    for grupo, arrays in ler_esbocos(conn, 'quantis', coluna):
+        partes.setdefault(grupo, []).append(pd.Series(arrays['contagens'], index=arrays['chaves']))
+    return {grupo: pd.concat(series).groupby(level=0).sum() for grupo, series in partes.items()}
+
+def quantis_por_grupo(conn, coluna, quantis=(0.25, 0.5, 0.75), grupos=None):
+    """
+    Quantis aproximados de uma coluna numérica em cada grupo (classe), sobre todas as
+    linhas carregadas. Com `grupos=None`, todos os grupos e a linha 'Todos' (população inteira).
+    """
+    histogramas = histogramas_por_grupo(conn, coluna)
+    if not histogramas:
+        return pd.DataFrame(columns=list(quantis))
+    if grupos is None:
+        grupos = sorted(histogramas, key=str)
+        histogramas['Todos'] = pd.concat(list(histogramas.values())).groupby(level=0).sum()
+        grupos.append('Todos')
+    linhas = {grupo: quantis_do_histograma(histogramas[grupo], quantis) for grupo in grupos if grupo in histogramas}
+    return pd.DataFrame.from_dict(linhas, orient='index', columns=list(quantis))
+
+def caixas_aproximadas(conn, coluna, grupos):
+    """
+    Estatísticas de box plot (formato de Axes.bxp) de cada grupo a partir dos esboços:
+    quartis com erro relativo de no máximo ERRO_RELATIVO_QUANTIS, sem ler a tabela. Os bigodes
+    dependem do IQR estimado, então o erro deles pode ser um pouco maior. A média e o número de linhas vêm do resumo por classe.
+    """
+    histogramas = histogramas_por_grupo(conn, coluna)
+    resumo = ingestao.ler_resumo(conn, [coluna]).set_index('grupo')
+    caixas = []
+    for grupo in grupos:
+        if grupo not in histogramas:
+            continue
+        histograma = histogramas[grupo]
+        q1, mediana, q3 = quantis_do_histograma(histograma, (0.25, 0.5, 0.75))
+        iqr = q3 - q1
+        valores = valores_das_chaves(histograma.index.to_numpy())
+        # Bigodes: valores extremos (representantes dos intervalos) dentro de 1,5 x IQR dos quartis
+        dentro = valores[(valores >= q1 - 1.5 * iqr) & (valores <= q3 + 1.5 * iqr)]
+        caixas.append({
+            'label': grupo, 'med': mediana, 'q1': q1, 'q3': q3, 'mean': resumo.loc[grupo, 'media'],
+            'whislo': dentro.min(), 'whishi': dentro.max(), 'fliers': [], 'n': int(histograma.sum()),
+        })
+    return caixas
+
+def contar_distintos(conn, colunas, por_grupo=False):
+    """
+    Número aproximado de valores distintos de cada coluna (HyperLogLog) na população
+    inteira ou, com `por_grupo`, em cada grupo (DataFrame grupo x coluna).
+    """
+    estimativas = {}
+    for coluna in colunas:
+        registros = {}
+        for grupo, arrays in ler_esbocos(conn, 'distintos', coluna):
+            chave = grupo if por_grupo else 'Todos'
+            registros[chave] = np.maximum(registros.get(chave, arrays['registros']), arrays['registros'])
+        estimativas[coluna] = {grupo: round(estimar_distintos(regs)) for grupo, regs in registros.items()}
+    resultado = pd.DataFrame(estimativas)
+    if por_grupo:
+        return resultado
+    return resultado.loc['Todos'] if 'Todos' in resultado.index else pd.Series(dtype='float64')
+
+def mais_frequentes(conn, coluna, k=10, grupo=None):
+    """
+    Os `k` valores mais frequentes da coluna (Count-Min com candidatos), na população
+    inteira ou em um grupo. A contagem estimada nunca é menor que a real.
+    """
+    tabela, candidatos = None, []
+    for grupo_esboco, arrays in ler_esbocos(conn, 'frequentes', coluna):
+        if grupo is not None and grupo_esboco != grupo:
+            continue
+        tabela = arrays['tabela'] if tabela is None else tabela + arrays['tabela']
+        candidatos.append(arrays['candidatos'])
+    if tabela is None:
+        return pd.DataFrame(columns=['valor', 'contagem_estimada'])
+    candidatos = pd.unique(np.concatenate(candidatos))
+    frequencias = estimar_frequencias(tabela, candidatos)
+    ordem = np.argsort(-frequencias, kind='stable')[:k]
+    return pd.DataFrame({'valor': candidatos[ordem], 'contagem_estimada': frequencias[ordem]})
@@ -0,0 +1,118 @@
+import json
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import ingestao
+
+# ==============================================================================
+# ESQUEMA DE TIPOS PERSISTIDO (DTYPES MAIS ESTREITOS)
+# ==============================================================================
+# O esquema é calculado a partir do resumo por classe (label_summary), que já guarda,
+# para o fluxo inteiro de dados, contagem, mínimo, máximo, infinitos e valores não
+# inteiros de cada coluna. O resultado é gravado em JSON e usado como `dtype=` nas
+# leituras seguintes, no lugar do float64/object padrão do pandas.
+
+# Faixas dos inteiros, do mais estreito para o mais largo
+FAIXAS_INTEIRAS = [(dtype, np.iinfo(dtype).min, np.iinfo(dtype).max)
+                   for dtype in ('int8', 'int16', 'int32', 'int64')]
+MAXIMO_FLOAT32 = float(np.finfo('float32').max)
+
+
+def dtype_mais_estreito(tipo_sql, linhas, nulos, infinitos, fracionarios, minimo, maximo, categorica=False):
+    """Escolhe o menor dtype do pandas que representa a coluna sem perder valores."""
+    if tipo_sql == 'TEXT':
+        return 'category' if categorica else 'object'
+    if nulos == linhas:
+        return 'float32' # Coluna inteira nula
+    if minimo is None or maximo is None:
+        return 'float64' # Sem valores finitos (só infinitos): não há faixa para estreitar
+    if not infinitos and not fracionarios:
+        for dtype, menor, maior in FAIXAS_INTEIRAS:
+            if menor <= minimo and maximo <= maior:
+                # Inteiros com nulos usam o tipo "nullable" do pandas (Int8, Int16, ...)
+                return dtype.capitalize() if nulos else dtype
+    if max(abs(minimo), abs(maximo)) <= MAXIMO_FLOAT32:
+        return 'float32'
+    return 'float64'
+
+
+def gerar_esquema(caminho_db, tabela, coluna_grupo, tabela_amostra):
+    """Monta o esquema de todas as colunas da tabela a partir do resumo por classe."""
+    conn = sqlite3.connect(caminho_db)
+    tipos_sql = ingestao.tipos_da_tabela(conn, tabela)
+    categoricas = set(ingestao.colunas_categoricas(conn, tabela_amostra, tipos_sql))
+    resumo = ingestao.ler_resumo(conn)
+    conn.close()
+
+    contagens = resumo[resumo['coluna'] == ingestao.COLUNA_CONTAGEM]
+    linhas = int(contagens['n'].sum())
+    por_coluna = resumo.groupby('coluna').agg(
+        n=('n', 'sum'), minimo=('minimo', 'min'), maximo=('maximo', 'max'),
+        infinitos=('infinitos', 'sum'), fracionarios=('fracionarios', 'sum'))
+    # A coluna de grupo não está no resumo: seus nulos são as linhas sem classe
+    por_coluna.loc[coluna_grupo, 'n'] = linhas - int(contagens.loc[contagens['grupo'].isna(), 'n'].sum())
+
+    colunas = {}
+    for col, tipo_sql in tipos_sql.items():
+        estatisticas = por_coluna.loc[col] if col in por_coluna.index else None
+        nao_nulos = int(estatisticas['n']) if estatisticas is not None else 0
+        infinitos = int(np.nan_to_num(estatisticas['infinitos'])) if estatisticas is not None else 0
+        fracionarios = int(np.nan_to_num(estatisticas['fracionarios'])) if estatisticas is not None else 0
+        minimo = estatisticas['minimo'] if estatisticas is not None and pd.notna(estatisticas['minimo']) else None
+        maximo = estatisticas['maximo'] if estatisticas is not None and pd.notna(estatisticas['maximo']) else None
+        # Em colunas numéricas, `n` não conta os infinitos
+        nulos = linhas - nao_nulos - infinitos
+        colunas[col] = {
+            'tipo_sql': tipo_sql,
+            'dtype': dtype_mais_estreito(tipo_sql, linhas, nulos, infinitos, fracionarios,
+                                         minimo, maximo, categorica=col in categoricas),
+            'nulos': nulos,
+            'infinitos': infinitos,
+            'fracionarios': fracionarios,
+            'minimo': minimo,
+            'maximo': maximo,
+        }
+    return {
+        'tabela': tabela,
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'linhas': linhas,
+        'colunas': colunas,
+    }
+
+
+def salvar_esquema(caminho_json, esquema):
+    """Grava o esquema em JSON (legível, um campo por linha)."""
+    with open(caminho_json, 'w', encoding='utf-8') as f:
+        json.dump(esquema, f, ensure_ascii=False, indent=2)
+
+
+def carregar_esquema(caminho_json):
+    """Lê o esquema salvo e retorna {coluna: dtype}."""
+    with open(caminho_json, encoding='utf-8') as f:
+        esquema = json.load(f)
+    return {col: info['dtype'] for col, info in esquema['colunas'].items()}
+
+
+def carregar_tipos_sql(caminho_json):
+    """Lê o esquema salvo e retorna {coluna: tipo SQL} (INTEGER, REAL ou TEXT)."""
+    with open(caminho_json, encoding='utf-8') as f:
+        esquema = json.load(f)
+    return {col: info['tipo_sql'] for col, info in esquema['colunas'].items()}
+
+
+def dtypes_para(dtypes, colunas):
+    """Filtra o esquema para as colunas de uma consulta (pronto para `dtype=` do pandas)."""
+    return {col: dtypes[col] for col in colunas if col in dtypes and dtypes[col] != 'object'}
+
+
+def bytes_por_linha(dtypes, colunas_numericas):
+    """Estima os bytes por linha das colunas numéricas: (float64 padrão, com o esquema)."""
+    total_esquema = 0
+    for col in colunas_numericas:
+        dtype = dtypes[col]
+        # Inteiros "nullable" (Int8, Int16, ...) guardam também 1 byte de máscara de nulos
+        total_esquema += np.dtype(dtype.lower()).itemsize + (1 if dtype[0].isupper() else 0)
+    return 8 * len(colunas_numericas), total_esquema
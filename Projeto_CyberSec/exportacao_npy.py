@@ -0,0 +1,148 @@
+import json
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import ingestao
+import conexoes # Conexão somente leitura (mmap) para percorrer a tabela
+import ranking_atributos # Colunas numéricas e SELECT com a tabela fria (mesma leitura do ranking)
+
+# ==============================================================================
+# EXPORTAÇÃO DE COLUNAS PARA ARRAYS NUMPY MAPEADOS EM MEMÓRIA (.npy)
+# ==============================================================================
+# Cada coluna numérica escolhida vira um arquivo .npy contíguo (int32 se o esquema diz que
+# ela é inteira, sem nulos e cabe em 32 bits; senão float32, com NaN nos nulos). A classe
+# vira um array int32 de códigos (índice na lista "classes" do metadados.json). Só as
+# linhas com classe são exportadas, na mesma ordem em todos os arquivos.
+# Os experimentos abrem os arquivos com np.load(mmap_mode='r'): nada é lido até o uso, as
+# fatias não copiam dados e processos diferentes compartilham as páginas do cache do
+# sistema, sem decodificar linhas do SQLite nem montar DataFrames a cada execução.
+# Os arquivos são gravados com o sufixo ".parcial" e só trocam os anteriores no final.
+
+PASTA_NPY = 'npy'
+ARQUIVO_METADADOS = 'metadados.json'
+SUFIXO_PARCIAL = '.parcial'
+CODIGO_DESCONHECIDO = -1 # Classe fora da lista (não deveria acontecer)
+INTEIROS_32 = ('int8', 'int16', 'int32', 'uint8', 'uint16') # dtypes do esquema que cabem em int32
+
+
+def nome_arquivo(coluna):
+    """Nome de arquivo seguro para a coluna (ex.: "Flow Pkts/s" -> "Flow_Pkts_s.npy")."""
+    return f"{re.sub(r'[^0-9A-Za-z]+', '_', coluna).strip('_')}.npy"
+
+
+def dtype_exportado(dtype_esquema):
+    """
+    int32 para colunas inteiras sem nulos que cabem em 32 bits; float32 para as demais
+    (inteiros acima de 2^24 perdem as últimas casas no float32).
+    """
+    return 'int32' if dtype_esquema in INTEIROS_32 else 'float32'
+
+
+def exportar_npy(caminho_db, tabela, coluna_classe, pasta, dtypes, colunas=None, excluidas=()):
+    """
+    Grava as colunas (None = todas as numéricas, sem `excluidas`) e os códigos da classe em
+    .npy na `pasta`, lendo a tabela (e a tabela fria) uma vez, em pedaços. Retorna os metadados.
+    """
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    conn = conexoes.abrir_leitura(caminho_db)
+    # Uma transação de leitura: a contagem e a leitura veem os mesmos dados
+    conn.execute('BEGIN')
+    numericas = ranking_atributos.atributos_numericos(conn, tabela, coluna_classe)
+    if colunas is None:
+        colunas = [col for col in numericas if col not in excluidas]
+    else:
+        ignoradas = [col for col in colunas if col not in numericas]
+        if ignoradas:
+            print(f"AVISO: colunas inexistentes ou não numéricas ficam fora da exportação: {', '.join(ignoradas)}")
+        colunas = [col for col in colunas if col in numericas]
+    linhas = conn.execute(f'SELECT COUNT(*) FROM {tabela} WHERE "{coluna_classe}" IS NOT NULL').fetchone()[0]
+    if not linhas:
+        conn.close()
+        print("Nenhuma linha com classe na tabela. Nada a exportar.")
+        return None
+    # Códigos da exportação: posição da classe na lista ordenada. No armazenamento compacto a
+    # tabela guarda o código do banco, que é traduzido para essa posição.
+    tabela_codigos = ingestao.colunas_codificadas(conn, tabela).get(coluna_classe)
+    if tabela_codigos:
+        gravados = ingestao.ler_codigos(conn, tabela_codigos)
+        classes = sorted(gravados.values())
+        codigos = {codigo: classes.index(valor) for codigo, valor in gravados.items()}
+    else:
+        classes = sorted(valor for (valor,) in conn.execute(
+            f'SELECT DISTINCT "{coluna_classe}" FROM {tabela} WHERE "{coluna_classe}" IS NOT NULL'))
+        codigos = {valor: i for i, valor in enumerate(classes)}
+
+    arquivos = {col: nome_arquivo(col) for col in colunas}
+    arquivo_classe = nome_arquivo(f"{coluna_classe}_codigos")
+    tipos = {col: dtype_exportado(dtypes.get(col)) for col in colunas}
+    destinos = {col: np.lib.format.open_memmap(pasta / f"{arquivos[col]}{SUFIXO_PARCIAL}", mode='w+',
+                                               dtype=tipos[col], shape=(linhas,)) for col in colunas}
+    destino_classe = np.lib.format.open_memmap(pasta / f"{arquivo_classe}{SUFIXO_PARCIAL}", mode='w+',
+                                               dtype='int32', shape=(linhas,))
+
+    inicio = time.perf_counter()
+    consulta = ranking_atributos.consulta_atributos(conn, tabela, coluna_classe, colunas)
+    posicao = 0
+    for chunk in pd.read_sql_query(consulta, conn, chunksize=ingestao.TAMANHO_CHUNK):
+        fim = posicao + len(chunk)
+        destino_classe[posicao:fim] = chunk.iloc[:, 0].map(codigos).fillna(CODIGO_DESCONHECIDO).to_numpy('int32')
+        for i, col in enumerate(colunas, start=1):
+            if tipos[col] == 'int32':
+                if chunk.iloc[:, i].isna().any():
+                    raise ValueError(f"a coluna '{col}' tem nulos, mas o esquema diz que não. "
+                                     f"Execute a etapa 'resumos' para atualizar o esquema.")
+                destinos[col][posicao:fim] = chunk.iloc[:, i].to_numpy('int32')
+            else:
+                destinos[col][posicao:fim] = chunk.iloc[:, i].to_numpy('float32', na_value=np.nan)
+        posicao = fim
+    manifesto = conn.execute(f"SELECT id, caminho, linhas FROM {ingestao.TABELA_MANIFESTO} "
+                             f"WHERE situacao = 'ok' ORDER BY id").fetchall()
+    conn.close()
+
+    for destino in [*destinos.values(), destino_classe]:
+        destino.flush()
+    del destinos, destino_classe
+    # Só depois de tudo gravado os arquivos novos trocam os anteriores
+    for arquivo in [*arquivos.values(), arquivo_classe]:
+        os.replace(pasta / f"{arquivo}{SUFIXO_PARCIAL}", pasta / arquivo)
+    metadados = {
+        'tabela': tabela,
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'linhas': linhas,
+        'colunas': {col: {'arquivo': arquivos[col], 'dtype': tipos[col]} for col in colunas},
+        'coluna_classe': coluna_classe,
+        'arquivo_classe': arquivo_classe,
+        'classes': classes,
+        'arquivos_carregados': [{'id': id_arquivo, 'caminho': caminho, 'linhas': n}
+                                for id_arquivo, caminho, n in manifesto],
+    }
+    with open(pasta / f"{ARQUIVO_METADADOS}{SUFIXO_PARCIAL}", 'w', encoding='utf-8') as f:
+        json.dump(metadados, f, ensure_ascii=False, indent=2)
+    os.replace(pasta / f"{ARQUIVO_METADADOS}{SUFIXO_PARCIAL}", pasta / ARQUIVO_METADADOS)
+
+    segundos = time.perf_counter() - inicio
+    tamanho = sum((pasta / arquivo).stat().st_size for arquivo in [*arquivos.values(), arquivo_classe])
+    print(f"{ingestao.formatar_numero(linhas)} linhas x {len(colunas)} colunas exportadas em {segundos:.1f}s "
+          f"({tamanho / 1024 ** 2:.1f} MiB em '{pasta}').")
+    return metadados
+
+
+def abrir_npy(pasta, colunas=None):
+    """
+    Abre a exportação sem ler os dados: retorna ({coluna: array mapeado}, códigos da classe,
+    metadados). Os arrays são somente leitura e as fatias não copiam dados.
+    """
+    pasta = Path(pasta)
+    with open(pasta / ARQUIVO_METADADOS, encoding='utf-8') as f:
+        metadados = json.load(f)
+    colunas = list(metadados['colunas']) if colunas is None else colunas
+    arrays = {col: np.load(pasta / metadados['colunas'][col]['arquivo'], mmap_mode='r') for col in colunas}
+    classes = np.load(pasta / metadados['arquivo_classe'], mmap_mode='r')
+    return arrays, classes, metadados
@@ -0,0 +1,1464 @@
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Dependência opcional: usada pelo cache colunar em Parquet e pelo leitor de CSV multithread
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pacsv = ds = pq = None
+
+# ==============================================================================
+# CONFIGURAÇÕES PADRÃO DA CARGA
+# ==============================================================================
+TAMANHO_CHUNK = 100000 # Linhas lidas por pedaço (também usado na pré-análise de tipos)
+# Leitores de CSV disponíveis: 'pandas' (read_csv em pedaços, uma thread) ou
+# 'pyarrow' (pyarrow.csv em fluxo, blocos interpretados em várias threads)
+LEITORES_CSV = ('pandas', 'pyarrow')
+# Bytes de CSV por pedaço da carga. Os pedaços terminam sempre em fim de linha, então a
+# posição (em bytes) do fim de cada um permite retomar uma carga interrompida dali.
+TAMANHO_BLOCO_CSV = 32 * 1024 * 1024
+EXEMPLOS_NAO_NUMERICOS = 5 # Valores mostrados no erro de uma coluna numérica com texto
+LINHAS_POR_TRANSACAO = 500000 # O escritor faz COMMIT a cada ~500 mil linhas
+# PRAGMAs usados apenas durante a carga em massa (o banco volta ao modo normal no final)
+PRAGMAS_CARGA = {
+    'journal_mode': 'WAL',
+    'synchronous': 'OFF',
+    'cache_size': -262144, # Valor negativo = tamanho em KiB (256 MiB)
+    'temp_store': 'MEMORY',
+}
+FIM_ARQUIVO = '__FIM__' # Marcador enviado pelos processos quando terminam um arquivo
+TABELA_MANIFESTO = 'manifesto_arquivos' # Registro dos arquivos já carregados no banco
+COLUNA_ID_ARQUIVO = '_id_arquivo' # Coluna extra que liga cada linha ao seu arquivo de origem
+SEPARADOR_ZIP = '::' # Fonte dentro de um ZIP: "pasta/arquivo.zip::membro.csv"
+FONTE_ENTRADA_PADRAO = '-' # Fonte lida da entrada padrão (stdin)
+COLUNA_CHAVE_AMOSTRA = '_chave_amostra' # Chave aleatória usada na amostra estratificada
+TIPOS_ARROW = {'INTEGER': 'int64', 'REAL': 'float64', 'TEXT': 'string'} # Tipo SQLite -> tipo Arrow
+TABELA_RESUMO = 'label_summary' # Somas, mínimos e máximos por classe e por coluna numérica
+COLUNA_CONTAGEM = '*' # Linha do resumo que guarda só o total de linhas da classe
+LIMITE_CATEGORIAS = 1000 # Colunas de texto com até esse número de valores distintos ganham índice
+TABELA_CORRECOES = 'correcoes_ingestao' # Quantas correções a limpeza fez em cada coluna de cada arquivo
+ATRIBUTO_CORRECOES = 'correcoes' # Chave em chunk.attrs com as correções feitas naquele pedaço
+ATRIBUTO_POSICAO = 'posicao' # Chave em chunk.attrs com a posição (bytes) do fim do pedaço no CSV
+TABELA_CHECKPOINTS = 'checkpoints_carga' # Último pedaço gravado de cada arquivo ainda em carga
+ATRIBUTO_PEDACO = 'pedaco' # Chave em chunk.attrs com o índice do pedaço no arquivo
+ESTATISTICAS_RESUMO = ['n', 'soma', 'soma_quadrados', 'minimo', 'maximo', 'infinitos', 'fracionarios']
+SUFIXO_TABELA_FRIA = '_fria' # Tabela opcional com as colunas que ficaram fora da projeção
+TABELA_PROJECAO = 'projecao_colunas' # Destino de cada coluna, fixado na criação da tabela
+DESTINO_PRINCIPAL, DESTINO_FRIA, DESTINO_DESCARTADA = 'principal', 'fria', 'descartada'
+COLUNA_LINHA = '_linha' # Número da linha no arquivo: liga a tabela principal à tabela fria
+COLUNAS_INTERNAS = (COLUNA_ID_ARQUIVO, COLUNA_LINHA)
+SUFIXO_VISAO_LEGIVEL = '_legivel' # Visão da tabela compacta com os códigos e datas já traduzidos
+PAGE_SIZE_COMPACTO = 16384 # Páginas maiores: menos sobrecarga por página nas tabelas largas e varreduras longas
+
+# ==============================================================================
+# FUNÇÕES AUXILIARES DA CARGA
+# ==============================================================================
+def limpar_nomes_colunas(df):
+    """Remove espaços e quebras de linha dos nomes das colunas."""
+    df.columns = df.columns.str.strip().str.replace('\n', '')
+    return df
+
+def coluna_ou_nula(chunk, coluna):
+    """Coluna do pedaço ou, se o arquivo não a tiver, uma série de Nulos."""
+    if coluna in chunk.columns:
+        return chunk[coluna]
+    return pd.Series(np.nan, index=chunk.index, name=coluna)
+
+def limpar_nome(nome):
+    """Mesma limpeza de limpar_nomes_colunas, para um único nome (ex.: no `usecols` do pandas)."""
+    return nome.strip().replace('\n', '')
+
+def inferir_tipo_sql(serie):
+    """
+    Define o tipo SQLite (INTEGER, REAL ou TEXT) de uma coluna a partir do primeiro pedaço
+    (já sem os cabeçalhos repetidos). Um único valor que não é número faz a coluna ser TEXT:
+    numa coluna numérica ele viraria Nulo.
+    """
+    valores = serie.dropna()
+    if valores.empty:
+        return None # Sem valores no pedaço: o tipo fica indefinido
+    convertida = pd.to_numeric(valores, errors='coerce')
+    if convertida.isna().any():
+        return 'TEXT'
+    convertida = convertida.dropna()
+    finitos = convertida[np.isfinite(convertida)]
+    if (finitos % 1 == 0).all():
+        return 'INTEGER'
+    return 'REAL'
+
+def combinar_tipos(tipo_a, tipo_b):
+    """Combina os tipos de uma mesma coluna vindos de arquivos diferentes (TEXT > REAL > INTEGER)."""
+    ordem = [None, 'INTEGER', 'REAL', 'TEXT']
+    return max(tipo_a, tipo_b, key=ordem.index)
+
+def ler_chunks_convertidos(arquivo, tipos_colunas, id_arquivo, tamanho_bloco=TAMANHO_BLOCO_CSV, leitor='pandas',
+                           posicao_inicial=0, colunas_tempo=None):
+    """
+    Lê um CSV (do disco ou do ZIP) em pedaços já limpos e convertidos. As correções
+    da limpeza vão em chunk.attrs['correcoes'] e a posição (bytes) do fim do pedaço
+    em chunk.attrs['posicao']. Só as colunas de `tipos_colunas` são interpretadas
+    (as demais nem chegam ao pandas), e cada pedaço traz apenas as colunas que o
+    arquivo tem: as que faltam ficam com o valor padrão do SQLite (Nulo).
+    Com `posicao_inicial`, a leitura começa nesse byte (retomada de uma carga).
+    As colunas de `colunas_tempo` são lidas como texto e convertidas para epoch.
+    """
+    tipos_arquivo = None
+    ler_bloco = _bloco_pyarrow if leitor == 'pyarrow' else _bloco_pandas
+    colunas_tempo = colunas_tempo or {}
+    tipos_bloco = dict(tipos_colunas, **{col: 'TEXT' for col in colunas_tempo if col in tipos_colunas})
+    with abrir_fonte(arquivo) as fluxo:
+        cabecalho = fluxo.readline()
+        if posicao_inicial:
+            fluxo.seek(posicao_inicial)
+        aviso = {'arquivo': Path(arquivo).name, 'dado': False}
+        for posicao, bloco in _blocos_de_linhas(fluxo, tamanho_bloco, posicao_inicial or len(cabecalho)):
+            # Cabeçalhos repetidos saem antes da leitura: com eles, as colunas numéricas
+            # não poderiam ser lidas já com o tipo final
+            bloco, cabecalhos = _remover_linhas_de_cabecalho(bloco, cabecalho)
+            chunk = ler_bloco(cabecalho + bloco, tipos_bloco, aviso)
+            limpar_nomes_colunas(chunk)
+            # Repetições com outra formatação (ex.: espaços) só aparecem depois da leitura
+            chunk, outros_cabecalhos = remover_cabecalhos_repetidos(chunk)
+            cabecalhos += outros_cabecalhos
+            if tipos_arquivo is None:
+                # Mapeamento das colunas do arquivo, calculado uma vez a partir do cabeçalho
+                tipos_arquivo = {col: tipos_colunas[col] for col in chunk.columns}
+            try:
+                chunk_convertido, correcoes = limpar_e_converter(chunk, tipos_arquivo, colunas_tempo)
+            except ValueError as erro:
+                raise ValueError(f"{Path(arquivo).name}: {erro}") from erro
+            if cabecalhos:
+                correcoes.append((COLUNA_CONTAGEM, 'cabecalho_repetido', cabecalhos))
+            # Mesmo um pedaço vazio (só cabeçalhos repetidos) é entregue, para a posição avançar
+            chunk_convertido[COLUNA_ID_ARQUIVO] = id_arquivo
+            chunk_convertido.attrs[ATRIBUTO_CORRECOES] = correcoes
+            chunk_convertido.attrs[ATRIBUTO_POSICAO] = posicao
+            yield chunk_convertido
+
+def _fim_da_ultima_linha(dados):
+    """Posição do último fim de linha fora de aspas (campos entre aspas podem ter quebras de linha)."""
+    corte = dados.rfind(b'\n')
+    while corte >= 0 and dados.count(b'"', 0, corte) % 2:
+        corte = dados.rfind(b'\n', 0, corte)
+    return corte
+
+def _blocos_de_linhas(fluxo, tamanho_bloco, posicao):
+    """Gera (posição do fim do bloco, bytes do bloco) com blocos que terminam em fim de linha."""
+    resto = b''
+    while True:
+        dados = fluxo.read(tamanho_bloco)
+        if not dados:
+            if resto.strip():
+                yield posicao + len(resto), resto
+            return
+        dados = resto + dados
+        corte = _fim_da_ultima_linha(dados)
+        if corte < 0:
+            resto = dados # Nenhuma linha completa ainda: lê mais
+            continue
+        bloco, resto = dados[:corte + 1], dados[corte + 1:]
+        posicao += len(bloco)
+        yield posicao, bloco
+
+def _remover_linhas_de_cabecalho(bloco, cabecalho):
+    """Tira do bloco as linhas idênticas ao cabeçalho do arquivo. Retorna o bloco e quantas saíram."""
+    linha_cabecalho = cabecalho.rstrip(b'\r\n')
+    if linha_cabecalho not in bloco:
+        return bloco, 0 # Caso comum: a busca nos bytes evita separar o bloco em linhas
+    linhas = bloco.split(b'\n')
+    mantidas = [linha for linha in linhas if linha.rstrip(b'\r') != linha_cabecalho]
+    return b'\n'.join(mantidas), len(linhas) - len(mantidas)
+
+def _bloco_pandas(dados, tipos_colunas, aviso):
+    """Interpreta um bloco (cabeçalho + linhas) com o pandas, só com as colunas da tabela mestra."""
+    return pd.read_csv(io.BytesIO(dados), low_memory=False,
+                       usecols=lambda nome: limpar_nome(nome) in tipos_colunas)
+
+def _bloco_pyarrow(dados, tipos_colunas, aviso):
+    """
+    Interpreta um bloco com o pyarrow.csv em várias threads, já com o tipo final de cada
+    coluna (INTEGER -> int64, REAL -> float64) e só com as colunas da tabela mestra. Os
+    cabeçalhos repetidos já saíram do bloco; se ainda houver um valor fora do tipo, só esse
+    bloco é lido como texto e convertido pela limpeza.
+    """
+    # Os nomes no arquivo podem ter espaços; os tipos são conhecidos pelos nomes limpos
+    nomes = dados[:dados.find(b'\n') + 1]
+    nomes = pd.read_csv(io.BytesIO(nomes), nrows=0).columns
+    tipos_leitura = {nome: getattr(pa, TIPOS_ARROW[tipos_colunas[limpar_nome(nome)]])()
+                     for nome in nomes if limpar_nome(nome) in tipos_colunas}
+    opcoes_leitura = pacsv.ReadOptions(use_threads=True)
+    try:
+        tabela = pacsv.read_csv(io.BytesIO(dados), read_options=opcoes_leitura, convert_options=pacsv.ConvertOptions(
+            column_types=tipos_leitura, include_columns=list(tipos_leitura), strings_can_be_null=True))
+    except pa.ArrowInvalid as erro:
+        if not aviso['dado']:
+            print(f"  - {aviso['arquivo']}: valor fora do tipo esperado ({erro}). "
+                  f"Os blocos com esse problema são lidos como texto.")
+            aviso['dado'] = True
+        tabela = pacsv.read_csv(io.BytesIO(dados), read_options=opcoes_leitura, convert_options=pacsv.ConvertOptions(
+            column_types=dict.fromkeys(tipos_leitura, pa.string()), include_columns=list(tipos_leitura),
+            strings_can_be_null=True))
+    # Números viram colunas numpy e textos o dtype `str`: nenhuma coluna object
+    return tabela.to_pandas()
+
+# ==============================================================================
+# LIMPEZA DOS DADOS NA CARGA
+# ==============================================================================
+# Feita uma única vez, pedaço a pedaço e de forma vetorizada: as consultas e os
+# gráficos não precisam mais tratar cabeçalhos repetidos, espaços ou infinitos.
+def remover_cabecalhos_repetidos(chunk):
+    """
+    Remove as linhas que repetem o cabeçalho no meio do arquivo (comuns no CIC-IDS2018).
+    Retorna o pedaço limpo e quantas linhas foram removidas.
+    """
+    repetida = pd.Series(True, index=chunk.index)
+    for col in chunk.columns[:3]:
+        if pd.api.types.is_numeric_dtype(chunk[col]):
+            # Coluna lida como número: não há cabeçalho repetido neste pedaço
+            return chunk, 0
+        repetida &= chunk[col].str.strip() == col
+    removidas = int(repetida.sum())
+    if removidas:
+        chunk = chunk[~repetida]
+    return chunk, removidas
+
+def limpar_e_converter(chunk, tipos_colunas, colunas_tempo=None):
+    """
+    Apara espaços dos textos (texto vazio vira Nulo), converte as colunas para o tipo
+    final e troca infinitos por Nulo. Um texto que não é número numa coluna numérica
+    interrompe a carga (ValueError) em vez de virar Nulo. As colunas de `colunas_tempo` ({coluna: formato})
+    viram segundos desde 1970 (epoch). Retorna o pedaço e a lista de correções
+    (coluna, tipo da correção, quantidade).
+    """
+    colunas_tempo = colunas_tempo or {}
+    correcoes = []
+    for col, tipo in tipos_colunas.items():
+        serie = chunk[col]
+        if not pd.api.types.is_numeric_dtype(serie):
+            aparada = serie.str.strip()
+            # Valores que não são texto (ex.: NaN) ficam como estavam
+            aparada = aparada.where(aparada.notna(), serie)
+            alterados = int((serie.notna() & (aparada != serie)).sum())
+            if alterados:
+                correcoes.append((col, 'espacos', alterados))
+                serie = aparada.mask(aparada == '')
+        if tipo == 'TEXT':
+            chunk[col] = serie.where(serie.isna(), serie.astype(str))
+            continue
+        if col in colunas_tempo:
+            convertida = converter_datas(serie, colunas_tempo[col])
+            invalidos = int(serie.notna().sum() - convertida.notna().sum())
+            if invalidos:
+                correcoes.append((col, 'data_invalida', invalidos))
+            chunk[col] = convertida
+            continue
+        convertida = pd.to_numeric(serie, errors='coerce')
+        invalidos = serie.notna() & convertida.isna()
+        if invalidos.any():
+            # O tipo veio do início dos arquivos: gravar Nulo no lugar perderia esses valores
+            exemplos = ', '.join(repr(valor) for valor in serie[invalidos].unique()[:EXEMPLOS_NAO_NUMERICOS])
+            raise ValueError(f"a coluna '{col}' é {tipo}, mas tem {int(invalidos.sum())} valor(es) que não são "
+                             f"números (ex.: {exemplos}). Declare-a como texto em `tipos_forcados` "
+                             f"(ex.: {{'{col}': 'TEXT'}}) e recrie a tabela.")
+        infinitos = np.isinf(convertida)
+        if infinitos.any():
+            correcoes.append((col, 'infinito', int(infinitos.sum())))
+            convertida = convertida.mask(infinitos)
+        chunk[col] = convertida
+    return chunk, correcoes
+
+def criar_tabela_correcoes(conn):
+    """Cria a tabela de correções (cada pedaço grava as suas; a leitura soma por coluna e tipo)."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_CORRECOES} (
+            {COLUNA_ID_ARQUIVO} INTEGER,
+            coluna TEXT,
+            tipo TEXT,
+            quantidade INTEGER
+        )""")
+
+def gravar_correcoes(conn, id_arquivo, correcoes):
+    """Grava as correções de um pedaço (na transação atual, a mesma do checkpoint)."""
+    conn.executemany(f"INSERT INTO {TABELA_CORRECOES} VALUES (?, ?, ?, ?)",
+                     [(id_arquivo, coluna, tipo, quantidade) for coluna, tipo, quantidade in correcoes])
+
+class DestinoCorrecoes:
+    """
+    Soma as correções da limpeza feitas nesta carga, para o relatório do final. No banco,
+    as correções são gravadas com cada pedaço, na transação do checkpoint (ver escrever_pedacos):
+    uma carga retomada mantém as do trecho gravado antes da interrupção.
+    """
+
+    def __init__(self, caminho_db):
+        self.caminho_db = caminho_db
+        self.por_arquivo = {} # {id do arquivo: {(coluna, tipo): quantidade}}
+
+    def processar(self, chunk):
+        """Acumula as correções que vieram junto com o pedaço."""
+        contagens = self.por_arquivo.setdefault(chunk[COLUNA_ID_ARQUIVO].iat[0], {})
+        for coluna, tipo, quantidade in chunk.attrs.get(ATRIBUTO_CORRECOES, []):
+            contagens[(coluna, tipo)] = contagens.get((coluna, tipo), 0) + quantidade
+
+    def concluir_arquivo(self, info):
+        """Nada a fazer: as correções da versão antiga saem junto com as linhas (ver concluir_arquivo)."""
+
+    def finalizar(self):
+        """Mostra o total de correções feitas nesta carga, por tipo."""
+        totais = {}
+        for contagens in self.por_arquivo.values():
+            for (_, tipo), quantidade in contagens.items():
+                totais[tipo] = totais.get(tipo, 0) + quantidade
+        if totais:
+            resumo = ', '.join(f"{tipo}: {formatar_numero(quantidade)}" for tipo, quantidade in sorted(totais.items()))
+            print(f"Limpeza na carga: {resumo}.")
+        else:
+            print("Limpeza na carga: nenhuma correção necessária.")
+
+def ler_correcoes(conn):
+    """Correções feitas na carga por coluna e tipo, somando só os arquivos presentes no banco."""
+    if not tabela_existe(conn, TABELA_CORRECOES):
+        return pd.DataFrame(columns=['coluna', 'tipo', 'quantidade'])
+    return pd.read_sql_query(
+        f"SELECT coluna, tipo, SUM(quantidade) AS quantidade FROM {TABELA_CORRECOES} "
+        f"WHERE {COLUNA_ID_ARQUIVO} IN (SELECT id FROM {TABELA_MANIFESTO} WHERE situacao = 'ok') "
+        f"GROUP BY coluna, tipo ORDER BY quantidade DESC", conn)
+
+# ==============================================================================
+# FONTES DOS CSVs: ARQUIVOS NO DISCO OU MEMBROS DE UM ZIP (SEM EXTRAIR)
+# ==============================================================================
+def listar_csvs_do_zip(caminho_zip):
+    """Lista os CSVs de um ZIP como fontes no formato "arquivo.zip::membro.csv"."""
+    with zipfile.ZipFile(caminho_zip) as zf:
+        membros = [info.filename for info in zf.infolist()
+                   if info.filename.lower().endswith('.csv') and not info.filename.startswith('__MACOSX')]
+    return [f"{caminho_zip}{SEPARADOR_ZIP}{membro}" for membro in sorted(membros)]
+
+@contextmanager
+def abrir_fonte(fonte):
+    """Abre um CSV do disco, de dentro de um ZIP ou da entrada padrão como fluxo binário, lido sob demanda."""
+    if str(fonte) == FONTE_ENTRADA_PADRAO:
+        yield sys.stdin.buffer
+    elif SEPARADOR_ZIP in str(fonte):
+        caminho_zip, membro = str(fonte).split(SEPARADOR_ZIP, 1)
+        with zipfile.ZipFile(caminho_zip) as zf, zf.open(membro) as fluxo:
+            yield fluxo
+    else:
+        with open(fonte, 'rb') as fluxo:
+            yield fluxo
+
+def ler_inicio(fonte, linhas=TAMANHO_CHUNK, filtro_colunas=None):
+    """
+    Lê apenas o cabeçalho e as primeiras linhas de uma fonte (para a pré-análise).
+    `filtro_colunas` recebe o nome limpo de cada coluna e diz se ela deve ser lida.
+    """
+    usecols = (lambda nome: filtro_colunas(limpar_nome(nome))) if filtro_colunas else None
+    with abrir_fonte(fonte) as fluxo:
+        df_inicio = pd.read_csv(fluxo, nrows=linhas, low_memory=False, usecols=usecols)
+    df_inicio, _ = remover_cabecalhos_repetidos(limpar_nomes_colunas(df_inicio))
+    return df_inicio
+
+def descrever_fonte(fonte):
+    """Retorna tamanho e data de modificação da fonte (para comparar com o manifesto)."""
+    if SEPARADOR_ZIP in str(fonte):
+        caminho_zip, membro = str(fonte).split(SEPARADOR_ZIP, 1)
+        with zipfile.ZipFile(caminho_zip) as zf:
+            info = zf.getinfo(membro)
+        return {'tamanho': info.file_size, 'mtime': time.mktime(info.date_time + (0, 0, -1))}
+    estado = os.stat(fonte)
+    return {'tamanho': estado.st_size, 'mtime': estado.st_mtime}
+
+# ==============================================================================
+# ESCRITOR ÚNICO DO SQLITE
+# ==============================================================================
+def formatar_numero(valor):
+    """Formata um número inteiro com ponto como separador de milhar (ex.: 1.234.567)."""
+    return f"{valor:,.0f}".replace(',', '.')
+
+def aplicar_pragmas(conn, pragmas):
+    """Aplica um dicionário de PRAGMAs na conexão."""
+    for nome, valor in pragmas.items():
+        conn.execute(f"PRAGMA {nome} = {valor}")
+
+def montar_insert(tabela, colunas):
+    """Monta o INSERT com a lista explícita de colunas."""
+    colunas_sql = ', '.join(f'"{col}"' for col in colunas)
+    marcadores = ', '.join('?' * len(colunas))
+    return f'INSERT INTO {tabela} ({colunas_sql}) VALUES ({marcadores})'
+
+def mapear_colunas(tabela, colunas_pedaco, colunas_frias=()):
+    """
+    Monta os INSERTs de um arquivo só com as colunas que ele tem, separando as da
+    tabela principal e as da tabela fria. Retorna um dicionário com as listas e os INSERTs.
+    """
+    principal = [col for col in colunas_pedaco if col not in colunas_frias]
+    mapa = {'destinos': principal, 'principal': principal, 'fria': None}
+    if colunas_frias:
+        # As duas tabelas são ligadas por (arquivo, número da linha no arquivo)
+        mapa['principal'] = principal + [COLUNA_LINHA]
+        mapa['fria'] = [COLUNA_ID_ARQUIVO, COLUNA_LINHA] + [col for col in colunas_pedaco if col in colunas_frias]
+        mapa['insert_fria'] = montar_insert(f"{tabela}{SUFIXO_TABELA_FRIA}", mapa['fria'])
+    mapa['insert'] = montar_insert(tabela, mapa['principal'])
+    return mapa
+
+def escrever_pedacos(caminho_db, tabela, pedacos, arquivos, destinos=(),
+                     linhas_por_transacao=LINHAS_POR_TRANSACAO, colunas_frias=()):
+    """
+    Insere os pedaços recebidos com executemany, agrupando muitas linhas em cada
+    transação, e repassa cada pedaço aos destinos extras (ex.: cache Parquet).
+    Cada INSERT lista só as colunas que o arquivo tem. Com `colunas_frias`, essas
+    colunas vão para a tabela fria, na mesma transação.
+    Quando um arquivo termina, troca a versão antiga pela nova no manifesto.
+    Retorna o total de linhas gravadas.
+    """
+    conn = sqlite3.connect(caminho_db)
+    aplicar_pragmas(conn, PRAGMAS_CARGA)
+    criar_tabela_correcoes(conn)
+    colunas_frias = set(colunas_frias)
+    # Armazenamento compacto: as colunas codificadas são gravadas como códigos inteiros
+    codificadores = {col: DicionarioCodigos(conn, tabela_codigos)
+                     for col, tabela_codigos in colunas_codificadas(conn, tabela).items()}
+    mapas = {} # Colunas do pedaço -> INSERTs (todos os pedaços de um arquivo têm as mesmas colunas)
+
+    total_linhas = 0
+    linhas_na_transacao = 0
+    # Numa carga retomada, a contagem de linhas do arquivo continua de onde parou
+    linhas_por_arquivo = {arquivo: info.get('retomada', {}).get('linhas', 0) for arquivo, info in arquivos.items()}
+    inicio = time.perf_counter()
+    try:
+        conn.execute('BEGIN')
+        for arquivo, indice, chunk in pedacos:
+            if indice == FIM_ARQUIVO:
+                # Aqui `chunk` indica se o arquivo foi lido até o fim sem erros
+                if chunk:
+                    concluir_arquivo(conn, tabela, arquivos[arquivo], linhas_por_arquivo[arquivo])
+                    conn.commit()
+                    for destino in destinos:
+                        destino.concluir_arquivo(arquivos[arquivo])
+                    conn.execute('BEGIN')
+                    linhas_na_transacao = 0
+                continue
+            posicao = chunk.attrs[ATRIBUTO_POSICAO]
+            correcoes = chunk.attrs.get(ATRIBUTO_CORRECOES, [])
+            if not chunk.empty:
+                chave = tuple(chunk.columns)
+                if chave not in mapas:
+                    mapas[chave] = mapear_colunas(tabela, chave, colunas_frias)
+                mapa = mapas[chave]
+                if mapa['fria']:
+                    primeira_linha = linhas_por_arquivo[arquivo]
+                    chunk[COLUNA_LINHA] = np.arange(primeira_linha, primeira_linha + len(chunk))
+                    conn.executemany(mapa['insert_fria'], chunk[mapa['fria']].itertuples(index=False, name=None))
+                    linhas = codificar_pedaco(chunk[mapa['principal']], codificadores)
+                    conn.executemany(mapa['insert'], linhas.itertuples(index=False, name=None))
+                    # Os destinos extras recebem só as colunas da tabela principal
+                    chunk = chunk[mapa['destinos']]
+                else:
+                    linhas = codificar_pedaco(chunk, codificadores)
+                    conn.executemany(mapa['insert'], linhas.itertuples(index=False, name=None))
+                linhas_por_arquivo[arquivo] += len(chunk)
+                chunk.attrs[ATRIBUTO_PEDACO] = indice
+                for destino in destinos:
+                    destino.processar(chunk)
+            # O checkpoint (e as correções do pedaço) vão na mesma transação das linhas: o que foi
+            # gravado é sempre o que ele diz
+            gravar_correcoes(conn, arquivos[arquivo]['id'], correcoes)
+            gravar_checkpoint(conn, arquivos[arquivo]['id'], indice, posicao, linhas_por_arquivo[arquivo])
+            total_linhas += len(chunk)
+            linhas_na_transacao += len(chunk)
+            decorrido = time.perf_counter() - inicio
+            print(f"  - {Path(arquivo).name}: pedaço {indice+1} gravado "
+                  f"({formatar_numero(total_linhas)} linhas, {formatar_numero(total_linhas / decorrido)} linhas/s)")
+            if linhas_na_transacao >= linhas_por_transacao:
+                conn.commit()
+                conn.execute('BEGIN')
+                linhas_na_transacao = 0
+        conn.commit()
+        for destino in destinos:
+            destino.finalizar()
+    finally:
+        # Em caso de erro, desfaz o que veio depois do último commit (o checkpoint diz onde retomar)
+        if conn.in_transaction:
+            conn.rollback()
+        # Volta ao modo de diário padrão para o banco ficar em um único arquivo
+        conn.execute('PRAGMA journal_mode = DELETE')
+        conn.close()
+    return total_linhas
+
+# ==============================================================================
+# MANIFESTO DE ARQUIVOS (CARGA INCREMENTAL)
+# ==============================================================================
+def tabela_existe(conn, tabela):
+    """Verifica se uma tabela existe no banco."""
+    consulta = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+    return conn.execute(consulta, (tabela,)).fetchone() is not None
+
+def tabelas_de_dados(conn, tabela):
+    """Tabelas que guardam linhas dos arquivos: a principal e, se existir, a tabela fria."""
+    return [nome for nome in (tabela, f"{tabela}{SUFIXO_TABELA_FRIA}") if tabela_existe(conn, nome)]
+
+def tabelas_por_arquivo(conn, tabela):
+    """Tabelas com registros de cada arquivo, apagados junto com ele: as de dados e a de correções."""
+    tabelas = tabelas_de_dados(conn, tabela)
+    if tabela_existe(conn, TABELA_CORRECOES):
+        tabelas.append(TABELA_CORRECOES)
+    return tabelas
+
+def tipos_da_tabela(conn, tabela):
+    """
+    Retorna {coluna: tipo} de uma tabela existente (sem as colunas de controle). Colunas
+    codificadas (armazenamento compacto) aparecem como TEXT, o tipo dos seus valores.
+    """
+    linhas = conn.execute(f"PRAGMA table_info('{tabela}')").fetchall()
+    codificadas = colunas_codificadas(conn, tabela)
+    return {nome: 'TEXT' if nome in codificadas else tipo
+            for _, nome, tipo, *_ in linhas if nome not in COLUNAS_INTERNAS}
+
+def preparar_manifesto(conn, tabela):
+    """
+    Cria a tabela do manifesto (se necessário) e desfaz cargas que não terminaram.
+    Retorna os ids dos arquivos cuja carga incompleta foi removida.
+    """
+    if tabela_existe(conn, tabela) and not tabela_existe(conn, TABELA_MANIFESTO):
+        # Banco criado antes do manifesto: não há como saber a origem de cada linha
+        print(f"A tabela '{tabela}' não possui manifesto de arquivos. Ela será recriada.")
+        conn.execute(f"DROP TABLE {tabela}")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_MANIFESTO} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            caminho TEXT NOT NULL,
+            tamanho INTEGER,
+            mtime REAL,
+            hash TEXT,
+            linhas INTEGER,
+            situacao TEXT,
+            carregado_em TEXT
+        )""")
+    criar_tabela_checkpoints(conn)
+    ids_incompletos = []
+    for id_arquivo, caminho, tamanho, mtime, pedaco in conn.execute(
+            f"SELECT m.id, m.caminho, m.tamanho, m.mtime, c.pedaco FROM {TABELA_MANIFESTO} m "
+            f"LEFT JOIN {TABELA_CHECKPOINTS} c ON c.{COLUNA_ID_ARQUIVO} = m.id "
+            f"WHERE m.situacao = 'carregando'").fetchall():
+        # Com checkpoint e a fonte sem alteração, a carga será retomada (ver planejar_carga)
+        if pedaco is not None and fonte_inalterada(caminho, tamanho, mtime):
+            continue
+        ids_incompletos.append(id_arquivo)
+    if ids_incompletos:
+        print(f"Removendo {len(ids_incompletos)} carga(s) incompleta(s) de uma execução anterior...")
+        marcadores = ', '.join('?' * len(ids_incompletos))
+        for tabela_dados in tabelas_por_arquivo(conn, tabela):
+            conn.execute(f"DELETE FROM {tabela_dados} WHERE {COLUNA_ID_ARQUIVO} IN ({marcadores})", ids_incompletos)
+        conn.execute(f"DELETE FROM {TABELA_MANIFESTO} WHERE id IN ({marcadores})", ids_incompletos)
+        conn.execute(f"DELETE FROM {TABELA_CHECKPOINTS} WHERE {COLUNA_ID_ARQUIVO} IN ({marcadores})", ids_incompletos)
+    conn.commit()
+    return ids_incompletos
+
+def fonte_inalterada(fonte, tamanho, mtime):
+    """Verifica se a fonte ainda existe com o mesmo tamanho e data de modificação."""
+    try:
+        atual = descrever_fonte(fonte)
+    except (OSError, KeyError):
+        return False # Arquivo (ou membro do ZIP) não existe mais
+    return atual['tamanho'] == tamanho and atual['mtime'] == mtime
+
+# ==============================================================================
+# CHECKPOINTS DA CARGA (RETOMADA APÓS UMA QUEDA)
+# ==============================================================================
+# A cada pedaço gravado, o escritor registra (arquivo, índice do pedaço, posição em
+# bytes, linhas) na mesma transação das linhas. Se a carga cair no meio de um arquivo,
+# a próxima execução continua da posição do último pedaço confirmado no banco.
+def criar_tabela_checkpoints(conn):
+    """Cria a tabela de checkpoints (um registro por arquivo em carga)."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_CHECKPOINTS} (
+            {COLUNA_ID_ARQUIVO} INTEGER PRIMARY KEY,
+            pedaco INTEGER,
+            posicao INTEGER,
+            linhas INTEGER,
+            gravado_em TEXT
+        )""")
+
+def gravar_checkpoint(conn, id_arquivo, pedaco, posicao, linhas):
+    """Registra o último pedaço gravado de um arquivo (na transação atual)."""
+    conn.execute(f"INSERT OR REPLACE INTO {TABELA_CHECKPOINTS} ({COLUNA_ID_ARQUIVO}, pedaco, posicao, linhas, gravado_em) "
+                 f"VALUES (?, ?, ?, ?, datetime('now'))", (id_arquivo, pedaco, posicao, linhas))
+
+def cargas_retomaveis(conn):
+    """Retorna {caminho: info} dos arquivos com carga interrompida que podem ser retomados."""
+    retomaveis = {}
+    for id_arquivo, caminho, tamanho, mtime, hash_, pedaco, posicao, linhas in conn.execute(
+            f"SELECT m.id, m.caminho, m.tamanho, m.mtime, m.hash, c.pedaco, c.posicao, c.linhas "
+            f"FROM {TABELA_MANIFESTO} m JOIN {TABELA_CHECKPOINTS} c ON c.{COLUNA_ID_ARQUIVO} = m.id "
+            f"WHERE m.situacao = 'carregando'"):
+        retomaveis[caminho] = {'id': id_arquivo, 'tamanho': tamanho, 'mtime': mtime, 'hash': hash_,
+                               'retomada': {'pedaco': pedaco, 'posicao': posicao, 'linhas': linhas}}
+    return retomaveis
+
+def calcular_hash(arquivo, tamanho_bloco=8 * 1024 * 1024):
+    """
+    Calcula o SHA-256 do conteúdo do arquivo, lendo em blocos. Para membros de um
+    ZIP usa o CRC-32 já gravado no próprio ZIP, sem descompactar nada.
+    """
+    if SEPARADOR_ZIP in str(arquivo):
+        caminho_zip, membro = str(arquivo).split(SEPARADOR_ZIP, 1)
+        with zipfile.ZipFile(caminho_zip) as zf:
+            return f"crc32:{zf.getinfo(membro).CRC:08x}"
+    resumo = hashlib.sha256()
+    with open(arquivo, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+def planejar_carga(conn, lista_arquivos_csv):
+    """
+    Compara os arquivos da pasta com o manifesto e retorna a lista dos que precisam
+    ser carregados (novos ou alterados). O hash só é calculado quando tamanho ou
+    data de modificação mudaram.
+    """
+    registrados = {}
+    for id_arquivo, caminho, tamanho, mtime, hash_ in conn.execute(
+            f"SELECT id, caminho, tamanho, mtime, hash FROM {TABELA_MANIFESTO} WHERE situacao = 'ok'"):
+        registrados[caminho] = {'id': id_arquivo, 'tamanho': tamanho, 'mtime': mtime, 'hash': hash_}
+    retomaveis = cargas_retomaveis(conn)
+
+    para_carregar = []
+    inalterados = 0
+    for arquivo in lista_arquivos_csv:
+        caminho = str(arquivo)
+        info = dict(descrever_fonte(arquivo), caminho=caminho, ids_antigos=[])
+        anterior = registrados.get(caminho)
+        if caminho in retomaveis:
+            # Carga interrompida: continua do último pedaço gravado, com o mesmo id
+            info.update(retomaveis[caminho])
+            if anterior:
+                info['ids_antigos'].append(anterior['id'])
+            retomada = info['retomada']
+            print(f"- Carga interrompida será retomada: {Path(arquivo).name} "
+                  f"(após o pedaço {retomada['pedaco'] + 1}, {formatar_numero(retomada['linhas'])} linhas já gravadas)")
+            para_carregar.append(info)
+            continue
+        if anterior and anterior['tamanho'] == info['tamanho'] and anterior['mtime'] == info['mtime']:
+            inalterados += 1
+            continue
+        info['hash'] = calcular_hash(arquivo)
+        if anterior and anterior['hash'] == info['hash']:
+            # Conteúdo igual (só a data mudou): apenas atualiza o manifesto
+            conn.execute(f"UPDATE {TABELA_MANIFESTO} SET mtime = ? WHERE id = ?", (info['mtime'], anterior['id']))
+            inalterados += 1
+            continue
+        if anterior:
+            info['ids_antigos'].append(anterior['id'])
+            print(f"- Arquivo alterado: {Path(arquivo).name}")
+        else:
+            print(f"- Arquivo novo: {Path(arquivo).name}")
+        para_carregar.append(info)
+    conn.commit()
+    print(f"{len(para_carregar)} arquivo(s) para carregar, {inalterados} sem alteração.")
+    return para_carregar
+
+def registrar_arquivos(caminho_db, arquivos_para_carregar):
+    """Registra os arquivos no manifesto com situação 'carregando' e retorna {caminho: info com id}."""
+    conn = sqlite3.connect(caminho_db)
+    arquivos = {}
+    for info in arquivos_para_carregar:
+        if 'retomada' in info:
+            arquivos[info['caminho']] = info # Já está no manifesto como 'carregando'
+            continue
+        cursor = conn.execute(
+            f"INSERT INTO {TABELA_MANIFESTO} (caminho, tamanho, mtime, hash, situacao) VALUES (?, ?, ?, ?, 'carregando')",
+            (info['caminho'], info['tamanho'], info['mtime'], info['hash']))
+        arquivos[info['caminho']] = dict(info, id=cursor.lastrowid)
+    conn.commit()
+    conn.close()
+    return arquivos
+
+def concluir_arquivo(conn, tabela, info, linhas):
+    """Remove a versão antiga do arquivo e marca a nova como carregada (na transação atual)."""
+    if info['ids_antigos']:
+        marcadores = ', '.join('?' * len(info['ids_antigos']))
+        for tabela_dados in tabelas_por_arquivo(conn, tabela):
+            conn.execute(f"DELETE FROM {tabela_dados} WHERE {COLUNA_ID_ARQUIVO} IN ({marcadores})", info['ids_antigos'])
+        conn.execute(f"DELETE FROM {TABELA_MANIFESTO} WHERE id IN ({marcadores})", info['ids_antigos'])
+    conn.execute(f"UPDATE {TABELA_MANIFESTO} SET situacao = 'ok', linhas = ?, carregado_em = datetime('now') "
+                 f"WHERE id = ?", (linhas, info['id']))
+    conn.execute(f"DELETE FROM {TABELA_CHECKPOINTS} WHERE {COLUNA_ID_ARQUIVO} = ?", (info['id'],))
+
+def criar_ou_atualizar_tabela(conn, tabela, tipos_colunas, codificar=()):
+    """
+    Cria a tabela mestra tipada ou adiciona as colunas novas a uma tabela existente.
+    As colunas de `codificar` (só na criação) guardam códigos inteiros, com tabela de consulta.
+    """
+    if not tabela_existe(conn, tabela):
+        definicoes = {}
+        for col, tipo in tipos_colunas.items():
+            definicoes[col] = tipo
+            if col in codificar:
+                tabela_codigos = nome_tabela_codigos(tabela, col)
+                criar_tabela_codigos(conn, tabela_codigos)
+                definicoes[col] = f"INTEGER REFERENCES {tabela_codigos} (codigo)"
+        colunas_sql = ', '.join(f'"{col}" {tipo}' for col, tipo in definicoes.items())
+        conn.execute(f"CREATE TABLE {tabela} ({colunas_sql}, {COLUNA_ID_ARQUIVO} INTEGER)")
+        conn.execute(f"CREATE INDEX idx_{tabela}_arquivo ON {tabela} ({COLUNA_ID_ARQUIVO})")
+        print(f"\nTabela '{tabela}' criada com sucesso no banco de dados.")
+        return True
+    existentes = tipos_da_tabela(conn, tabela)
+    for col, tipo in tipos_colunas.items():
+        if col not in existentes:
+            conn.execute(f'ALTER TABLE {tabela} ADD COLUMN "{col}" {tipo}')
+            print(f"Coluna nova adicionada à tabela: '{col}' ({tipo})")
+    conn.commit()
+    return False
+
+# ==============================================================================
+# PROJEÇÃO DE COLUNAS NA CARGA
+# ==============================================================================
+# A análise usa poucas das ~80 colunas do IDS2018. Com uma lista de inclusão, de
+# exclusão ou um perfil salvo em JSON, as colunas fora da projeção não são lidas,
+# convertidas nem gravadas; opcionalmente vão para a tabela fria "<tabela>_fria".
+# O destino de cada coluna é gravado no banco quando ela aparece pela primeira vez e não
+# muda mais: uma coluna que trocasse de tabela ficaria com valores em uma parte dos
+# arquivos e nulos na outra. Só colunas novas seguem a projeção atual.
+def carregar_perfil_colunas(caminho_json):
+    """Lê um perfil de colunas usadas: JSON com a chave "colunas" (lista de nomes)."""
+    with open(caminho_json, encoding='utf-8') as f:
+        return list(json.load(f)['colunas'])
+
+def coluna_projetada(nome, incluidas=None, excluidas=(), obrigatorias=()):
+    """Diz se a coluna (nome já limpo) fica na tabela principal."""
+    if nome in obrigatorias:
+        return True
+    if incluidas is not None and nome not in incluidas:
+        return False
+    return nome not in excluidas
+
+def destino_projetado(nome, tabela_fria=False, incluidas=None, excluidas=(), obrigatorias=()):
+    """Destino da coluna pela projeção atual: tabela principal, tabela fria ou descartada."""
+    if coluna_projetada(nome, incluidas, excluidas, obrigatorias):
+        return DESTINO_PRINCIPAL
+    return DESTINO_FRIA if tabela_fria else DESTINO_DESCARTADA
+
+def ler_projecao(conn, tabela):
+    """
+    Retorna {coluna: destino} das colunas já vistas pela tabela. Sem a tabela principal,
+    o registro antigo é apagado (a tabela será criada com a projeção atual). Em bancos
+    sem registro, as colunas das tabelas principal e fria valem como registradas.
+    """
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {TABELA_PROJECAO} "
+                 f"(tabela TEXT, coluna TEXT, destino TEXT, PRIMARY KEY (tabela, coluna))")
+    if not tabela_existe(conn, tabela):
+        conn.execute(f"DELETE FROM {TABELA_PROJECAO} WHERE tabela = ?", (tabela,))
+        return {}
+    destinos = dict(conn.execute(f"SELECT coluna, destino FROM {TABELA_PROJECAO} WHERE tabela = ?", (tabela,)))
+    tabela_fria = f"{tabela}{SUFIXO_TABELA_FRIA}"
+    if tabela_existe(conn, tabela_fria):
+        destinos.update(dict.fromkeys(tipos_da_tabela(conn, tabela_fria), DESTINO_FRIA))
+    destinos.update(dict.fromkeys(tipos_da_tabela(conn, tabela), DESTINO_PRINCIPAL))
+    return destinos
+
+def gravar_projecao(conn, tabela, destinos):
+    """Registra o destino das colunas ({coluna: destino})."""
+    conn.executemany(f"INSERT OR REPLACE INTO {TABELA_PROJECAO} (tabela, coluna, destino) VALUES (?, ?, ?)",
+                     [(tabela, col, destino) for col, destino in destinos.items()])
+
+def criar_ou_atualizar_tabela_fria(conn, tabela, tipos_colunas):
+    """
+    Cria (ou amplia) a tabela fria, com chave (arquivo, linha) e sem rowid, e a coluna
+    de número da linha na tabela principal. O JOIN das duas usa essa chave.
+    """
+    tabela_fria = f"{tabela}{SUFIXO_TABELA_FRIA}"
+    if not tabela_existe(conn, tabela_fria):
+        colunas_sql = ', '.join(f'"{col}" {tipo}' for col, tipo in tipos_colunas.items())
+        conn.execute(f"CREATE TABLE {tabela_fria} ({COLUNA_ID_ARQUIVO} INTEGER, {COLUNA_LINHA} INTEGER, "
+                     f"{colunas_sql}, PRIMARY KEY ({COLUNA_ID_ARQUIVO}, {COLUNA_LINHA})) WITHOUT ROWID")
+        print(f"Tabela fria '{tabela_fria}' criada com {len(tipos_colunas)} colunas.")
+    else:
+        existentes = tipos_da_tabela(conn, tabela_fria)
+        for col, tipo in tipos_colunas.items():
+            if col not in existentes:
+                conn.execute(f'ALTER TABLE {tabela_fria} ADD COLUMN "{col}" {tipo}')
+    colunas_principal = [linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})")]
+    if COLUNA_LINHA not in colunas_principal:
+        conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {COLUNA_LINHA} INTEGER")
+    conn.commit()
+
+# ==============================================================================
+# ARMAZENAMENTO COMPACTO (CÓDIGOS INTEIROS E DATAS EM EPOCH)
+# ==============================================================================
+# Opcional: a coluna de classe guarda um código inteiro (com a tabela de consulta
+# "<tabela>_codigos_<coluna>") e as datas viram segundos desde 1970. GROUP BY e filtros
+# de tempo comparam inteiros e o arquivo do banco fica bem menor. As colunas
+# codificadas são reconhecidas pela chave estrangeira para a tabela de consulta.
+def nome_tabela_codigos(tabela, coluna):
+    """Nome da tabela de consulta (código -> valor) de uma coluna codificada."""
+    sufixo = re.sub(r'\W+', '_', coluna).strip('_').lower()
+    return f"{tabela}_codigos_{sufixo}"
+
+def criar_tabela_codigos(conn, tabela_codigos):
+    """Cria (se necessário) a tabela de consulta de uma coluna codificada."""
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {tabela_codigos} (codigo INTEGER PRIMARY KEY, valor TEXT NOT NULL UNIQUE)")
+
+def colunas_codificadas(conn, tabela):
+    """Retorna {coluna: tabela de consulta} das colunas gravadas como códigos inteiros."""
+    return {coluna: tabela_ref for _, _, tabela_ref, coluna, *_ in conn.execute(f"PRAGMA foreign_key_list('{tabela}')")}
+
+def ler_codigos(conn, tabela_codigos):
+    """Retorna {código: valor} de uma tabela de consulta."""
+    return dict(conn.execute(f"SELECT codigo, valor FROM {tabela_codigos}"))
+
+def decodificar_colunas(conn, tabela, df):
+    """Troca, no DataFrame lido da tabela, os códigos das colunas codificadas pelos valores de texto."""
+    for coluna, tabela_codigos in colunas_codificadas(conn, tabela).items():
+        if coluna in df.columns:
+            df[coluna] = df[coluna].map(ler_codigos(conn, tabela_codigos))
+    return df
+
+def valores_gravados(conn, tabela, coluna, valores):
+    """
+    Retorna {valor: valor como está gravado na tabela}, para montar filtros (WHERE coluna = ?).
+    Em colunas codificadas é o código inteiro; nas demais, o próprio valor.
+    """
+    tabela_codigos = colunas_codificadas(conn, tabela).get(coluna)
+    if tabela_codigos is None:
+        return {valor: valor for valor in valores}
+    codigos = {valor: codigo for codigo, valor in ler_codigos(conn, tabela_codigos).items()}
+    return {valor: codigos[valor] for valor in valores if valor in codigos}
+
+def converter_datas(serie, formato):
+    """Converte textos de data (no `formato` do strptime) para segundos desde 1970; inválidos viram Nulo."""
+    datas = pd.to_datetime(serie, format=formato, errors='coerce')
+    return (datas - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+
+class DicionarioCodigos:
+    """Códigos inteiros dos valores de uma coluna. Valores novos entram na tabela de consulta na transação atual."""
+
+    def __init__(self, conn, tabela_codigos):
+        self.conn = conn
+        self.tabela_codigos = tabela_codigos
+        self.codigos = {valor: codigo for codigo, valor in ler_codigos(conn, tabela_codigos).items()}
+
+    def codificar(self, serie):
+        """Retorna a série com os códigos no lugar dos valores (Nulos continuam Nulos)."""
+        novos = sorted(set(serie.dropna().unique()) - set(self.codigos))
+        if novos:
+            proximo = max(self.codigos.values(), default=0) + 1
+            for codigo, valor in enumerate(novos, start=proximo):
+                self.codigos[valor] = codigo
+            self.conn.executemany(f"INSERT INTO {self.tabela_codigos} (codigo, valor) VALUES (?, ?)",
+                                  [(self.codigos[valor], valor) for valor in novos])
+        return serie.map(self.codigos)
+
+def codificar_pedaco(dados, codificadores):
+    """Aplica os códigos às colunas codificadas presentes (sem alterar o pedaço original)."""
+    presentes = {col: codificador for col, codificador in codificadores.items() if col in dados.columns}
+    if not presentes:
+        return dados
+    return dados.assign(**{col: codificador.codificar(dados[col]) for col, codificador in presentes.items()})
+
+def criar_visao_legivel(conn, tabela, colunas_tempo=()):
+    """
+    (Re)cria a visão "<tabela>_legivel", com os valores de texto no lugar dos códigos e as
+    datas em texto, para consultas manuais (ex.: no sqlite3). As análises usam a tabela.
+    """
+    codificadas = colunas_codificadas(conn, tabela)
+    colunas = [linha[1] for linha in conn.execute(f"PRAGMA table_info('{tabela}')")]
+    selecao, juncoes = [], []
+    for i, col in enumerate(colunas):
+        if col in codificadas:
+            juncoes.append(f'LEFT JOIN {codificadas[col]} c{i} ON c{i}.codigo = t."{col}"')
+            selecao.append(f'c{i}.valor AS "{col}"')
+        elif col in colunas_tempo:
+            selecao.append(f"datetime(t.\"{col}\", 'unixepoch') AS \"{col}\"")
+        else:
+            selecao.append(f't."{col}"')
+    visao = f"{tabela}{SUFIXO_VISAO_LEGIVEL}"
+    conn.execute(f"DROP VIEW IF EXISTS {visao}")
+    conn.execute(f"CREATE VIEW {visao} AS SELECT {', '.join(selecao)} FROM {tabela} t {' '.join(juncoes)}")
+    conn.commit()
+
+def compactar_banco(caminho_db, page_size=PAGE_SIZE_COMPACTO, vacuum=True):
+    """
+    Atualiza as estatísticas do planejador (ANALYZE) e, com `vacuum`, reescreve o banco com o
+    page_size indicado (VACUUM). O VACUUM copia o banco inteiro: fica para a criação da tabela
+    e para quando é pedido; nas cargas incrementais basta o ANALYZE.
+    """
+    tamanho_antes = os.path.getsize(caminho_db)
+    inicio = time.perf_counter()
+    conn = sqlite3.connect(caminho_db)
+    conn.execute('ANALYZE')
+    conn.commit()
+    if not vacuum:
+        conn.close()
+        print(f"Estatísticas do banco atualizadas (ANALYZE) em {time.perf_counter() - inicio:.1f}s.")
+        return
+    # O novo page_size só vale depois do VACUUM (e fora do modo WAL)
+    conn.execute(f'PRAGMA page_size = {int(page_size)}')
+    conn.execute('VACUUM')
+    conn.close()
+    tamanho_depois = os.path.getsize(caminho_db)
+    print(f"Banco compactado (ANALYZE + VACUUM, páginas de {int(page_size) // 1024} KiB) em "
+          f"{time.perf_counter() - inicio:.1f}s: {tamanho_antes / 2**20:,.1f} MiB -> {tamanho_depois / 2**20:,.1f} MiB.")
+
+# ==============================================================================
+# CARGA SERIAL E CARGA PARALELA
+# ==============================================================================
+def _inicio_da_leitura(info):
+    """Retorna (índice do primeiro pedaço, posição inicial em bytes) de um arquivo."""
+    retomada = info.get('retomada')
+    if retomada:
+        return retomada['pedaco'] + 1, retomada['posicao']
+    return 0, 0
+
+def _pedacos_em_serie(arquivos, tipos_colunas, tamanho_bloco, leitor, colunas_tempo=None):
+    """Gera os pedaços de todos os arquivos, um arquivo depois do outro."""
+    for arquivo, info in arquivos.items():
+        print(f"\nProcessando o arquivo em pedaços: {Path(arquivo).name}...")
+        primeiro, posicao = _inicio_da_leitura(info)
+        pedacos = ler_chunks_convertidos(arquivo, tipos_colunas, info['id'], tamanho_bloco, leitor, posicao,
+                                         colunas_tempo)
+        for indice, chunk in enumerate(pedacos, start=primeiro):
+            yield arquivo, indice, chunk
+        yield arquivo, FIM_ARQUIVO, True
+
+def _processar_arquivo(arquivo, tipos_colunas, info, tamanho_bloco, leitor, fila, colunas_tempo=None):
+    """Executado em um processo do pool: lê e converte um arquivo, enviando os pedaços para a fila."""
+    sucesso = False
+    try:
+        primeiro, posicao = _inicio_da_leitura(info)
+        pedacos = ler_chunks_convertidos(arquivo, tipos_colunas, info['id'], tamanho_bloco, leitor, posicao,
+                                         colunas_tempo)
+        for indice, chunk in enumerate(pedacos, start=primeiro):
+            fila.put((arquivo, indice, chunk))
+        sucesso = True
+    finally:
+        # Sempre avisa o escritor, mesmo em caso de erro, para ele não ficar esperando
+        fila.put((arquivo, FIM_ARQUIVO, sucesso))
+
+def _pedacos_da_fila(fila, total_arquivos):
+    """Gera os pedaços recebidos dos processos até que todos os arquivos terminem."""
+    arquivos_restantes = total_arquivos
+    while arquivos_restantes > 0:
+        item = fila.get()
+        if item[1] == FIM_ARQUIVO:
+            arquivos_restantes -= 1
+        yield item
+
+def _thread_escritora(caminho_db, tabela, fila, arquivos, destinos, colunas_frias, resultado):
+    """Corpo da thread escritora: grava os pedaços da fila e guarda o total (ou o erro) em `resultado`."""
+    pedacos = _pedacos_da_fila(fila, len(arquivos))
+    try:
+        resultado['linhas'] = escrever_pedacos(caminho_db, tabela, pedacos, arquivos, destinos,
+                                               colunas_frias=colunas_frias)
+    except Exception as e:
+        resultado['erro'] = e
+        # Esvazia a fila para que os processos não fiquem bloqueados esperando espaço
+        for _ in pedacos:
+            pass
+
+def carregar_csvs(caminho_db, tabela, arquivos_para_carregar, tipos_colunas, paralelo=True,
+                  processos=None, tamanho_bloco=TAMANHO_BLOCO_CSV, destinos=(), leitor='pandas', tipos_frios=None,
+                  colunas_tempo=None):
+    """
+    Carrega os arquivos novos/alterados do plano na tabela (que já deve existir com
+    os tipos finais). No modo paralelo, um pool de processos lê e converte os arquivos
+    ao mesmo tempo e uma única thread escritora grava tudo no SQLite (e nos destinos extras).
+    `leitor` escolhe o leitor de CSV ('pandas' ou 'pyarrow', ver LEITORES_CSV).
+    `tipos_frios` são as colunas fora da projeção que vão para a tabela fria.
+    `colunas_tempo` ({coluna: formato}) são as datas gravadas como epoch (armazenamento compacto).
+    """
+    if leitor not in LEITORES_CSV:
+        raise ValueError(f"Leitor de CSV desconhecido: '{leitor}'. Use um de {LEITORES_CSV}.")
+    if leitor == 'pyarrow' and pa is None:
+        raise ImportError("O leitor 'pyarrow' precisa do pacote 'pyarrow' (pip install pyarrow).")
+    tipos_frios = tipos_frios or {}
+    # Os processos leem as colunas das duas tabelas; o escritor separa na gravação
+    tipos_leitura = dict(tipos_colunas, **tipos_frios)
+    inicio = time.perf_counter()
+    arquivos = registrar_arquivos(caminho_db, arquivos_para_carregar)
+
+    if not paralelo or len(arquivos) <= 1:
+        total_linhas = escrever_pedacos(caminho_db, tabela,
+                                        _pedacos_em_serie(arquivos, tipos_leitura, tamanho_bloco, leitor, colunas_tempo),
+                                        arquivos, destinos, colunas_frias=list(tipos_frios))
+    else:
+        processos = processos or min(len(arquivos), multiprocessing.cpu_count())
+        print(f"\nCarga paralela: {processos} processos lendo {len(arquivos)} arquivos...")
+        with multiprocessing.Manager() as gerenciador:
+            # Fila limitada: se o escritor atrasar, os processos esperam (memória controlada)
+            fila = gerenciador.Queue(maxsize=processos * 2)
+            resultado = {}
+            escritor = threading.Thread(target=_thread_escritora,
+                                        args=(caminho_db, tabela, fila,
+                                              arquivos, destinos, list(tipos_frios), resultado))
+            escritor.start()
+            with ProcessPoolExecutor(max_workers=processos) as pool:
+                futuros = [pool.submit(_processar_arquivo, arquivo, tipos_leitura, info, tamanho_bloco, leitor, fila,
+                                       colunas_tempo)
+                           for arquivo, info in arquivos.items()]
+                escritor.join()
+                for futuro in futuros:
+                    futuro.result() # Propaga erros ocorridos nos processos
+            if 'erro' in resultado:
+                raise resultado['erro']
+            total_linhas = resultado['linhas']
+
+    decorrido = time.perf_counter() - inicio
+    print(f"\nCarga concluída: {formatar_numero(total_linhas)} linhas em {decorrido:.1f}s "
+          f"({formatar_numero(total_linhas / max(decorrido, 1e-9))} linhas/s)")
+    return total_linhas
+
+# ==============================================================================
+# AMOSTRA ESTRATIFICADA MATERIALIZADA
+# ==============================================================================
+class DestinoAmostra:
+    """
+    Mantém, durante a carga, uma amostra aleatória uniforme de cada classe (ex.: Label).
+    Cada linha recebe uma chave aleatória e cada classe guarda as N menores chaves
+    (reservoir "bottom-k"), então a amostra pode continuar em cargas incrementais.
+    A amostra é gravada a cada arquivo concluído, junto com a lista dos arquivos que ela
+    já cobre; arquivos gravados na tabela e ausentes dessa lista (carga interrompida) são
+    lidos da tabela ao continuar.
+    """
+
+    def __init__(self, caminho_db, tabela, coluna_estrato, tamanhos, continuar=True, semente=None):
+        self.caminho_db = caminho_db
+        self.tabela = tabela
+        self.tabela_amostra = f"{tabela}_amostra"
+        self.tabela_arquivos = f"{tabela}_amostra_arquivos" # Arquivos já cobertos pela amostra gravada
+        self.coluna_estrato = coluna_estrato
+        # tamanhos = {'padrao': N, 'Classe rara': M, ...}
+        self.tamanhos = tamanhos
+        self.rng = np.random.default_rng(semente)
+        self.partes = []
+        self.pendentes = 0
+        self.limiares = {} # Maior chave aceita em cada classe já cheia
+        self.arquivos = set()
+        self.alterada = False # Há linhas ou arquivos que ainda não foram gravados
+        if continuar:
+            conn = sqlite3.connect(caminho_db)
+            if tabela_existe(conn, self.tabela_amostra):
+                self.partes.append(pd.read_sql_query(f"SELECT * FROM {self.tabela_amostra}", conn))
+                self._compactar()
+                if tabela_existe(conn, self.tabela_arquivos):
+                    self.arquivos = {id_arquivo for (id_arquivo,) in
+                                     conn.execute(f"SELECT {COLUNA_ID_ARQUIVO} FROM {self.tabela_arquivos}")}
+                else:
+                    # Amostra gravada antes da lista de arquivos: cobre os arquivos concluídos
+                    self.arquivos = set(self._arquivos_gravados(conn, so_concluidos=True))
+            faltantes = [id_arquivo for id_arquivo in self._arquivos_gravados(conn) if id_arquivo not in self.arquivos]
+            if faltantes:
+                print(f"Amostra estratificada: lendo da tabela {len(faltantes)} arquivo(s) gravado(s) "
+                      f"antes de uma interrupção...")
+                self.ler_da_tabela(conn, faltantes)
+            conn.close()
+
+    def _arquivos_gravados(self, conn, so_concluidos=False):
+        """Ids dos arquivos com linhas na tabela: os concluídos e os de cargas que serão retomadas."""
+        if not tabela_existe(conn, TABELA_MANIFESTO):
+            return []
+        consulta = f"SELECT id FROM {TABELA_MANIFESTO} WHERE situacao = 'ok'"
+        if not so_concluidos:
+            consulta += f" OR id IN (SELECT {COLUNA_ID_ARQUIVO} FROM {TABELA_CHECKPOINTS})"
+        return [id_arquivo for (id_arquivo,) in conn.execute(consulta)]
+
+    def ler_da_tabela(self, conn, ids_arquivos=None, tamanho_chunk=TAMANHO_CHUNK):
+        """Passa pela amostra as linhas já gravadas na tabela (todas ou só as dos arquivos indicados)."""
+        consulta = f"SELECT * FROM {self.tabela}"
+        parametros = ()
+        if ids_arquivos is not None:
+            consulta += f" WHERE {COLUNA_ID_ARQUIVO} IN ({', '.join('?' * len(ids_arquivos))})"
+            parametros = tuple(ids_arquivos)
+        for chunk in pd.read_sql_query(consulta, conn, params=parametros, chunksize=tamanho_chunk):
+            # Na carga a amostra recebe só as colunas dos dados, sem o número da linha
+            chunk = decodificar_colunas(conn, self.tabela, chunk.drop(columns=[COLUNA_LINHA], errors='ignore'))
+            self.processar(chunk)
+        self.arquivos.update(ids_arquivos if ids_arquivos is not None else self._arquivos_gravados(conn))
+        self.alterada = True
+
+    def tamanho_da_classe(self, classe):
+        """Tamanho da amostra configurado para a classe (ou o padrão)."""
+        return self.tamanhos.get(classe, self.tamanhos['padrao'])
+
+    def processar(self, chunk):
+        """Sorteia as chaves do pedaço e guarda apenas as linhas que podem entrar na amostra."""
+        chaves = self.rng.random(len(chunk))
+        limiares = coluna_ou_nula(chunk, self.coluna_estrato).map(self.limiares).fillna(1.0).to_numpy()
+        candidatas = chaves < limiares
+        if candidatas.any():
+            self.partes.append(chunk[candidatas].assign(**{COLUNA_CHAVE_AMOSTRA: chaves[candidatas]}))
+            self.pendentes += int(candidatas.sum())
+            self.alterada = True
+            if self.pendentes >= TAMANHO_CHUNK:
+                self._compactar()
+
+    def _compactar(self):
+        """Mantém só as menores chaves de cada classe e atualiza os limiares de entrada."""
+        if not self.partes:
+            return
+        df = pd.concat(self.partes, ignore_index=True).sort_values(COLUNA_CHAVE_AMOSTRA)
+        estrato = df[self.coluna_estrato]
+        posicao = df.groupby(estrato, dropna=False).cumcount()
+        df = df[posicao < estrato.map(self.tamanho_da_classe).fillna(self.tamanhos['padrao'])]
+        self.partes = [df]
+        self.pendentes = 0
+        por_classe = df.groupby(self.coluna_estrato)[COLUNA_CHAVE_AMOSTRA].agg(['size', 'max'])
+        self.limiares = {classe: linha['max'] for classe, linha in por_classe.iterrows()
+                         if linha['size'] >= self.tamanho_da_classe(classe)}
+
+    def concluir_arquivo(self, info):
+        """
+        Tira da amostra as linhas da versão antiga de um arquivo recarregado e grava a
+        amostra com o arquivo concluído: uma interrupção depois daqui não perde as linhas dele.
+        """
+        if info['ids_antigos'] and self.partes:
+            self._compactar()
+            df = self.partes[0]
+            self.partes = [df[~df[COLUNA_ID_ARQUIVO].isin(info['ids_antigos'])]]
+            self._compactar()
+        self.arquivos.difference_update(info['ids_antigos'])
+        self.arquivos.add(info['id'])
+        self.alterada = True
+        self._gravar()
+
+    def _gravar(self):
+        """Grava a amostra e a lista de arquivos em tabelas novas e troca pelas antigas numa única transação."""
+        self._compactar()
+        amostra = self.partes[0] if self.partes else None
+        conn = sqlite3.connect(self.caminho_db)
+        tabela_temporaria = f"{self.tabela_amostra}_nova"
+        conn.execute(f"DROP TABLE IF EXISTS {tabela_temporaria}")
+        if amostra is not None:
+            amostra.to_sql(tabela_temporaria, conn, index=False)
+        conn.execute(f"DROP TABLE IF EXISTS {self.tabela_amostra}")
+        if amostra is not None:
+            conn.execute(f"ALTER TABLE {tabela_temporaria} RENAME TO {self.tabela_amostra}")
+        conn.execute(f"DROP TABLE IF EXISTS {self.tabela_arquivos}")
+        conn.execute(f"CREATE TABLE {self.tabela_arquivos} ({COLUNA_ID_ARQUIVO} INTEGER PRIMARY KEY)")
+        conn.executemany(f"INSERT INTO {self.tabela_arquivos} VALUES (?)", [(i,) for i in sorted(self.arquivos)])
+        conn.commit()
+        conn.close()
+        self.alterada = False
+
+    def finalizar(self):
+        """Grava o que ainda não foi gravado e mostra o tamanho da amostra."""
+        self._compactar()
+        if not self.partes:
+            print("Nenhuma linha recebida: a amostra estratificada não foi gravada.")
+            return
+        if self.alterada:
+            self._gravar()
+        amostra = self.partes[0]
+        print(f"Amostra estratificada gravada em '{self.tabela_amostra}' ({formatar_numero(len(amostra))} linhas, "
+              f"{amostra[self.coluna_estrato].nunique()} classes).")
+
+def construir_amostra_da_tabela(caminho_db, tabela, coluna_estrato, tamanhos, tamanho_chunk=TAMANHO_CHUNK):
+    """Gera a amostra estratificada lendo a tabela já carregada (para bancos sem amostra)."""
+    destino = DestinoAmostra(caminho_db, tabela, coluna_estrato, tamanhos, continuar=False)
+    conn = sqlite3.connect(caminho_db)
+    destino.ler_da_tabela(conn, tamanho_chunk=tamanho_chunk)
+    conn.close()
+    destino.finalizar()
+
+# ==============================================================================
+# RESUMO POR CLASSE E ÍNDICES
+# ==============================================================================
+class DestinoResumo:
+    """
+    Acumula, durante a carga, contagem, soma, soma dos quadrados, mínimo, máximo,
+    infinitos e valores não inteiros de cada coluna numérica por classe (a base do
+    esquema de tipos). O resumo é gravado por arquivo de origem, então
+    arquivos novos só acrescentam linhas e arquivos recarregados trocam as suas.
+    """
+
+    def __init__(self, caminho_db, coluna_grupo, tipos_colunas):
+        self.caminho_db = caminho_db
+        self.coluna_grupo = coluna_grupo
+        self.colunas = [col for col, tipo in tipos_colunas.items()
+                        if tipo in ('INTEGER', 'REAL') and col != coluna_grupo]
+        # Colunas de texto entram só com a contagem de valores não nulos
+        self.colunas_texto = [col for col, tipo in tipos_colunas.items()
+                              if tipo == 'TEXT' and col != coluna_grupo]
+        self.parciais = {} # {id do arquivo: [resumos parciais dos pedaços]}
+        conn = sqlite3.connect(caminho_db)
+        criar_tabela_resumo(conn)
+        conn.close()
+
+    def processar(self, chunk):
+        """Resume o pedaço por (arquivo, classe) e guarda o resultado parcial."""
+        # Colunas que o arquivo não tem ficam fora do resumo do pedaço
+        colunas = [col for col in self.colunas if col in chunk.columns]
+        colunas_texto = [col for col in self.colunas_texto if col in chunk.columns]
+        brutos = chunk[colunas].astype('float64')
+        # Infinitos ficam fora das somas, como nos gráficos (mas são contados à parte)
+        valores = brutos.where(np.isfinite(brutos))
+        chaves = [chunk[COLUNA_ID_ARQUIVO], coluna_ou_nula(chunk, self.coluna_grupo)]
+        grupos = valores.groupby(chaves, dropna=False)
+        fracionarios = valores.notna() & (valores % 1 != 0)
+        parcial = pd.concat({
+            'n': grupos.count().stack(),
+            'soma': grupos.sum().stack(),
+            'soma_quadrados': (valores ** 2).groupby(chaves, dropna=False).sum().stack(),
+            'minimo': grupos.min().stack(),
+            'maximo': grupos.max().stack(),
+            'infinitos': np.isinf(brutos).groupby(chaves, dropna=False).sum().stack(),
+            'fracionarios': fracionarios.groupby(chaves, dropna=False).sum().stack(),
+        }, axis=1)
+        if colunas_texto:
+            textos = chunk[colunas_texto].groupby(chaves, dropna=False).count().stack()
+            parcial = pd.concat([parcial, pd.DataFrame({'n': textos})])
+        contagem = chunk.groupby(chaves, dropna=False).size()
+        parcial.index.names = [COLUNA_ID_ARQUIVO, 'grupo', 'coluna']
+        # Linha extra '*' com o total de linhas de cada classe (inclusive com colunas nulas)
+        total = pd.DataFrame({'n': contagem}).assign(coluna=COLUNA_CONTAGEM).set_index('coluna', append=True)
+        total.index.names = parcial.index.names
+        parcial = pd.concat([parcial, total])
+        for id_arquivo, parte in parcial.groupby(level=0):
+            self.parciais.setdefault(id_arquivo, []).append(parte)
+
+    def concluir_arquivo(self, info):
+        """Grava o resumo do arquivo concluído e apaga o da versão antiga."""
+        partes = self.parciais.pop(info['id'], [])
+        conn = sqlite3.connect(self.caminho_db)
+        remover_do_resumo(conn, info['ids_antigos'])
+        # Numa carga retomada só o final do arquivo passou por aqui: o resumo desse
+        # arquivo fica para sincronizar_resumo, que o calcula a partir da tabela
+        if partes and 'retomada' not in info:
+            gravar_resumo(conn, combinar_resumos(pd.concat(partes)))
+        conn.commit()
+        conn.close()
+
+    def finalizar(self):
+        """Nada a fazer: cada arquivo já foi gravado ao terminar."""
+
+def criar_tabela_resumo(conn):
+    """Cria a tabela do resumo por classe, se ainda não existir (ou se for de uma versão anterior)."""
+    if tabela_existe(conn, TABELA_RESUMO):
+        colunas = [linha[1] for linha in conn.execute(f"PRAGMA table_info('{TABELA_RESUMO}')")]
+        if not set(ESTATISTICAS_RESUMO) <= set(colunas):
+            # Resumo sem as estatísticas novas: é recalculado por sincronizar_resumo
+            conn.execute(f"DROP TABLE {TABELA_RESUMO}")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_RESUMO} (
+            {COLUNA_ID_ARQUIVO} INTEGER,
+            grupo TEXT,
+            coluna TEXT,
+            n INTEGER,
+            soma REAL,
+            soma_quadrados REAL,
+            minimo REAL,
+            maximo REAL,
+            infinitos INTEGER,
+            fracionarios INTEGER
+        )""")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABELA_RESUMO}_arquivo ON {TABELA_RESUMO} ({COLUNA_ID_ARQUIVO})")
+
+def combinar_resumos(parciais):
+    """Junta resumos parciais com o mesmo índice (arquivo, grupo, coluna)."""
+    grupos = parciais.groupby(level=[0, 1, 2], dropna=False)
+    return pd.DataFrame({
+        'n': grupos['n'].sum(),
+        'soma': grupos['soma'].sum(min_count=1),
+        'soma_quadrados': grupos['soma_quadrados'].sum(min_count=1),
+        'minimo': grupos['minimo'].min(),
+        'maximo': grupos['maximo'].max(),
+        'infinitos': grupos['infinitos'].sum(),
+        'fracionarios': grupos['fracionarios'].sum(),
+    })
+
+def gravar_resumo(conn, resumo):
+    """Insere as linhas de um resumo no formato (arquivo, grupo, coluna) -> estatísticas."""
+    linhas = resumo.reset_index()
+    linhas = linhas.astype(object).where(linhas.notna(), None)
+    colunas = [COLUNA_ID_ARQUIVO, 'grupo', 'coluna'] + ESTATISTICAS_RESUMO
+    linhas = linhas[colunas]
+    conn.executemany(
+        f"INSERT INTO {TABELA_RESUMO} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+        linhas.itertuples(index=False, name=None))
+
+def remover_do_resumo(conn, ids_arquivos):
+    """Apaga do resumo as linhas dos arquivos indicados."""
+    if ids_arquivos:
+        marcadores = ', '.join('?' * len(ids_arquivos))
+        conn.execute(f"DELETE FROM {TABELA_RESUMO} WHERE {COLUNA_ID_ARQUIVO} IN ({marcadores})", list(ids_arquivos))
+
+def sincronizar_resumo(caminho_db, tabela, coluna_grupo):
+    """
+    Confere o resumo com o manifesto: apaga linhas de arquivos que não existem mais e
+    calcula em SQL (uma passada por arquivo) o resumo dos arquivos que ficaram de fora,
+    como em bancos criados antes do resumo ou após uma carga interrompida.
+    """
+    conn = sqlite3.connect(caminho_db)
+    criar_tabela_resumo(conn)
+    conn.execute(f"DELETE FROM {TABELA_RESUMO} WHERE {COLUNA_ID_ARQUIVO} NOT IN "
+                 f"(SELECT id FROM {TABELA_MANIFESTO} WHERE situacao = 'ok')")
+    faltantes = [linha[0] for linha in conn.execute(
+        f"SELECT id FROM {TABELA_MANIFESTO} WHERE situacao = 'ok' AND id NOT IN "
+        f"(SELECT DISTINCT {COLUNA_ID_ARQUIVO} FROM {TABELA_RESUMO})")]
+    if faltantes:
+        print(f"Calculando o resumo por '{coluna_grupo}' de {len(faltantes)} arquivo(s)...")
+        tipos_colunas = tipos_da_tabela(conn, tabela)
+        # Armazenamento compacto: o GROUP BY é feito nos códigos e o resumo guarda os valores
+        tabela_codigos = colunas_codificadas(conn, tabela).get(coluna_grupo)
+        valores_grupo = ler_codigos(conn, tabela_codigos) if tabela_codigos else {}
+        colunas = [col for col, tipo in tipos_colunas.items()
+                   if tipo in ('INTEGER', 'REAL') and col != coluna_grupo]
+        colunas_texto = [col for col, tipo in tipos_colunas.items()
+                         if tipo == 'TEXT' and col != coluna_grupo]
+        expressoes = []
+        for col in colunas:
+            # Multiplicar por 1.0 faz as somas serem REAL (somas de inteiros grandes estouram no SQLite)
+            finito = f'CASE WHEN ABS("{col}") < 9e999 THEN "{col}" * 1.0 END'
+            expressoes += [f'COUNT({finito})', f'SUM({finito})', f'SUM({finito} * {finito})',
+                           f'MIN({finito})', f'MAX({finito})',
+                           f'SUM(CASE WHEN ABS("{col}") >= 9e999 THEN 1 ELSE 0 END)',
+                           f'SUM(CASE WHEN ABS("{col}") < 9e999 AND "{col}" <> CAST("{col}" AS INTEGER) THEN 1 ELSE 0 END)']
+        por_coluna = len(ESTATISTICAS_RESUMO)
+        expressoes += [f'COUNT("{col}")' for col in colunas_texto]
+        for id_arquivo in faltantes:
+            consulta = (f'SELECT "{coluna_grupo}", COUNT(*), {", ".join(expressoes)} FROM {tabela} '
+                        f'WHERE {COLUNA_ID_ARQUIVO} = ? GROUP BY "{coluna_grupo}"')
+            partes = []
+            for grupo, total, *valores in conn.execute(consulta, (id_arquivo,)):
+                grupo = valores_grupo.get(grupo, grupo)
+                partes.append((id_arquivo, grupo, COLUNA_CONTAGEM, total) + (None,) * (por_coluna - 1))
+                for i, col in enumerate(colunas):
+                    partes.append((id_arquivo, grupo, col, *valores[i * por_coluna:(i + 1) * por_coluna]))
+                for col, nao_nulos in zip(colunas_texto, valores[len(colunas) * por_coluna:]):
+                    partes.append((id_arquivo, grupo, col, nao_nulos) + (None,) * (por_coluna - 1))
+            resumo = pd.DataFrame(partes, columns=[COLUNA_ID_ARQUIVO, 'grupo', 'coluna'] + ESTATISTICAS_RESUMO)
+            gravar_resumo(conn, resumo.set_index([COLUNA_ID_ARQUIVO, 'grupo', 'coluna']))
+    conn.commit()
+    conn.close()
+
+def ler_resumo(conn, colunas=None):
+    """
+    Junta os resumos de todos os arquivos e devolve, por grupo e coluna: n, soma,
+    soma dos quadrados, mínimo, máximo, infinitos, não inteiros, média e desvio
+    padrão. Lê só a tabela de resumo, então o custo não depende do tamanho da
+    tabela de dados.
+    """
+    filtro, parametros = '', []
+    if colunas is not None:
+        filtro = f"WHERE coluna IN ({', '.join('?' * len(colunas))})"
+        parametros = list(colunas)
+    resumo = pd.read_sql_query(
+        f"SELECT grupo, coluna, SUM(n) AS n, SUM(soma) AS soma, SUM(soma_quadrados) AS soma_quadrados, "
+        f"MIN(minimo) AS minimo, MAX(maximo) AS maximo, SUM(infinitos) AS infinitos, "
+        f"SUM(fracionarios) AS fracionarios FROM {TABELA_RESUMO} {filtro} GROUP BY grupo, coluna",
+        conn, params=parametros)
+    estatisticas = ['soma', 'soma_quadrados', 'minimo', 'maximo']
+    resumo[estatisticas] = resumo[estatisticas].astype('float64')
+    resumo['media'] = resumo['soma'] / resumo['n']
+    variancia = (resumo['soma_quadrados'] - resumo['n'] * resumo['media'] ** 2) / (resumo['n'] - 1)
+    resumo['desvio_padrao'] = np.sqrt(variancia.clip(lower=0))
+    return resumo
+
+def contar_por_grupo(conn):
+    """Total de linhas de cada grupo (classe), lido do resumo."""
+    resumo = ler_resumo(conn, [COLUNA_CONTAGEM])
+    return resumo.set_index('grupo')['n'].rename('count')
+
+def colunas_categoricas(conn, tabela_amostra, tipos_colunas, limite=LIMITE_CATEGORIAS):
+    """Escolhe as colunas de texto com poucos valores distintos (medidos na amostra)."""
+    categoricas = []
+    for col, tipo in tipos_colunas.items():
+        if tipo != 'TEXT':
+            continue
+        distintos = conn.execute(f'SELECT COUNT(DISTINCT "{col}") FROM {tabela_amostra}').fetchone()[0]
+        if distintos <= limite:
+            categoricas.append(col)
+    return categoricas
+
+def criar_indices(caminho_db, tabela, colunas):
+    """Cria (se ainda não existirem) índices nas colunas indicadas e atualiza as estatísticas do planejador."""
+    conn = sqlite3.connect(caminho_db)
+    criados = 0
+    for col in colunas:
+        sufixo = re.sub(r'\W+', '_', col).strip('_').lower()
+        nome_indice = f"idx_{tabela}_{sufixo}"
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (nome_indice,)).fetchone():
+            continue
+        inicio = time.perf_counter()
+        conn.execute(f'CREATE INDEX {nome_indice} ON {tabela} ("{col}")')
+        criados += 1
+        print(f"Índice criado em '{col}' ({time.perf_counter() - inicio:.1f}s).")
+    if criados:
+        conn.execute(f'ANALYZE {tabela}')
+    conn.commit()
+    conn.close()
+
+# ==============================================================================
+# CACHE COLUNAR EM PARQUET (OPCIONAL)
+# ==============================================================================
+class DestinoParquet:
+    """Grava cada pedaço da carga também em arquivos Parquet particionados por uma coluna."""
+
+    def __init__(self, pasta, tipos_colunas, coluna_particao, recriar=False):
+        if pa is None:
+            raise ImportError("O cache em Parquet precisa do pacote 'pyarrow' (pip install pyarrow).")
+        self.pasta = Path(pasta)
+        self.coluna_particao = coluna_particao
+        tipos_colunas = dict(tipos_colunas, **{COLUNA_ID_ARQUIVO: 'INTEGER'})
+        self.schema = pa.schema([(col, getattr(pa, TIPOS_ARROW[tipo])()) for col, tipo in tipos_colunas.items()])
+        self.colunas_inteiras = [col for col, tipo in tipos_colunas.items() if tipo == 'INTEGER']
+        self.total_pedacos = 0
+        # Tabela criada do zero nesta execução: o cache também é recriado
+        if recriar and self.pasta.exists():
+            shutil.rmtree(self.pasta)
+
+    def processar(self, chunk):
+        """Converte o pedaço para Arrow e grava um arquivo por partição."""
+        # Todas as partes do cache têm o mesmo esquema: as colunas que o arquivo não tem viram Nulo
+        chunk = chunk.reindex(columns=self.schema.names)
+        # Colunas inteiras não aceitam infinito no Parquet: vira Nulo
+        dados = chunk.assign(**{col: chunk[col].replace([np.inf, -np.inf], np.nan)
+                                for col in self.colunas_inteiras})
+        tabela = pa.Table.from_pandas(dados, schema=self.schema, preserve_index=False)
+        # O id do arquivo no nome permite apagar as partes de uma versão antiga do CSV, e o
+        # índice do pedaço, as partes gravadas depois do último checkpoint de uma carga que caiu
+        id_arquivo = chunk[COLUNA_ID_ARQUIVO].iat[0]
+        pedaco = chunk.attrs[ATRIBUTO_PEDACO]
+        pq.write_to_dataset(tabela, self.pasta, partition_cols=[self.coluna_particao],
+                            basename_template=f"arq{id_arquivo:05d}-pedaco{pedaco:06d}-{{i}}.parquet")
+        self.total_pedacos += 1
+
+    def concluir_arquivo(self, info):
+        """Apaga as partes da versão antiga de um arquivo que acabou de ser recarregado."""
+        remover_partes_parquet(self.pasta, info['ids_antigos'])
+
+    def finalizar(self):
+        """Informa onde o cache foi gravado."""
+        print(f"Cache Parquet gravado em '{self.pasta}' ({self.total_pedacos} pedaços).")
+
+def remover_partes_parquet(pasta, ids_arquivos, depois_do_pedaco=None):
+    """
+    Apaga do cache os arquivos Parquet gerados a partir dos arquivos de origem indicados
+    (com `depois_do_pedaco`, só as partes dos pedaços posteriores a ele).
+    """
+    for id_arquivo in ids_arquivos:
+        for parte in Path(pasta).glob(f"*/arq{id_arquivo:05d}-*.parquet"):
+            pedaco = re.search(r'-pedaco(\d+)-', parte.name)
+            if depois_do_pedaco is None or (pedaco and int(pedaco.group(1)) > depois_do_pedaco):
+                parte.unlink()
+
+def abrir_parquet(pasta):
+    """Abre o cache Parquet como um dataset (nenhum dado é lido ainda). Usado pelo treino."""
+    return ds.dataset(pasta, format='parquet', partitioning='hive')
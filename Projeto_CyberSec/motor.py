@@ -0,0 +1,829 @@
+import argparse
+import glob # Biblioteca para encontrar arquivos que correspondem a um padrão
+import multiprocessing
+import sqlite3
+import sys
+import time
+import zipfile # Biblioteca para manipular arquivos ZIP
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import ingestao # Funções compartilhadas de carga (CyberSec e IDS)
+import conexoes # Conexões somente leitura reutilizadas pelas consultas dos gráficos
+import esquema # Esquema de tipos persistido (dtypes mais estreitos)
+import esbocos # Esboços estatísticos (quantis, distintos, mais frequentes) mantidos na carga
+import agregados_tempo # Fluxos e somas por minuto/hora e classe, mantidos na carga
+import tabela_tempo # Cópia da tabela ordenada por tempo (consultas por intervalo)
+import treino # Treino incremental de classificadores (partial_fit) lendo a tabela em pedaços
+import ranking_atributos # Ranking dos atributos (ANOVA F, correlação) em uma passada pela tabela
+import exportacao_npy # Colunas exportadas como arrays .npy (np.load com mmap_mode='r')
+from ingestao import TAMANHO_CHUNK, inferir_tipo_sql, combinar_tipos
+
+# ==============================================================================
+# MOTOR DE INGESTÃO E ANÁLISE (COMPARTILHADO PELOS CONJUNTOS DE DADOS)
+# ==============================================================================
+# Cada script (analise_CyberSec.py, analise_IDS.py) só descreve o seu conjunto de dados
+# em uma ConfiguracaoDataset e define os seus gráficos. As etapas abaixo podem rodar
+# todas em sequência ou separadas, por exemplo:
+#     python Projeto_CyberSec/analise_IDS.py --etapa graficos
+# Etapas pedidas explicitamente buscam o que precisam das anteriores (ex.: a carga
+# faz a união dos cabeçalhos antes), mas nunca rodam as posteriores.
+
+ETAPAS = ['descompactar', 'cabecalhos', 'carga', 'amostra', 'resumos', 'graficos', 'treino', 'ranking', 'exportar']
+# Nomes alternativos aceitos na linha de comando
+APELIDOS_ETAPAS = {
+    'unzip': 'descompactar',
+    'headers': 'cabecalhos',
+    'load': 'carga',
+    'sample': 'amostra',
+    'summaries': 'resumos',
+    'charts': 'graficos',
+    'train': 'treino',
+    'features': 'ranking',
+    'export': 'exportar',
+}
+# Recursos opcionais que a linha de comando liga só naquela execução (--com RECURSO) -> atributo
+# da configuração. Os que gravam durante a carga rodam na thread escritora e a deixam mais lenta
+RECURSOS = {
+    'parquet': 'cache_parquet',
+    'esbocos': 'esbocos_estatisticos',
+    'agregados': 'agregados_por_tempo',
+    'por_tempo': 'tabela_por_tempo',
+    'treino': 'treino_modelos',
+    'ranking': 'ranquear_atributos',
+    'npy': 'exportar_npy',
+}
+
+
+class ConfiguracaoDataset:
+    """Descreve um conjunto de dados: de onde vêm os CSVs, onde fica o banco e quais gráficos gerar."""
+
+    def __init__(self, nome, caminho_zip, caminho_pasta_csv, nome_db, tabela, coluna_classe,
+                 tamanhos_amostra, graficos=(), cache_parquet=False, carga_paralela=True, extrair_zip=False,
+                 leitor_csv='pandas', graficos_paralelos=True, estilo_graficos='seaborn-v0_8-whitegrid',
+                 colunas_incluidas=None, colunas_excluidas=(), perfil_colunas=None, tabela_fria=False,
+                 armazenamento_compacto=False, colunas_tempo=None, page_size=ingestao.PAGE_SIZE_COMPACTO,
+                 esbocos_estatisticos=False, colunas_frequentes=(), treino_modelos=False,
+                 modelos=('sgd', 'naive_bayes'), fonte_treino='sqlite', tamanho_lote_treino=treino.TAMANHO_LOTE_TREINO,
+                 epocas_treino=1, colunas_excluidas_treino=(), agregados_por_tempo=False, colunas_agregadas=(),
+                 classe_normal=None, tabela_por_tempo=False, ranquear_atributos=False, atributos_no_perfil=None,
+                 colunas_analise=(), exportar_npy=False, colunas_exportadas=None, tipos_forcados=None):
+        self.nome = nome
+        self.caminho_zip = Path(caminho_zip)
+        # O banco, o esquema e o cache Parquet ficam na pasta dos CSVs
+        self.caminho_pasta_csv = Path(caminho_pasta_csv)
+        self.caminho_db = self.caminho_pasta_csv / nome_db
+        self.tabela = tabela
+        self.tabela_amostra = f"{tabela}_amostra"
+        # Coluna de classe: partições do Parquet, estratos da amostra e grupos do resumo
+        self.coluna_classe = coluna_classe
+        # Linhas por classe na amostra estratificada ('padrao' vale para as demais)
+        self.tamanhos_amostra = tamanhos_amostra
+        # Funções que recebem a configuração e salvam um gráfico cada
+        self.graficos = list(graficos)
+        # Cada gráfico (consulta + desenho) roda em um processo próprio, com o backend Agg
+        self.graficos_paralelos = graficos_paralelos
+        # Estilo do matplotlib aplicado uma única vez em cada processo (e não a cada gráfico)
+        self.estilo_graficos = estilo_graficos
+        # Cache colunar opcional (requer pyarrow): Parquet particionado pela classe, gravado durante
+        # a carga. Os gráficos leem o SQLite e a amostra; o único leitor do cache é o treino com
+        # fonte_treino='parquet', então ele só vale ligado junto com essa opção
+        self.cache_parquet = cache_parquet
+        self.caminho_parquet = self.caminho_pasta_csv / "parquet"
+        self.caminho_esquema = self.caminho_pasta_csv / f"{tabela}_esquema.json"
+        # Lê os CSVs em vários processos com um único escritor no SQLite
+        self.carga_paralela = carga_paralela
+        # Por padrão os CSVs são lidos direto de dentro do ZIP. True = descompacta no disco antes.
+        self.extrair_zip = extrair_zip
+        # Leitor dos CSVs na carga: 'pandas' ou 'pyarrow' (multithread, já com os tipos das colunas)
+        self.leitor_csv = leitor_csv
+        # Projeção de colunas na carga: lista de inclusão (ou um perfil JSON com as colunas
+        # usadas, aplicado se o arquivo existir) e lista de exclusão. A coluna de classe
+        # sempre fica. Com `tabela_fria`, as colunas de fora vão para "<tabela>_fria".
+        self.colunas_incluidas = colunas_incluidas
+        self.colunas_excluidas = list(colunas_excluidas)
+        self.perfil_colunas = Path(perfil_colunas) if perfil_colunas else None
+        # Tipos SQLite fixados à mão ({coluna: 'TEXT'}), no lugar dos inferidos do início dos
+        # arquivos. A carga para se achar texto numa coluna numérica: declare-a aqui (vale ao criar a tabela)
+        self.tipos_forcados = dict(tipos_forcados or {})
+        self.tabela_fria = tabela_fria
+        # Armazenamento compacto (vale na criação do banco): a coluna de classe vira código
+        # inteiro com tabela de consulta, as colunas de `colunas_tempo` ({coluna: formato do
+        # strptime}) viram epoch e, ao final da criação (ou com --etapa resumos), o banco passa
+        # por ANALYZE + VACUUM com `page_size`; as cargas incrementais só fazem o ANALYZE
+        self.armazenamento_compacto = armazenamento_compacto
+        self.colunas_tempo = dict(colunas_tempo or {})
+        self.page_size = page_size
+        # Esboços gravados no banco durante a carga: quantis por classe de cada coluna numérica,
+        # número de valores distintos e, nas `colunas_frequentes`, os valores mais frequentes
+        self.esbocos_estatisticos = esbocos_estatisticos
+        self.colunas_frequentes = list(colunas_frequentes)
+        # Treino incremental (requer scikit-learn): com `treino_modelos`, a etapa 'treino' roda
+        # após cargas com arquivos novos (ou sem modelo salvo); pedida explicitamente, sempre roda.
+        # `fonte_treino`: 'sqlite' ou 'parquet' (cache). As colunas de tempo nunca são atributos.
+        self.treino_modelos = treino_modelos
+        self.modelos = list(modelos)
+        self.fonte_treino = fonte_treino
+        self.tamanho_lote_treino = tamanho_lote_treino
+        self.epocas_treino = epocas_treino
+        self.colunas_excluidas_treino = list(colunas_excluidas_treino)
+        self.caminho_modelo = self.caminho_pasta_csv / f"{tabela}{treino.SUFIXO_MODELO}"
+        # Agregados por minuto e por hora e classe da primeira coluna de `colunas_tempo`:
+        # número de fluxos e somas das `colunas_agregadas` (colunas da tabela principal)
+        self.agregados_por_tempo = agregados_por_tempo
+        self.colunas_agregadas = list(colunas_agregadas)
+        # Classe do tráfego normal: fica fora das janelas de ataque e é a base da pontuação de anomalia
+        self.classe_normal = classe_normal
+        # Cópia da tabela ordenada pela primeira coluna de `colunas_tempo` (WITHOUT ROWID), para
+        # as análises de um intervalo (--de/--ate) lerem só as páginas daquele trecho. Ela repete
+        # todas as colunas da tabela principal (o banco fica perto do dobro), por isso é opcional
+        self.tabela_por_tempo = tabela_por_tempo
+        self.tabela_tempo = tabela_tempo.nome_tabela_tempo(tabela)
+        # Intervalo (de, ate) pedido na linha de comando; None = todas as linhas
+        self.intervalo_tempo = None
+        # Ranking dos atributos numéricos (após cargas com arquivos novos; pedido com --etapa ranking,
+        # sempre roda). Com `atributos_no_perfil` = N, os N melhores atributos não redundantes, mais
+        # a classe, as colunas de tempo, agregadas, frequentes e `colunas_analise` (as usadas pelos
+        # gráficos), são gravados como perfil sugerido na pasta de relatórios. O `perfil_colunas`
+        # em uso nunca é trocado: a tabela já carregada depende dele (veja etapa_cabecalhos).
+        self.ranquear_atributos = ranquear_atributos
+        self.atributos_no_perfil = atributos_no_perfil
+        self.colunas_analise = list(colunas_analise)
+        # Os relatórios ficam em uma subpasta: CSVs soltos na pasta dos dados seriam carregados
+        self.pasta_relatorios = self.caminho_pasta_csv / 'relatorios'
+        self.caminho_ranking = self.pasta_relatorios / f"{tabela}{ranking_atributos.SUFIXO_RANKING}"
+        self.caminho_correlacao = self.pasta_relatorios / f"{tabela}{ranking_atributos.SUFIXO_CORRELACAO}"
+        self.caminho_perfil_sugerido = self.pasta_relatorios / f"{tabela}{ranking_atributos.SUFIXO_PERFIL_SUGERIDO}"
+        # Exportação das `colunas_exportadas` (None = todas as numéricas, sem as de tempo) e dos
+        # códigos da classe para arrays .npy (float32/int32), abertos com np.load(mmap_mode='r').
+        # Com `exportar_npy`, roda após cargas com arquivos novos; --etapa exportar sempre roda.
+        self.exportar_npy = exportar_npy
+        self.colunas_exportadas = list(colunas_exportadas) if colunas_exportadas is not None else None
+        self.caminho_npy = self.caminho_pasta_csv / exportacao_npy.PASTA_NPY
+
+# ==============================================================================
+# ETAPA 0: LOCALIZAR OS DADOS (CSVs NA PASTA OU DIRETO DO ZIP)
+# ==============================================================================
+def etapa_descompactar(config, estado):
+    """Localiza os CSVs na pasta, descompacta o ZIP (se configurado) ou lista os CSVs de dentro do ZIP."""
+    print(f"--- Localizando os arquivos CSV ---")
+    # Cria a pasta de destino se ela não existir (o banco de dados também fica nela)
+    config.caminho_pasta_csv.mkdir(exist_ok=True)
+    # Verifica se já existem arquivos CSV na pasta de destino
+    arquivos_csv_existentes = sorted(glob.glob(str(config.caminho_pasta_csv / "*.csv")))
+
+    if arquivos_csv_existentes:
+        print("Arquivos CSV já existem na pasta. Eles serão lidos diretamente.")
+        lista_arquivos_csv = arquivos_csv_existentes
+    elif config.caminho_zip.exists() and config.extrair_zip:
+        print(f"Arquivos CSV não encontrados. Descompactando '{config.caminho_zip.name}' para '{config.caminho_pasta_csv}'...")
+        with zipfile.ZipFile(config.caminho_zip, 'r') as zip_ref:
+            zip_ref.extractall(config.caminho_pasta_csv)
+        print("Arquivos descompactados com sucesso!")
+        lista_arquivos_csv = sorted(glob.glob(str(config.caminho_pasta_csv / "*.csv")))
+    elif config.caminho_zip.exists():
+        # Cada CSV é lido em fluxo de dentro do ZIP: nada é gravado no disco
+        lista_arquivos_csv = ingestao.listar_csvs_do_zip(config.caminho_zip)
+        print(f"Lendo {len(lista_arquivos_csv)} arquivos CSV direto de '{config.caminho_zip.name}', sem descompactar.")
+    else:
+        print(f"ERRO: A pasta '{config.caminho_pasta_csv}' está vazia e o arquivo '{config.caminho_zip.name}' não foi encontrado.")
+        # Encerra o script se não houver dados para processar
+        sys.exit()
+    estado['arquivos_csv'] = lista_arquivos_csv
+
+# ==============================================================================
+# ETAPA 1: MANIFESTO E UNIÃO DOS CABEÇALHOS (TABELA MESTRA TIPADA)
+# ==============================================================================
+def etapa_cabecalhos(config, estado):
+    """
+    Compara os CSVs com o manifesto e, se houver arquivos novos ou alterados, junta os
+    cabeçalhos e tipos de todos eles e cria (ou amplia) a tabela mestra tipada.
+    """
+    if 'arquivos_csv' not in estado:
+        etapa_descompactar(config, estado)
+    # O manifesto guarda tamanho, data, hash e número de linhas de cada CSV já carregado.
+    # Só arquivos novos ou alterados são lidos; os alterados substituem a versão antiga.
+    print(f"\n--- Verificando o manifesto de arquivos do banco '{config.caminho_db.name}' ---")
+    conn = sqlite3.connect(config.caminho_db)
+    if config.armazenamento_compacto:
+        # Só tem efeito em um banco ainda vazio (depois, só no VACUUM)
+        conn.execute(f"PRAGMA page_size = {int(config.page_size)}")
+    ids_incompletos = ingestao.preparar_manifesto(conn, config.tabela)
+    if ids_incompletos and config.cache_parquet and config.caminho_parquet.exists():
+        ingestao.remover_partes_parquet(config.caminho_parquet, ids_incompletos)
+    arquivos_para_carregar = ingestao.planejar_carga(conn, estado['arquivos_csv'])
+    estado['arquivos_para_carregar'] = arquivos_para_carregar
+    # Cargas retomadas: as partes do cache gravadas depois do último checkpoint são descartadas
+    if config.cache_parquet and config.caminho_parquet.exists():
+        for info in arquivos_para_carregar:
+            if 'retomada' in info:
+                ingestao.remover_partes_parquet(config.caminho_parquet, [info['id']],
+                                                depois_do_pedaco=info['retomada']['pedaco'])
+
+    if not arquivos_para_carregar:
+        conn.close()
+        return
+
+    # Projeção de colunas: sem tabela fria, as colunas de fora nem entram na pré-análise
+    incluidas = config.colunas_incluidas
+    if incluidas is None and config.perfil_colunas and config.perfil_colunas.exists():
+        incluidas = ingestao.carregar_perfil_colunas(config.perfil_colunas)
+        print(f"Perfil de colunas usadas: '{config.perfil_colunas.name}' ({len(incluidas)} colunas).")
+    projecao = {'tabela_fria': config.tabela_fria, 'incluidas': incluidas,
+                'excluidas': config.colunas_excluidas, 'obrigatorias': [config.coluna_classe]}
+    # Colunas já vistas mantêm o destino gravado; só as novas seguem a projeção atual
+    registrados = ingestao.ler_projecao(conn, config.tabela)
+    conflitos = sorted(col for col, destino in registrados.items()
+                       if ingestao.destino_projetado(col, **projecao) != destino)
+    if conflitos:
+        conn.close()
+        print(f"ERRO: a projeção de colunas (perfil, inclusões, exclusões ou tabela fria) mudou para "
+              f"colunas já gravadas em '{config.tabela}': {', '.join(conflitos)}.\n"
+              f"Volte a configuração anterior ou apague o arquivo '{config.caminho_db.name}' "
+              f"para recriar o banco com a nova projeção.")
+        sys.exit(1)
+    destino_coluna = lambda nome: registrados.get(nome) or ingestao.destino_projetado(nome, **projecao)
+    com_projecao = incluidas is not None or bool(config.colunas_excluidas)
+    filtro_colunas = None
+    if com_projecao and not config.tabela_fria:
+        filtro_colunas = lambda nome: destino_coluna(nome) == ingestao.DESTINO_PRINCIPAL
+
+    # Lê o cabeçalho e o primeiro pedaço de cada arquivo. Assim a tabela já nasce com
+    # os tipos finais (INTEGER/REAL/TEXT) e os dados não precisam ser reescritos depois.
+    print("\n--- Analisando cabeçalhos e tipos dos arquivos... ---")
+    tipos_colunas = {}
+
+    for info in arquivos_para_carregar:
+        df_inicio = ingestao.ler_inicio(info['caminho'], TAMANHO_CHUNK, filtro_colunas)
+        for col in df_inicio.columns:
+            tipo = inferir_tipo_sql(df_inicio[col])
+            tipos_colunas[col] = combinar_tipos(tipos_colunas.get(col), tipo)
+    tipos_colunas.update({col: tipo for col, tipo in config.tipos_forcados.items() if col in tipos_colunas})
+
+    # Colunas que já existem no banco (tabela principal ou fria) mantêm o tipo com que foram criadas
+    for tabela_dados in ingestao.tabelas_de_dados(conn, config.tabela):
+        tipos_gravados = ingestao.tipos_da_tabela(conn, tabela_dados)
+        diferentes = sorted(col for col, tipo in config.tipos_forcados.items()
+                            if col in tipos_gravados and tipos_gravados[col] != tipo)
+        if diferentes:
+            print(f"AVISO: as colunas {diferentes} já existem em '{tabela_dados}' com outro tipo e o mantêm. "
+                  f"Apague o arquivo '{config.caminho_db.name}' para recriar o banco com `tipos_forcados`.")
+        tipos_colunas = dict(tipos_colunas, **tipos_gravados)
+
+    # O formato (compacto ou não) é o da tabela existente; a configuração vale para tabelas novas
+    if ingestao.tabela_existe(conn, config.tabela):
+        compacto = bool(ingestao.colunas_codificadas(conn, config.tabela))
+        if config.armazenamento_compacto and not compacto:
+            print(f"AVISO: a tabela '{config.tabela}' não está no formato compacto. "
+                  f"Apague o arquivo '{config.caminho_db.name}' e execute novamente para recriá-la nele.")
+    else:
+        compacto = config.armazenamento_compacto
+    colunas_tempo = {col: formato for col, formato in config.colunas_tempo.items() if col in tipos_colunas}
+    estado['colunas_tempo'] = colunas_tempo if compacto else {}
+    for col in estado['colunas_tempo']:
+        tipos_colunas[col] = 'INTEGER'
+
+    # Converte para uma lista ordenada para manter a ordem das colunas
+    # (colunas sem nenhum valor na pré-análise ficam como TEXT)
+    master_columns_list = sorted(tipos_colunas)
+    tipos_colunas = {col: tipos_colunas[col] or 'TEXT' for col in master_columns_list}
+    print(f"Análise concluída. Total de colunas únicas encontradas: {len(master_columns_list)}")
+
+    destinos = {col: destino_coluna(col) for col in tipos_colunas}
+    tipos_frios = {col: tipo for col, tipo in tipos_colunas.items() if destinos[col] == ingestao.DESTINO_FRIA}
+    fora = [col for col in tipos_colunas if destinos[col] != ingestao.DESTINO_PRINCIPAL]
+    if fora:
+        tipos_colunas = {col: tipo for col, tipo in tipos_colunas.items() if destinos[col] == ingestao.DESTINO_PRINCIPAL}
+        destino = f"na tabela fria '{config.tabela}{ingestao.SUFIXO_TABELA_FRIA}'" if config.tabela_fria else "descartadas"
+        print(f"Projeção de colunas: {len(tipos_colunas)} na tabela principal, {len(fora)} {destino}.")
+
+    # Criação (ou atualização) da tabela mestra tipada
+    estado['tabela_nova'] = ingestao.criar_ou_atualizar_tabela(conn, config.tabela, tipos_colunas,
+                                                               codificar=[config.coluna_classe] if compacto else ())
+    if tipos_frios:
+        ingestao.criar_ou_atualizar_tabela_fria(conn, config.tabela, tipos_frios)
+    ingestao.gravar_projecao(conn, config.tabela, destinos)
+    estado['tipos_colunas'] = tipos_colunas
+    estado['tipos_frios'] = tipos_frios
+    conn.commit()
+    conn.close()
+
+# ==============================================================================
+# ETAPA 2: CARGA TIPADA (COM AMOSTRA, RESUMO, CORREÇÕES E PARQUET NO MESMO FLUXO)
+# ==============================================================================
+def coluna_de_tempo(config, recurso):
+    """Primeira coluna de `colunas_tempo`: a usada pelos agregados e pela tabela ordenada por tempo."""
+    if not config.colunas_tempo:
+        print(f"AVISO: {recurso} precisa de uma coluna em `colunas_tempo`. Recurso desligado.")
+        return None
+    return next(iter(config.colunas_tempo))
+
+def coluna_tempo_agregados(config):
+    """Coluna de tempo dos agregados por minuto e hora (None se os agregados estão desligados)."""
+    return coluna_de_tempo(config, 'os agregados por tempo') if config.agregados_por_tempo else None
+
+def etapa_carga(config, estado):
+    """Carrega os arquivos novos ou alterados, alimentando também os destinos extras."""
+    if 'arquivos_para_carregar' not in estado:
+        etapa_cabecalhos(config, estado)
+    if not estado['arquivos_para_carregar']:
+        print(f"\nNenhum arquivo novo ou alterado. Pulando a etapa de carga.")
+        return
+    tipos_colunas = estado['tipos_colunas']
+    tabela_nova = estado['tabela_nova']
+
+    # O mesmo fluxo de pedaços também alimenta a amostra estratificada, o resumo por classe,
+    # o registro das correções da limpeza e o cache Parquet
+    destinos = [ingestao.DestinoAmostra(config.caminho_db, config.tabela, config.coluna_classe,
+                                        config.tamanhos_amostra, continuar=not tabela_nova),
+                ingestao.DestinoResumo(config.caminho_db, config.coluna_classe, tipos_colunas),
+                ingestao.DestinoCorrecoes(config.caminho_db)]
+    if config.esbocos_estatisticos:
+        destinos.append(esbocos.DestinoEsbocos(config.caminho_db, config.coluna_classe, tipos_colunas,
+                                               config.colunas_frequentes))
+    coluna_tempo = coluna_tempo_agregados(config)
+    if coluna_tempo:
+        colunas = [col for col in config.colunas_agregadas if tipos_colunas.get(col) in ('INTEGER', 'REAL')]
+        ausentes = sorted(set(config.colunas_agregadas) - set(colunas))
+        if ausentes:
+            print(f"AVISO: colunas agregadas fora da tabela principal ou não numéricas (ignoradas): {ausentes}")
+        destinos.append(agregados_tempo.DestinoAgregadosTempo(config.caminho_db, config.coluna_classe, coluna_tempo,
+                                                              config.colunas_tempo[coluna_tempo], colunas))
+    if config.cache_parquet:
+        if ingestao.pa is None:
+            print("AVISO: o pacote 'pyarrow' não está instalado. O cache Parquet não será gerado.")
+        else:
+            destinos.append(ingestao.DestinoParquet(config.caminho_parquet, tipos_colunas, config.coluna_classe,
+                                                    recriar=tabela_nova))
+
+    leitor = config.leitor_csv
+    if leitor == 'pyarrow' and ingestao.pa is None:
+        print("AVISO: o pacote 'pyarrow' não está instalado. Os CSVs serão lidos pelo pandas.")
+        leitor = 'pandas'
+
+    # Agora, processamos os arquivos e inserimos os dados já convertidos.
+    # No modo paralelo, vários processos leem os CSVs e uma única thread grava no banco.
+    ingestao.carregar_csvs(config.caminho_db, config.tabela, estado['arquivos_para_carregar'], tipos_colunas,
+                           paralelo=config.carga_paralela, destinos=destinos, leitor=leitor,
+                           tipos_frios=estado['tipos_frios'], colunas_tempo=estado['colunas_tempo'])
+
+    print(f"\n\n--- Processo Concluído! ---")
+    print(f"Todos os dados foram salvos com sucesso na tabela '{config.tabela}'.")
+
+# ==============================================================================
+# ETAPA 3: AMOSTRA ESTRATIFICADA
+# ==============================================================================
+def etapa_amostra(config, estado):
+    """
+    Gera a amostra estratificada a partir da tabela quando ela ainda não existe (bancos
+    antigos). Pedida explicitamente, recria a amostra (ex.: após mudar os tamanhos).
+    """
+    conn = sqlite3.connect(config.caminho_db)
+    amostra_existe = ingestao.tabela_existe(conn, config.tabela_amostra)
+    conn.close()
+    if not amostra_existe:
+        print(f"\nA tabela '{config.tabela_amostra}' não existe. Gerando a amostra estratificada a partir da tabela...")
+    elif 'amostra' in estado['etapas_pedidas']:
+        print(f"\nRecriando a amostra estratificada '{config.tabela_amostra}' a partir da tabela...")
+    else:
+        return
+    ingestao.construir_amostra_da_tabela(config.caminho_db, config.tabela, config.coluna_classe,
+                                         config.tamanhos_amostra)
+
+# ==============================================================================
+# ETAPA 4: RESUMO POR CLASSE, ÍNDICES, ESQUEMA DE TIPOS E VERIFICAÇÕES
+# ==============================================================================
+def etapa_resumos(config, estado):
+    """Atualiza o resumo por classe e os índices, salva o esquema de tipos e mostra os relatórios."""
+    caminho_db, tabela = config.caminho_db, config.tabela
+    # O resumo (label_summary) guarda contagem, soma, soma dos quadrados, mínimo e máximo de
+    # cada coluna numérica por classe. Contagens e médias por classe saem dele sem ler a tabela.
+    ingestao.sincronizar_resumo(caminho_db, tabela, config.coluna_classe)
+    if config.esbocos_estatisticos:
+        esbocos.sincronizar_esbocos(caminho_db, tabela, config.coluna_classe, config.colunas_frequentes)
+    coluna_tempo = coluna_tempo_agregados(config)
+    if coluna_tempo:
+        agregados_tempo.sincronizar_agregados(caminho_db, tabela, config.coluna_classe, coluna_tempo,
+                                              config.colunas_tempo[coluna_tempo], config.colunas_agregadas)
+    coluna_ordem = coluna_de_tempo(config, 'a tabela ordenada por tempo') if config.tabela_por_tempo else None
+    if coluna_ordem:
+        tabela_tempo.sincronizar_tabela_tempo(caminho_db, tabela, coluna_ordem, config.colunas_tempo[coluna_ordem])
+    # Índices nas colunas categóricas (texto com poucos valores distintos) para filtros e GROUP BY
+    conn = sqlite3.connect(caminho_db)
+    colunas_indice = ingestao.colunas_categoricas(conn, config.tabela_amostra, ingestao.tipos_da_tabela(conn, tabela))
+    conn.close()
+    ingestao.criar_indices(caminho_db, tabela, colunas_indice)
+    # Armazenamento compacto: visão legível para consultas manuais, ANALYZE após cargas e
+    # VACUUM só na criação da tabela ou com --etapa resumos (ele reescreve o banco inteiro)
+    conn = sqlite3.connect(caminho_db)
+    compacto = bool(ingestao.colunas_codificadas(conn, tabela))
+    if compacto:
+        ingestao.criar_visao_legivel(conn, tabela, config.colunas_tempo)
+    conn.close()
+    if compacto and (estado.get('tabela_nova') or 'resumos' in estado['etapas_pedidas']):
+        ingestao.compactar_banco(caminho_db, config.page_size)
+    elif compacto and estado.get('arquivos_para_carregar'):
+        ingestao.compactar_banco(caminho_db, vacuum=False)
+
+    # --- Exibição do esquema da tabela ---
+    print("\n" + "="*70)
+    print(f"--- Lendo e exibindo o esquema da tabela '{tabela}' ---")
+    try:
+        conn = sqlite3.connect(caminho_db)
+        query = f"PRAGMA table_info('{tabela}');"
+        schema_df = pd.read_sql_query(query, conn)
+        conn.close()
+
+        print("\n--- Colunas e Tipos de Dados ---")
+        pd.set_option('display.max_rows', None)
+        print(schema_df[['name', 'type']])
+
+    except Exception as e:
+        print(f"\nOcorreu um erro ao ler o esquema: {e}")
+
+    # --- Análise de nulos e esquema de tipos ---
+    print("\n" + "="*70)
+    print("--- Verificação de Nulos e Esquema de Tipos (todas as linhas) ---")
+    print("Usando as estatísticas do resumo por classe, calculadas durante a carga (sem varrer a tabela)...")
+
+    try:
+        esquema_tipos = esquema.gerar_esquema(caminho_db, tabela, config.coluna_classe, config.tabela_amostra)
+        colunas_esquema = esquema_tipos['colunas']
+
+        # 1. Validação de nulos e infinitos
+        print(f"\n--- Verificando colunas com valores nulos ou infinitos "
+              f"({ingestao.formatar_numero(esquema_tipos['linhas'])} linhas) ---")
+        colunas_com_nulos = []
+        for col, info in colunas_esquema.items():
+            if info['nulos'] or info['infinitos']:
+                print(f"- Coluna '{col}': {info['nulos']} valores nulos, {info['infinitos']} infinitos.")
+                colunas_com_nulos.append(col)
+
+        if not colunas_com_nulos:
+            print("Nenhuma coluna com valores nulos ou infinitos foi encontrada.")
+
+        # Correções já feitas durante a carga (cabeçalhos repetidos, espaços, infinitos -> NULL)
+        conn = sqlite3.connect(caminho_db)
+        correcoes = ingestao.ler_correcoes(conn)
+        conn.close()
+        if not correcoes.empty:
+            print("\n--- Correções feitas na limpeza durante a carga ---")
+            for _, linha in correcoes.iterrows():
+                print(f"- Coluna '{linha['coluna']}': {linha['quantidade']} ({linha['tipo']})")
+
+        # 2. Tipos mais estreitos (int8/16/32, float32, category)
+        print("\n--- Tipos de dados do pandas escolhidos para cada coluna ---")
+        print(pd.DataFrame(colunas_esquema).T[['tipo_sql', 'dtype', 'minimo', 'maximo']])
+
+        # O esquema fica salvo ao lado do banco e é usado como dtype= nas leituras seguintes
+        esquema.salvar_esquema(config.caminho_esquema, esquema_tipos)
+        dtypes_colunas = {col: info['dtype'] for col, info in colunas_esquema.items()}
+        numericas = [col for col, info in colunas_esquema.items() if info['tipo_sql'] != 'TEXT']
+        bytes_padrao, bytes_esquema = esquema.bytes_por_linha(dtypes_colunas, numericas)
+        if bytes_esquema:
+            print(f"\nMemória das colunas numéricas: {bytes_padrao} bytes por linha em float64, "
+                  f"{bytes_esquema} com o esquema ({bytes_padrao / bytes_esquema:.1f}x menos).")
+        print(f"Esquema de tipos salvo em: {config.caminho_esquema}")
+
+    except Exception as e:
+        print(f"\nOcorreu um erro durante a análise de nulos e tipos: {e}")
+
+    # --- Esboços estatísticos: distintos e mais frequentes da população inteira ---
+    if config.esbocos_estatisticos:
+        print("\n" + "="*70)
+        print("--- Esboços estatísticos (todas as linhas, valores aproximados) ---")
+        try:
+            conn = sqlite3.connect(caminho_db)
+            colunas = [col for col in ingestao.tipos_da_tabela(conn, tabela) if col != config.coluna_classe]
+            print("\n--- Valores distintos por coluna (HyperLogLog) ---")
+            print(esbocos.contar_distintos(conn, colunas).astype('int64').to_string())
+            for col in config.colunas_frequentes:
+                print(f"\n--- Valores mais frequentes de '{col}' (Count-Min) ---")
+                print(esbocos.mais_frequentes(conn, col, k=10).to_string(index=False))
+            conn.close()
+        except Exception as e:
+            print(f"\nOcorreu um erro ao ler os esboços estatísticos: {e}")
+
+    # --- Agregados por tempo: fluxos por hora e janelas de ataque ---
+    if coluna_tempo:
+        print("\n" + "="*70)
+        print(f"--- Fluxos por hora e '{config.coluna_classe}' (tabela '{agregados_tempo.TABELA_AGREGADOS_TEMPO}') ---")
+        try:
+            conn = sqlite3.connect(caminho_db)
+            por_hora = agregados_tempo.ler_agregados(conn, 'hora')
+            print(por_hora.pivot_table(index='inicio', columns='grupo', values='fluxos', aggfunc='sum',
+                                       fill_value=0).to_string())
+            excluidos = [config.classe_normal] if config.classe_normal else []
+            janelas = agregados_tempo.janelas_ativas(conn, excluidos)
+            conn.close()
+            print(f"\n--- Maiores janelas contínuas (por minuto) de cada classe"
+                  f"{f' fora {config.classe_normal!r}' if excluidos else ''} ---")
+            print(janelas.head(10).to_string(index=False))
+        except Exception as e:
+            print(f"\nOcorreu um erro ao ler os agregados por tempo: {e}")
+
+    # --- Verificação dos tipos de dados no banco ---
+    print("\n" + "="*70)
+    print(f"--- ETAPA FINAL: Verificando os tipos de dados na tabela '{tabela}' ---")
+
+    try:
+        conn = sqlite3.connect(caminho_db)
+        schema_atual_df = pd.read_sql_query(f"PRAGMA table_info('{tabela}');", conn)
+        conn.close()
+
+        # A tabela já é criada com os tipos finais durante a carga. Muitas colunas TEXT
+        # indicam um banco gerado pela versão antiga do script (carga toda em texto).
+        text_count = (schema_atual_df['type'] == 'TEXT').sum()
+        if text_count < 10:
+            print("\nTipos de dados corretos desde a carga. Nenhuma ação necessária.")
+        else:
+            print(f"\nA tabela possui {text_count} colunas TEXT (banco gerado por uma versão antiga).")
+            print(f"Apague o arquivo '{caminho_db.name}' e execute novamente para recriá-lo já tipado.")
+
+    except Exception as e:
+        print(f"\nOcorreu um erro durante a verificação dos tipos: {e}")
+
+# ==============================================================================
+# ETAPA 5: GRÁFICOS
+# ==============================================================================
+def _preparar_processo_grafico(estilo):
+    """Executado uma vez em cada processo de gráficos: backend sem janela (Agg) e estilo."""
+    plt.switch_backend('Agg')
+    plt.style.use(estilo)
+
+def _renderizar_grafico(grafico, config):
+    """Gera um gráfico e retorna (nome, segundos, erro ou None); um erro não interrompe os demais."""
+    inicio = time.perf_counter()
+    try:
+        grafico(config)
+        erro = None
+    except Exception as e:
+        erro = str(e)
+    finally:
+        plt.close('all')
+    return grafico.__name__, time.perf_counter() - inicio, erro
+
+def _informar_grafico(nome, segundos, erro):
+    """Mostra o tempo de um gráfico (ou o erro que ele gerou)."""
+    if erro is None:
+        print(f"  ('{nome}' em {segundos:.1f}s)")
+    else:
+        print(f"\nOcorreu um erro ao gerar o gráfico '{nome}': {erro}")
+
+def recorte_tempo(config, conn):
+    """
+    Tabela e filtro das análises no intervalo --de/--ate: (tabela, condição, parâmetros).
+    Usa a cópia ordenada por tempo, se `tabela_por_tempo` estiver ligada (só então ela é
+    sincronizada com a tabela); sem ela, a tabela principal se a coluna de tempo já estiver
+    em epoch (percorrendo a tabela inteira). None sem intervalo ou sem como filtrar.
+    """
+    if not config.intervalo_tempo:
+        return None
+    de, ate = config.intervalo_tempo
+    if config.tabela_por_tempo and ingestao.tabela_existe(conn, config.tabela_tempo):
+        onde, parametros = tabela_tempo.condicao_intervalo(de, ate)
+        return config.tabela_tempo, onde, parametros
+    coluna = next(iter(config.colunas_tempo), None)
+    if coluna and ingestao.tipos_da_tabela(conn, config.tabela).get(coluna) == 'INTEGER':
+        onde, parametros = tabela_tempo.condicao_intervalo(de, ate, coluna)
+        return config.tabela, onde, parametros
+    return None
+
+def relatorio_recorte_tempo(config):
+    """Mostra as linhas de cada classe no intervalo pedido e o tempo da consulta."""
+    de, ate = config.intervalo_tempo
+    conn = conexoes.conexao_leitura(config.caminho_db)
+    recorte = recorte_tempo(config, conn)
+    if recorte is None:
+        print("AVISO: não há como filtrar por tempo nesta tabela (coluna de tempo em texto e sem "
+              "`tabela_por_tempo`). O intervalo será ignorado.")
+        config.intervalo_tempo = None
+        return
+    tabela_consulta, onde, parametros = recorte
+    if tabela_consulta == config.tabela:
+        print("AVISO: sem a tabela ordenada por tempo (`tabela_por_tempo`), o intervalo percorre a tabela inteira.")
+    inicio = time.perf_counter()
+    contagens = tabela_tempo.contar_por_grupo(conn, tabela_consulta, config.tabela, config.coluna_classe,
+                                              onde, parametros)
+    milissegundos = (time.perf_counter() - inicio) * 1000
+    print(f"\n--- Recorte de tempo: de {de or 'início'} até {ate or 'fim'} ---")
+    print(f"{ingestao.formatar_numero(int(contagens.sum()))} linhas em '{tabela_consulta}' "
+          f"(consulta em {milissegundos:.1f} ms)")
+    if not contagens.empty:
+        print(contagens.sort_values(ascending=False).to_string())
+
+def etapa_graficos(config, estado):
+    """
+    Gera os gráficos da configuração. Com `graficos_paralelos`, cada gráfico faz a sua
+    consulta e o seu desenho em um processo do pool, e os PNGs são gravados ao mesmo
+    tempo: a etapa passa a durar perto do tempo do gráfico mais lento. As consultas
+    usam uma conexão somente leitura por processo (conexoes.conexao_leitura).
+    """
+    if not config.caminho_db.exists():
+        print(f"ERRO: o banco '{config.caminho_db}' não existe. Execute a carga antes dos gráficos.")
+        return
+    print("\n" + "="*70)
+    if config.intervalo_tempo:
+        relatorio_recorte_tempo(config)
+    print("\n--- Gerando gráficos de análise ---")
+    inicio = time.perf_counter()
+    tempos = []
+    processos = min(len(config.graficos), multiprocessing.cpu_count())
+    if not config.graficos_paralelos or processos <= 1:
+        _preparar_processo_grafico(config.estilo_graficos)
+        for grafico in config.graficos:
+            nome, segundos, erro = _renderizar_grafico(grafico, config)
+            _informar_grafico(nome, segundos, erro)
+            tempos.append(segundos)
+    else:
+        print(f"Gráficos em paralelo: {processos} processos para {len(config.graficos)} gráficos...")
+        with ProcessPoolExecutor(max_workers=processos, initializer=_preparar_processo_grafico,
+                                 initargs=(config.estilo_graficos,)) as pool:
+            futuros = [pool.submit(_renderizar_grafico, grafico, config) for grafico in config.graficos]
+            # Informa cada gráfico assim que ele termina
+            for futuro in as_completed(futuros):
+                nome, segundos, erro = futuro.result()
+                _informar_grafico(nome, segundos, erro)
+                tempos.append(segundos)
+    # O recorte e os gráficos em série compartilham a conexão de leitura desta thread
+    conexoes.fechar_conexoes()
+    if tempos:
+        print(f"Gráficos: {time.perf_counter() - inicio:.1f}s no total "
+              f"(soma dos gráficos: {sum(tempos):.1f}s, mais lento: {max(tempos):.1f}s).")
+
+# ==============================================================================
+# ETAPA 6: TREINO DOS CLASSIFICADORES
+# ==============================================================================
+def etapa_treino(config, estado):
+    """
+    Treina os modelos lendo a tabela (ou o cache Parquet) em minilotes estratificados por
+    classe, mostra vazão, memória de pico e as métricas da validação e salva os modelos.
+    """
+    if 'treino' not in estado['etapas_pedidas']:
+        if not config.treino_modelos:
+            return
+        if config.caminho_modelo.exists() and not estado.get('arquivos_para_carregar'):
+            print(f"\nNenhum arquivo novo desde o último treino. Modelos em '{config.caminho_modelo}'.")
+            return
+    if not config.caminho_esquema.exists():
+        print(f"ERRO: o esquema '{config.caminho_esquema}' não existe. Execute a etapa 'resumos' antes do treino.")
+        return
+    print("\n" + "="*70)
+    print("\n--- Treinando os classificadores (fora da memória, partial_fit) ---")
+    pasta_parquet = None
+    if config.fonte_treino == 'parquet':
+        if config.caminho_parquet.exists():
+            pasta_parquet = config.caminho_parquet
+        else:
+            print(f"AVISO: o cache Parquet '{config.caminho_parquet}' não existe. Lendo do SQLite.")
+    dtypes = esquema.carregar_esquema(config.caminho_esquema)
+    try:
+        treino.treinar(config.caminho_db, config.tabela, config.coluna_classe, dtypes, config.caminho_modelo,
+                       config.modelos, pasta_parquet, config.tamanho_lote_treino, config.epocas_treino,
+                       list(config.colunas_tempo) + config.colunas_excluidas_treino)
+    except ImportError as e:
+        print(f"ERRO: {e}")
+
+# ==============================================================================
+# ETAPA 7: RANKING DOS ATRIBUTOS E PERFIL DE COLUNAS
+# ==============================================================================
+def etapa_ranking(config, estado):
+    """
+    Ranqueia os atributos numéricos pelo F da ANOVA entre as classes, em uma única passada
+    pela tabela (e pela tabela fria), grava o ranking e a correlação em CSV e, com
+    `atributos_no_perfil`, um perfil de colunas sugerido (o perfil em uso não é alterado).
+    """
+    if 'ranking' not in estado['etapas_pedidas']:
+        if not config.ranquear_atributos:
+            return
+        if config.caminho_ranking.exists() and not estado.get('arquivos_para_carregar'):
+            print(f"\nNenhum arquivo novo desde o último ranking. Ranking em '{config.caminho_ranking}'.")
+            return
+    if not config.caminho_db.exists():
+        print(f"ERRO: o banco '{config.caminho_db}' não existe. Execute a carga antes do ranking.")
+        return
+    print("\n" + "="*70)
+    print("\n--- Ranking dos atributos (ANOVA F e correlação, em uma passada) ---")
+    resultado = ranking_atributos.ranquear_atributos(config.caminho_db, config.tabela, config.coluna_classe,
+                                                     list(config.colunas_tempo))
+    if resultado is None:
+        return
+    ranking, correlacao = resultado
+    config.pasta_relatorios.mkdir(exist_ok=True)
+    ranking.to_csv(config.caminho_ranking)
+    correlacao.to_csv(config.caminho_correlacao)
+    colunas_relatorio = ['f_anova', 'eta2', 'desvio_padrao', 'nulos', 'mais_correlacionado', 'correlacao_abs']
+    print(ranking[colunas_relatorio].head(20).round(4).to_string())
+    print(f"Ranking completo em: {config.caminho_ranking}")
+    print(f"Matriz de correlação em: {config.caminho_correlacao}")
+
+    if config.atributos_no_perfil:
+        atributos = ranking_atributos.selecionar_atributos(ranking, config.atributos_no_perfil,
+                                                           correlacao=correlacao)
+        obrigatorias = [config.coluna_classe, *config.colunas_tempo, *config.colunas_agregadas,
+                        *config.colunas_frequentes, *config.colunas_analise]
+        ranking_atributos.gravar_perfil_sugerido(config.caminho_perfil_sugerido, atributos, obrigatorias)
+        print(f"Perfil de colunas sugerido, com {len(atributos)} atributos, em: {config.caminho_perfil_sugerido}")
+        print(f"  Atributos: {', '.join(atributos)}")
+        if config.perfil_colunas:
+            print(f"  Para usá-lo, copie-o para '{config.perfil_colunas}' e recrie a tabela "
+                  f"(apague o banco e carregue de novo).")
+
+# ==============================================================================
+# ETAPA 8: EXPORTAÇÃO PARA ARRAYS NUMPY (.npy)
+# ==============================================================================
+def etapa_exportar(config, estado):
+    """
+    Exporta as colunas escolhidas e os códigos da classe para arquivos .npy contíguos, que os
+    experimentos abrem mapeados em memória em vez de repetir read_sql_query na tabela.
+    """
+    caminho_metadados = config.caminho_npy / exportacao_npy.ARQUIVO_METADADOS
+    if 'exportar' not in estado['etapas_pedidas']:
+        if not config.exportar_npy:
+            return
+        if caminho_metadados.exists() and not estado.get('arquivos_para_carregar'):
+            print(f"\nNenhum arquivo novo desde a última exportação. Arrays em '{config.caminho_npy}'.")
+            return
+    if not config.caminho_esquema.exists():
+        print(f"ERRO: o esquema '{config.caminho_esquema}' não existe. Execute a etapa 'resumos' antes da exportação.")
+        return
+    print("\n" + "="*70)
+    print("\n--- Exportando colunas para arrays NumPy (.npy) ---")
+    dtypes = esquema.carregar_esquema(config.caminho_esquema)
+    metadados = exportacao_npy.exportar_npy(config.caminho_db, config.tabela, config.coluna_classe,
+                                            config.caminho_npy, dtypes, config.colunas_exportadas,
+                                            list(config.colunas_tempo))
+    if metadados is None:
+        return
+    # A abertura só mapeia os arquivos: o tempo não depende do número de linhas
+    inicio = time.perf_counter()
+    exportacao_npy.abrir_npy(config.caminho_npy)
+    print(f"Abertura com mmap_mode='r' em {(time.perf_counter() - inicio) * 1000:.1f} ms. Exemplo:")
+    print(f"    arrays, classes, metadados = exportacao_npy.abrir_npy('{config.caminho_npy}')")
+
+FUNCOES_ETAPAS = {
+    'descompactar': etapa_descompactar,
+    'cabecalhos': etapa_cabecalhos,
+    'carga': etapa_carga,
+    'amostra': etapa_amostra,
+    'resumos': etapa_resumos,
+    'graficos': etapa_graficos,
+    'treino': etapa_treino,
+    'ranking': etapa_ranking,
+    'exportar': etapa_exportar,
+}
+
+# ==============================================================================
+# EXECUÇÃO PELA LINHA DE COMANDO
+# ==============================================================================
+def ler_argumentos(argumentos=None):
+    """
+    Lê as etapas pedidas na linha de comando (sem nenhuma, roda todas), o intervalo de
+    tempo opcional das análises e os recursos ligados nesta execução. Retorna
+    (etapas a executar, etapas pedidas, (de, ate), recursos).
+    """
+    parser = argparse.ArgumentParser(description="Carga e análise do conjunto de dados em etapas.")
+    parser.add_argument('--etapa', '--stage', dest='etapas', action='append',
+                        choices=ETAPAS + list(APELIDOS_ETAPAS),
+                        help="Etapa a executar (pode repetir). Sem esta opção, todas são executadas.")
+    parser.add_argument('--de', '--from', dest='de', metavar='DATA',
+                        help="Início do intervalo de tempo das análises (ex.: '2018-02-14 10:00').")
+    parser.add_argument('--ate', '--to', dest='ate', metavar='DATA',
+                        help="Fim (exclusivo) do intervalo de tempo das análises.")
+    parser.add_argument('--com', '--with', dest='recursos', action='append', default=[], choices=list(RECURSOS),
+                        help="Liga um recurso opcional só nesta execução (pode repetir), além dos da configuração.")
+    opcoes = parser.parse_args(argumentos)
+    intervalo = (opcoes.de, opcoes.ate) if opcoes.de or opcoes.ate else None
+    if not opcoes.etapas:
+        return list(ETAPAS), [], intervalo, opcoes.recursos
+    pedidas = {APELIDOS_ETAPAS.get(etapa, etapa) for etapa in opcoes.etapas}
+    # Executa na ordem natural das etapas, independentemente da ordem na linha de comando
+    pedidas = [etapa for etapa in ETAPAS if etapa in pedidas]
+    return pedidas, pedidas, intervalo, opcoes.recursos
+
+def executar(config, argumentos=None):
+    """Executa as etapas pedidas (ou todas) para o conjunto de dados descrito em `config`."""
+    etapas, pedidas, intervalo, recursos = ler_argumentos(argumentos)
+    # Os gráficos recebem só a configuração (inclusive nos processos do pool): o intervalo vai nela
+    config.intervalo_tempo = intervalo
+    for recurso in recursos:
+        setattr(config, RECURSOS[recurso], True)
+    horario_inicio = datetime.now()
+    horario_inicio_formatado = horario_inicio.strftime("%H:%M:%S")
+    print(f"Início: {horario_inicio_formatado}")
+
+    # O estado guarda o que uma etapa produz para as seguintes (lista de CSVs, plano de carga...)
+    estado = {'etapas_pedidas': pedidas}
+    for etapa in etapas:
+        inicio = time.perf_counter()
+        FUNCOES_ETAPAS[etapa](config, estado)
+        print(f"\nEtapa '{etapa}' concluída em {time.perf_counter() - inicio:.1f}s.")
+
+    horario_fim = datetime.now()
+    horario_fim_formatado = horario_fim.strftime("%H:%M:%S")
+
+    print(f"Início: {horario_inicio_formatado} | Fim: {horario_fim_formatado}")
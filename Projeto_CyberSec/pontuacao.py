@@ -0,0 +1,203 @@
+import argparse
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import ingestao
+import esquema # Esquema de tipos persistido (tipo SQL de cada coluna na leitura)
+import treino # Pacote do modelo treinado (colunas, padronização, classes)
+
+# ==============================================================================
+# PONTUAÇÃO EM LOTE DE NOVOS CSVs DE FLUXOS
+# ==============================================================================
+# Usa o modelo salvo pela etapa 'treino' sem passar pelo banco: cada CSV (ou a entrada
+# padrão) é lido em blocos pelo mesmo leitor da carga, só com as colunas do modelo e
+# já com os tipos do esquema salvo, e cada bloco é previsto de uma vez (predict_proba).
+# Saídas, por arquivo, na pasta de saída:
+#   <nome>_pontuacoes.csv: um fluxo por linha (classe prevista, probabilidade e pontuação de anomalia)
+#   <nome>_resumo.csv: por classe, fluxos previstos, pontuação média e (se o CSV tiver a
+#   coluna de classe) fluxos reais e revocação
+# Com --observar, fica rodando e pontua cada CSV que aparecer na pasta, movendo-o depois
+# para "processados" (ou "com_erro").
+
+SUFIXO_PONTUACOES = '_pontuacoes.csv'
+SUFIXO_RESUMO = '_resumo.csv'
+NOME_ENTRADA_PADRAO = 'entrada_padrao' # Nome das saídas quando o CSV vem do stdin
+INTERVALO_OBSERVACAO = 2.0 # Segundos entre duas verificações da pasta observada
+PASTA_PROCESSADOS = 'processados'
+PASTA_COM_ERRO = 'com_erro'
+FLUXOS_LATENCIA = 100000 # A latência é informada por este número de fluxos
+
+
+class Pontuador:
+    """Carrega o modelo e o esquema uma vez e pontua quantas fontes forem pedidas."""
+
+    def __init__(self, caminho_modelo, caminho_esquema, nome_modelo=None, classe_normal=None, leitor='pandas'):
+        pacote = treino.carregar_modelo(caminho_modelo)
+        self.nome_modelo = nome_modelo or pacote['melhor']
+        if self.nome_modelo not in pacote['modelos']:
+            raise ValueError(f"Modelo '{self.nome_modelo}' não encontrado. Disponíveis: {list(pacote['modelos'])}")
+        self.modelo = pacote['modelos'][self.nome_modelo]
+        self.colunas = pacote['colunas']
+        self.media, self.desvio = pacote['media'], pacote['desvio']
+        self.classes = np.array(pacote['classes'], dtype=object)
+        self.coluna_classe = pacote['coluna_classe']
+        # Pontuação de anomalia = 1 - probabilidade da classe normal (sem ela: 1 - maior probabilidade)
+        self.indice_normal = pacote['classes'].index(classe_normal) if classe_normal in pacote['classes'] else None
+        tipos_sql = esquema.carregar_tipos_sql(caminho_esquema)
+        # Só as colunas do modelo (e a de classe, se o CSV tiver) são interpretadas
+        self.tipos_colunas = {col: tipos_sql.get(col, 'REAL') for col in self.colunas}
+        self.tipos_colunas[self.coluna_classe] = 'TEXT'
+        self.leitor = leitor if leitor != 'pyarrow' or ingestao.pa is not None else 'pandas'
+
+    def pontuar_pedaco(self, chunk):
+        """Prevê um pedaço inteiro de uma vez e retorna o DataFrame de pontuações."""
+        X = chunk.reindex(columns=self.colunas).to_numpy('float32', na_value=np.nan)
+        probabilidades = self.modelo.predict_proba(treino.padronizar(X, self.media, self.desvio))
+        prevista = probabilidades.argmax(axis=1)
+        if self.indice_normal is not None:
+            anomalia = 1 - probabilidades[:, self.indice_normal]
+        else:
+            anomalia = 1 - probabilidades.max(axis=1)
+        pontuacoes = pd.DataFrame({
+            'classe_prevista': self.classes[prevista],
+            'probabilidade': probabilidades.max(axis=1).round(6),
+            'pontuacao_anomalia': anomalia.round(6),
+        })
+        if self.coluna_classe in chunk.columns:
+            pontuacoes[self.coluna_classe] = chunk[self.coluna_classe].to_numpy()
+        return pontuacoes, prevista
+
+    def pontuar_fonte(self, fonte, pasta_saida, nome=None):
+        """
+        Pontua um CSV (caminho, "zip::membro" ou '-' para a entrada padrão) em blocos,
+        grava as pontuações e o resumo por classe e retorna o resumo.
+        """
+        nome = nome or (NOME_ENTRADA_PADRAO if str(fonte) == ingestao.FONTE_ENTRADA_PADRAO
+                        else Path(str(fonte).split(ingestao.SEPARADOR_ZIP)[-1]).stem)
+        pasta_saida = Path(pasta_saida)
+        pasta_saida.mkdir(parents=True, exist_ok=True)
+        caminho_pontuacoes = pasta_saida / f"{nome}{SUFIXO_PONTUACOES}"
+        k = len(self.classes)
+        previstos, somas, maximos = np.zeros(k, 'int64'), np.zeros(k), np.zeros(k)
+        reais, acertos, tem_classe = np.zeros(k, 'int64'), np.zeros(k, 'int64'), False
+        total, segundos_leitura, segundos_previsao = 0, 0.0, 0.0
+
+        inicio = time.perf_counter()
+        pedacos = ingestao.ler_chunks_convertidos(fonte, self.tipos_colunas, 0, leitor=self.leitor)
+        with open(caminho_pontuacoes, 'w', newline='', encoding='utf-8') as saida:
+            while True:
+                marca = time.perf_counter()
+                chunk = next(pedacos, None)
+                segundos_leitura += time.perf_counter() - marca
+                if chunk is None:
+                    break
+                if chunk.empty:
+                    continue
+                marca = time.perf_counter()
+                pontuacoes, prevista = self.pontuar_pedaco(chunk)
+                segundos_previsao += time.perf_counter() - marca
+                # Número do fluxo no arquivo (1 = primeira linha de dados)
+                pontuacoes.insert(0, 'fluxo', np.arange(total + 1, total + len(pontuacoes) + 1))
+                pontuacoes.to_csv(saida, index=False, header=total == 0)
+                total += len(pontuacoes)
+
+                previstos += np.bincount(prevista, minlength=k)
+                somas += np.bincount(prevista, weights=pontuacoes['pontuacao_anomalia'].to_numpy(), minlength=k)
+                np.maximum.at(maximos, prevista, pontuacoes['pontuacao_anomalia'].to_numpy())
+                if self.coluna_classe in pontuacoes.columns:
+                    tem_classe = True
+                    # Classes que o modelo não conhece não entram na revocação
+                    real = pd.Index(self.classes).get_indexer(pontuacoes[self.coluna_classe])
+                    conhecida = real >= 0
+                    reais += np.bincount(real[conhecida], minlength=k)
+                    acertos += np.bincount(real[conhecida & (real == prevista)], minlength=k)
+        segundos = time.perf_counter() - inicio
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            resumo = pd.DataFrame({
+                'previstos': previstos,
+                'pontuacao_media': np.where(previstos > 0, somas / previstos, np.nan),
+                'pontuacao_maxima': np.where(previstos > 0, maximos, np.nan),
+            }, index=pd.Index(self.classes, name=self.coluna_classe))
+            if tem_classe:
+                resumo['reais'] = reais
+                resumo['revocacao'] = np.where(reais > 0, acertos / reais, np.nan)
+        resumo.round(6).to_csv(pasta_saida / f"{nome}{SUFIXO_RESUMO}")
+
+        if not total:
+            print(f"- {nome}: nenhum fluxo encontrado.")
+            return resumo
+        escala = FLUXOS_LATENCIA / total
+        print(f"- {nome}: {ingestao.formatar_numero(total)} fluxos em {segundos:.2f}s | por "
+              f"{ingestao.formatar_numero(FLUXOS_LATENCIA)} fluxos: {segundos * escala:.2f}s "
+              f"(leitura {segundos_leitura * escala:.2f}s, previsão {segundos_previsao * escala:.2f}s)")
+        print(resumo.round(4).to_string())
+        print(f"  Pontuações em: {caminho_pontuacoes}")
+        return resumo
+
+
+def observar_pasta(pontuador, pasta, pasta_saida, intervalo=INTERVALO_OBSERVACAO):
+    """
+    Fica verificando a pasta e pontua cada CSV novo. Um arquivo só é lido quando o seu
+    tamanho para de mudar entre duas verificações (ainda sendo copiado). Depois é movido
+    para "processados" (ou "com_erro"), então cada arquivo é pontuado uma única vez.
+    """
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    tamanhos = {}
+    print(f"Observando a pasta '{pasta}' a cada {intervalo:g}s (Ctrl+C para encerrar)...")
+    try:
+        while True:
+            for arquivo in sorted(pasta.glob('*.csv')):
+                tamanho = arquivo.stat().st_size
+                if tamanhos.get(arquivo) != tamanho:
+                    tamanhos[arquivo] = tamanho
+                    continue
+                del tamanhos[arquivo]
+                destino = PASTA_PROCESSADOS
+                try:
+                    pontuador.pontuar_fonte(arquivo, pasta_saida)
+                except Exception as e:
+                    print(f"\nOcorreu um erro ao pontuar '{arquivo.name}': {e}")
+                    destino = PASTA_COM_ERRO
+                (pasta / destino).mkdir(exist_ok=True)
+                shutil.move(str(arquivo), str(pasta / destino / arquivo.name))
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        print("\nObservação encerrada.")
+
+# ==============================================================================
+# EXECUÇÃO PELA LINHA DE COMANDO
+# ==============================================================================
+def executar(config, argumentos=None, classe_normal=None):
+    """Pontua os CSVs pedidos (ou a entrada padrão) e/ou observa uma pasta, com o modelo de `config`."""
+    parser = argparse.ArgumentParser(description="Pontuação em lote de CSVs de fluxos com o modelo treinado.")
+    parser.add_argument('arquivos', nargs='*',
+                        help="CSVs a pontuar (caminho ou \"arquivo.zip::membro.csv\"); '-' lê da entrada padrão.")
+    parser.add_argument('--observar', '--watch', metavar='PASTA',
+                        help="Fica rodando e pontua cada CSV que aparecer na pasta.")
+    parser.add_argument('--saida', metavar='PASTA', default=config.caminho_pasta_csv / 'pontuacoes',
+                        help="Pasta das pontuações e dos resumos.")
+    parser.add_argument('--modelo', help="Modelo do pacote (padrão: o melhor na validação).")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_OBSERVACAO,
+                        help="Segundos entre as verificações da pasta observada.")
+    opcoes = parser.parse_args(argumentos)
+    if not opcoes.arquivos and not opcoes.observar:
+        parser.error("informe CSVs, '-' (entrada padrão) ou --observar PASTA.")
+    if not config.caminho_modelo.exists():
+        print(f"ERRO: o modelo '{config.caminho_modelo}' não existe. Execute a etapa 'treino' antes.")
+        return
+
+    inicio = time.perf_counter()
+    pontuador = Pontuador(config.caminho_modelo, config.caminho_esquema, opcoes.modelo, classe_normal,
+                          config.leitor_csv)
+    print(f"Modelo '{pontuador.nome_modelo}' carregado em {time.perf_counter() - inicio:.2f}s "
+          f"({len(pontuador.colunas)} atributos, {len(pontuador.classes)} classes).")
+    for fonte in opcoes.arquivos:
+        pontuador.pontuar_fonte(fonte, opcoes.saida)
+    if opcoes.observar:
+        observar_pasta(pontuador, opcoes.observar, opcoes.saida, opcoes.intervalo)
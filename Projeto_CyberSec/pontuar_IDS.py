@@ -0,0 +1,13 @@
+import pontuacao # Pontuação em lote com o modelo salvo pela etapa 'treino'
+from analise_IDS import CONFIG # Mesma configuração (caminhos do modelo e do esquema) da análise
+
+# ==============================================================================
+# PONTUAÇÃO DE NOVOS CSVs DE FLUXOS (CIC-IDS2018)
+# ==============================================================================
+# Exemplos:
+#     python Projeto_CyberSec/pontuar_IDS.py novos/02-20-2018.csv
+#     cat novos.csv | python Projeto_CyberSec/pontuar_IDS.py -
+#     python Projeto_CyberSec/pontuar_IDS.py --observar Projeto_CyberSec/IDS2018/entrada
+# A pontuação de anomalia é 1 - probabilidade da classe normal (CONFIG.classe_normal, 'Benign').
+if __name__ == "__main__":
+    pontuacao.executar(CONFIG, classe_normal=CONFIG.classe_normal)
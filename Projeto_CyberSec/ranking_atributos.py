@@ -0,0 +1,229 @@
+import json
+import time
+from datetime import datetime
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+import ingestao
+import conexoes # Conexão somente leitura (mmap) para percorrer a tabela
+
+# ==============================================================================
+# RANKING DOS ATRIBUTOS EM UMA PASSADA (ESTATÍSTICAS SUFICIENTES)
+# ==============================================================================
+# A tabela é percorrida uma única vez, em pedaços, sem nunca ficar inteira na memória.
+# De cada pedaço saem, por classe e atributo, contagem, média e M2 (soma dos quadrados
+# dos desvios) e, por par de atributos, os mesmos momentos e o co-momento nas linhas com
+# os dois preenchidos. Os pedaços são somados ao acumulado pela fórmula de Chan (Welford
+# em blocos), que não perde precisão como soma e soma dos quadrados em valores grandes.
+# A memória depende só do número de classes e de atributos, não do tamanho da tabela.
+# Do acumulado saem a variância de cada atributo, as médias por classe, o F da ANOVA
+# (variação entre as classes / variação dentro delas) e a matriz de correlação.
+
+SUFIXO_RANKING = '_ranking_atributos.csv'
+SUFIXO_CORRELACAO = '_correlacao.csv'
+SUFIXO_PERFIL_SUGERIDO = '_perfil_sugerido.json'
+LIMITE_REDUNDANCIA = 0.95 # |correlação| acima da qual um atributo repete outro mais bem colocado
+
+
+def juntar_momentos(n_a, media_a, m2_a, n_b, media_b, m2_b):
+    """Junta dois conjuntos de (contagem, média, M2) pela fórmula de Chan, elemento a elemento."""
+    n = n_a + n_b
+    with np.errstate(divide='ignore', invalid='ignore'):
+        peso_b = np.where(n > 0, n_b / n, 0.0)
+    delta = media_b - media_a
+    return n, media_a + delta * peso_b, m2_a + m2_b + delta ** 2 * n_a * peso_b
+
+
+def momentos_do_bloco(X):
+    """(contagem, média, M2) de cada coluna de um bloco, ignorando os nulos."""
+    validos = ~np.isnan(X)
+    n = validos.sum(axis=0).astype('float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = np.where(n > 0, np.nansum(X, axis=0) / n, 0.0)
+    m2 = np.where(validos, (X - media) ** 2, 0.0).sum(axis=0)
+    return n, media, m2
+
+
+def comomentos_do_bloco(X):
+    """
+    Momentos por par de colunas (i, j), nas linhas com as duas preenchidas: contagem,
+    média e M2 da coluna i e co-momento de i e j (matrizes p x p). Os valores são
+    centralizados antes dos produtos para não perder precisão.
+    """
+    validos = ~np.isnan(X)
+    M = validos.astype('float64')
+    _, centro, _ = momentos_do_bloco(X)
+    Xc = np.where(validos, X - centro, 0.0)
+    n = M.T @ M
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = np.where(n > 0, (Xc.T @ M) / n, 0.0)
+    m2 = np.clip((Xc ** 2).T @ M - n * media ** 2, 0, None)
+    comomento = Xc.T @ Xc - n * media * media.T
+    return n, media + centro[:, None], m2, comomento
+
+
+class AcumuladorAtributos:
+    """Estatísticas suficientes dos atributos, por classe e por par, somadas pedaço a pedaço."""
+
+    def __init__(self, colunas):
+        self.colunas = list(colunas)
+        p = len(self.colunas)
+        self.linhas = 0
+        self.por_classe = {} # classe -> (contagem, média, M2), um valor por atributo
+        # Por par de atributos: contagem, média e M2 do atributo da linha, co-momento
+        self.n_pares, self.media_pares, self.m2_pares = np.zeros((p, p)), np.zeros((p, p)), np.zeros((p, p))
+        self.comomento = np.zeros((p, p))
+
+    def processar(self, classes, X):
+        """Soma um pedaço: `classes` (valor gravado da classe de cada linha) e X (linhas x atributos)."""
+        X = np.where(np.isfinite(X), X, np.nan)
+        self.linhas += len(X)
+        for classe in pd.unique(classes):
+            momentos = momentos_do_bloco(X[classes == classe])
+            if classe in self.por_classe:
+                momentos = juntar_momentos(*self.por_classe[classe], *momentos)
+            self.por_classe[classe] = momentos
+
+        n_b, media_b, m2_b, comomento_b = comomentos_do_bloco(X)
+        n_a, media_a = self.n_pares, self.media_pares
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fator = np.where(n_a + n_b > 0, n_a * n_b / (n_a + n_b), 0.0)
+        delta = media_b - media_a
+        self.comomento = self.comomento + comomento_b + delta * delta.T * fator
+        self.n_pares, self.media_pares, self.m2_pares = juntar_momentos(n_a, media_a, self.m2_pares,
+                                                                        n_b, media_b, m2_b)
+
+    def bytes_acumulados(self):
+        """Memória das estatísticas acumuladas (não cresce com o número de linhas)."""
+        por_classe = sum(array.nbytes for momentos in self.por_classe.values() for array in momentos)
+        return por_classe + 4 * self.comomento.nbytes
+
+    def correlacao(self):
+        """Matriz de correlação de Pearson (por par, nas linhas com os dois atributos preenchidos)."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = self.comomento / np.sqrt(self.m2_pares * self.m2_pares.T)
+        return pd.DataFrame(np.clip(r, -1, 1), index=self.colunas, columns=self.colunas)
+
+    def ranking(self, nomes_classes=None):
+        """
+        Um atributo por linha, do maior para o menor F da ANOVA: contagem, nulos, média,
+        desvio padrão, variância, F, eta² (fração da variância explicada pela classe),
+        o atributo mais bem colocado mais correlacionado com ele e a média de cada classe.
+        """
+        nomes_classes = nomes_classes or {}
+        classes = list(self.por_classe)
+        n_c, medias_c, m2_c = (np.array([self.por_classe[c][i] for c in classes]) for i in range(3))
+        n, media, m2 = reduce(lambda a, b: juntar_momentos(*a, *b), zip(n_c, medias_c, m2_c))
+        k = (n_c > 0).sum(axis=0)
+        entre = (n_c * (medias_c - media) ** 2).sum(axis=0)
+        dentro = m2_c.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variancia = np.where(n > 1, m2 / (n - 1), np.nan)
+            f_anova = (entre / (k - 1)) / (dentro / (n - k))
+            eta2 = entre / (entre + dentro)
+        ranking = pd.DataFrame({
+            'n': n.astype('int64'), 'nulos': (self.linhas - n).astype('int64'),
+            'media': media, 'desvio_padrao': np.sqrt(variancia), 'variancia': variancia,
+            'f_anova': f_anova, 'eta2': eta2,
+        }, index=pd.Index(self.colunas, name='atributo'))
+        # Atributos constantes (F indefinido) vão para o fim
+        ranking = ranking.sort_values('f_anova', ascending=False, na_position='last')
+
+        # Redundância: maior |correlação| com um atributo mais bem colocado
+        correlacao = self.correlacao().abs().loc[ranking.index, ranking.index].to_numpy()
+        redundante_de, correlacoes = [None], [np.nan]
+        for i in range(1, len(ranking)):
+            anteriores = np.nan_to_num(correlacao[i, :i], nan=-1)
+            j = int(anteriores.argmax())
+            redundante_de.append(ranking.index[j] if anteriores[j] >= 0 else None)
+            correlacoes.append(anteriores[j] if anteriores[j] >= 0 else np.nan)
+        ranking['mais_correlacionado'] = redundante_de
+        ranking['correlacao_abs'] = correlacoes
+
+        medias = pd.DataFrame(np.where(n_c > 0, medias_c, np.nan).T, index=self.colunas,
+                              columns=[f"media_{nomes_classes.get(c, c)}" for c in classes])
+        return ranking.join(medias)
+
+
+def atributos_numericos(conn, tabela, coluna_classe, excluidas=()):
+    """Colunas numéricas da tabela principal e da tabela fria (sem a classe e as internas)."""
+    colunas = {}
+    for tabela_dados in ingestao.tabelas_de_dados(conn, tabela):
+        colunas.update(ingestao.tipos_da_tabela(conn, tabela_dados))
+    return [col for col, tipo in colunas.items()
+            if tipo in ('INTEGER', 'REAL') and col != coluna_classe and col not in excluidas]
+
+
+def consulta_atributos(conn, tabela, coluna_classe, colunas):
+    """SELECT da classe e dos atributos, juntando a tabela fria (pelo arquivo e pela linha) se precisar."""
+    tabela_fria = f"{tabela}{ingestao.SUFIXO_TABELA_FRIA}"
+    frias = ingestao.tipos_da_tabela(conn, tabela_fria) if ingestao.tabela_existe(conn, tabela_fria) else {}
+    lista = ', '.join(f'{"f" if col in frias else "p"}."{col}"' for col in colunas)
+    juncao = ''
+    if any(col in frias for col in colunas):
+        juncao = (f" LEFT JOIN {tabela_fria} f ON f.{ingestao.COLUNA_ID_ARQUIVO} = p.{ingestao.COLUNA_ID_ARQUIVO} "
+                  f"AND f.{ingestao.COLUNA_LINHA} = p.{ingestao.COLUNA_LINHA}")
+    return f'SELECT p."{coluna_classe}", {lista} FROM {tabela} p{juncao} WHERE p."{coluna_classe}" IS NOT NULL'
+
+
+def ranquear_atributos(caminho_db, tabela, coluna_classe, excluidas=()):
+    """
+    Percorre a tabela uma vez e retorna (ranking, correlação) dos atributos numéricos,
+    ou None se a tabela não tiver linhas com classe.
+    """
+    conn = conexoes.abrir_leitura(caminho_db)
+    colunas = atributos_numericos(conn, tabela, coluna_classe, excluidas)
+    acumulador = AcumuladorAtributos(colunas)
+    inicio = time.perf_counter()
+    consulta = consulta_atributos(conn, tabela, coluna_classe, colunas)
+    for chunk in pd.read_sql_query(consulta, conn, chunksize=ingestao.TAMANHO_CHUNK):
+        acumulador.processar(chunk.iloc[:, 0].to_numpy(),
+                             chunk.iloc[:, 1:].to_numpy('float64', na_value=np.nan))
+    segundos = time.perf_counter() - inicio
+    tabela_codigos = ingestao.colunas_codificadas(conn, tabela).get(coluna_classe)
+    nomes_classes = ingestao.ler_codigos(conn, tabela_codigos) if tabela_codigos else {}
+    conn.close()
+    if not acumulador.linhas:
+        print("Nenhuma linha com classe na tabela. Nada a ranquear.")
+        return None
+    print(f"{ingestao.formatar_numero(acumulador.linhas)} linhas x {len(colunas)} atributos em {segundos:.1f}s "
+          f"({ingestao.formatar_numero(int(acumulador.linhas / max(segundos, 1e-9)))} linhas/s). "
+          f"Estatísticas acumuladas: {acumulador.bytes_acumulados() / 1024:.0f} KiB.")
+    return acumulador.ranking(nomes_classes), acumulador.correlacao()
+
+# ==============================================================================
+# PERFIL DE COLUNAS PARA AS PRÓXIMAS CARGAS
+# ==============================================================================
+def selecionar_atributos(ranking, quantidade, limite_redundancia=LIMITE_REDUNDANCIA, correlacao=None):
+    """
+    Escolhe até `quantidade` atributos na ordem do ranking, pulando os constantes e os
+    que repetem (|correlação| > limite) um atributo já escolhido.
+    """
+    escolhidos = []
+    for atributo, linha in ranking.iterrows():
+        if len(escolhidos) >= quantidade:
+            break
+        if not linha['f_anova'] > 0:
+            continue
+        if correlacao is not None and escolhidos:
+            if correlacao.loc[atributo, escolhidos].abs().max() > limite_redundancia:
+                continue
+        escolhidos.append(atributo)
+    return escolhidos
+
+
+def gravar_perfil_sugerido(caminho_json, atributos, obrigatorias=()):
+    """
+    Grava o perfil de colunas sugerido (mesmo formato lido por ingestao.carregar_perfil_colunas):
+    as colunas obrigatórias da análise mais os atributos escolhidos. O perfil em uso nunca é
+    trocado aqui: a sugestão só vale se for copiada para ele e a tabela for recriada.
+    """
+    perfil = {
+        'colunas': list(dict.fromkeys([*obrigatorias, *atributos])),
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'atributos_escolhidos': list(atributos),
+    }
+    with open(caminho_json, 'w', encoding='utf-8') as f:
+        json.dump(perfil, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,178 @@
+import sqlite3
+import time
+
+import pandas as pd
+
+import ingestao
+import agregados_tempo # Conversão do tempo para epoch (coluna já convertida ou texto)
+
+# ==============================================================================
+# CÓPIA DA TABELA ORDENADA POR TEMPO (WITHOUT ROWID)
+# ==============================================================================
+# Na tabela principal as linhas ficam na ordem dos arquivos, então filtrar uma janela de
+# tempo percorre a tabela inteira. A cópia "<tabela>_por_tempo" é uma tabela WITHOUT
+# ROWID com chave primária (_tempo, _id_arquivo, _linha): as linhas ficam gravadas
+# fisicamente na ordem do tempo (epoch inteiro) e uma janela vira uma busca na chave
+# seguida da leitura só das páginas daquele trecho. (_id_arquivo, _linha) é o mesmo par
+# que liga a tabela principal à tabela fria; sem tabela fria, a principal não tem _linha e
+# ela é numerada na cópia (ordem da linha no arquivo), servindo só para desempatar a chave.
+# O rowid da principal não serve de ligação: o VACUUM pode renumerá-lo.
+# A cópia é mantida por arquivo, como o resumo: arquivos novos entram, arquivos
+# removidos ou recarregados saem. Linhas sem tempo ficam só na tabela principal.
+# Ela duplica as colunas da tabela (o banco fica perto do dobro): é opcional.
+
+SUFIXO_TABELA_TEMPO = '_por_tempo'
+COLUNA_TEMPO = '_tempo' # Chave de tempo (segundos desde 1970)
+COLUNA_ORIGEM_ANTIGA = '_origem' # Chave de versões anteriores (rowid da principal): a cópia é refeita
+
+
+def nome_tabela_tempo(tabela):
+    """Nome da cópia ordenada por tempo de uma tabela."""
+    return f"{tabela}{SUFIXO_TABELA_TEMPO}"
+
+
+def criar_tabela_tempo(conn, tabela):
+    """
+    Cria a cópia ordenada por tempo com as colunas da tabela principal (mesmos tipos),
+    mais a chave (_tempo, _id_arquivo, _linha). Colunas novas da tabela principal são acrescentadas.
+    """
+    tabela_tempo = nome_tabela_tempo(tabela)
+    colunas = [(linha[1], linha[2]) for linha in conn.execute(f"PRAGMA table_info('{tabela}')")]
+    if ingestao.tabela_existe(conn, tabela_tempo):
+        existentes = {linha[1] for linha in conn.execute(f"PRAGMA table_info('{tabela_tempo}')")}
+        if COLUNA_ORIGEM_ANTIGA in existentes:
+            print(f"A tabela '{tabela_tempo}' usa a chave antiga (rowid da principal) e será recriada.")
+            conn.execute(f"DROP TABLE {tabela_tempo}")
+    if not ingestao.tabela_existe(conn, tabela_tempo):
+        if ingestao.COLUNA_LINHA not in dict(colunas):
+            colunas.append((ingestao.COLUNA_LINHA, 'INTEGER'))
+        definicoes = ', '.join(f'"{col}" {tipo}' for col, tipo in colunas)
+        conn.execute(f"""
+            CREATE TABLE {tabela_tempo} (
+                {COLUNA_TEMPO} INTEGER NOT NULL,
+                {definicoes},
+                PRIMARY KEY ({COLUNA_TEMPO}, {ingestao.COLUNA_ID_ARQUIVO}, {ingestao.COLUNA_LINHA})
+            ) WITHOUT ROWID""")
+    else:
+        for col, tipo in colunas:
+            if col not in existentes:
+                conn.execute(f'ALTER TABLE {tabela_tempo} ADD COLUMN "{col}" {tipo}')
+    # Para trocar ou apagar as linhas de um arquivo sem percorrer a cópia inteira
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela_tempo}_arquivo "
+                 f"ON {tabela_tempo} ({ingestao.COLUNA_ID_ARQUIVO})")
+    return tabela_tempo
+
+
+def sincronizar_tabela_tempo(caminho_db, tabela, coluna_tempo, formato_tempo):
+    """
+    Confere a cópia ordenada por tempo com o manifesto: apaga as linhas de arquivos que
+    não existem mais (ou foram recarregados) e copia as dos arquivos que ainda não estão nela.
+    """
+    conn = sqlite3.connect(caminho_db)
+    ingestao.aplicar_pragmas(conn, ingestao.PRAGMAS_CARGA)
+    tabela_tempo = criar_tabela_tempo(conn, tabela)
+    conn.execute(f"DELETE FROM {tabela_tempo} WHERE {ingestao.COLUNA_ID_ARQUIVO} NOT IN "
+                 f"(SELECT id FROM {ingestao.TABELA_MANIFESTO} WHERE situacao = 'ok')")
+    faltantes = [linha[0] for linha in conn.execute(
+        f"SELECT id FROM {ingestao.TABELA_MANIFESTO} m WHERE situacao = 'ok' AND NOT EXISTS "
+        f"(SELECT 1 FROM {tabela_tempo} t WHERE t.{ingestao.COLUNA_ID_ARQUIVO} = m.id)")]
+    conn.commit()
+    if faltantes:
+        print(f"Copiando {len(faltantes)} arquivo(s) para a tabela ordenada por tempo '{tabela_tempo}'...")
+        inicio = time.perf_counter()
+        tipo_tempo = ingestao.tipos_da_tabela(conn, tabela).get(coluna_tempo)
+        colunas = [linha[1] for linha in conn.execute(f"PRAGMA table_info('{tabela}')")]
+        lista = ', '.join(f'"{col}"' for col in colunas)
+        # Sem tabela fria, _linha é a ordem da linha entre as do arquivo (numerada aqui)
+        if ingestao.COLUNA_LINHA in colunas:
+            lista_destino, lista_origem = lista, lista
+        else:
+            colunas = colunas + [ingestao.COLUNA_LINHA]
+            lista_destino = f"{lista}, {ingestao.COLUNA_LINHA}"
+            lista_origem = f"{lista}, ROW_NUMBER() OVER (ORDER BY rowid) - 1 AS {ingestao.COLUNA_LINHA}"
+        copiadas = 0
+        conn.execute('BEGIN')
+        for id_arquivo in faltantes:
+            if tipo_tempo == 'INTEGER':
+                # Tempo já em epoch (armazenamento compacto): a cópia é feita toda no SQLite. A
+                # numeração vem antes do filtro do tempo, para não depender das linhas sem tempo.
+                cursor = conn.execute(
+                    f'INSERT INTO {tabela_tempo} ({COLUNA_TEMPO}, {lista_destino}) '
+                    f'SELECT "{coluna_tempo}", {lista_destino} FROM (SELECT {lista_origem} FROM {tabela} '
+                    f'WHERE {ingestao.COLUNA_ID_ARQUIVO} = ?) WHERE "{coluna_tempo}" IS NOT NULL', (id_arquivo,))
+                copiadas += cursor.rowcount
+                continue
+            # Tempo em texto: convertido pelo pandas, pedaço a pedaço
+            insert = (f'INSERT INTO {tabela_tempo} ({COLUNA_TEMPO}, {lista_destino}) '
+                      f'VALUES ({", ".join("?" * (len(colunas) + 1))})')
+            consulta = f'SELECT {lista_origem} FROM {tabela} WHERE {ingestao.COLUNA_ID_ARQUIVO} = ?'
+            for chunk in pd.read_sql_query(consulta, conn, params=(id_arquivo,), chunksize=ingestao.TAMANHO_CHUNK):
+                tempo = agregados_tempo.segundos_desde_epoch(chunk[coluna_tempo], formato_tempo)
+                chunk.insert(0, COLUNA_TEMPO, tempo)
+                chunk = chunk[tempo.notna()].astype({COLUNA_TEMPO: 'int64'})
+                linhas = chunk.astype(object).where(chunk.notna(), None)
+                conn.executemany(insert, linhas.itertuples(index=False, name=None))
+                copiadas += len(chunk)
+        conn.commit()
+        print(f"{ingestao.formatar_numero(copiadas)} linhas copiadas em {time.perf_counter() - inicio:.1f}s.")
+    conn.execute('PRAGMA journal_mode = DELETE')
+    conn.close()
+
+# ==============================================================================
+# CONSULTAS POR INTERVALO DE TEMPO
+# ==============================================================================
+def condicao_intervalo(inicio=None, fim=None, coluna=COLUNA_TEMPO):
+    """Condição SQL (e parâmetros) do intervalo [inicio, fim) sobre uma coluna de tempo em epoch."""
+    condicoes, parametros = [], []
+    if inicio is not None:
+        condicoes.append(f'"{coluna}" >= ?')
+        parametros.append(agregados_tempo.para_epoch(inicio))
+    if fim is not None:
+        condicoes.append(f'"{coluna}" < ?')
+        parametros.append(agregados_tempo.para_epoch(fim))
+    return ' AND '.join(condicoes) or None, tuple(parametros)
+
+
+def ler_intervalo(conn, tabela, inicio=None, fim=None, colunas=None, limite=None):
+    """
+    Linhas da janela [inicio, fim) lidas da cópia ordenada por tempo, em ordem de tempo e
+    com as colunas codificadas já traduzidas. `inicio`/`fim`: epoch ou data.
+    """
+    onde, parametros = condicao_intervalo(inicio, fim)
+    lista = ', '.join(f'"{col}"' for col in colunas) if colunas else '*'
+    consulta = f"SELECT {lista} FROM {nome_tabela_tempo(tabela)}"
+    if onde:
+        consulta += f" WHERE {onde}"
+    consulta += f" ORDER BY {COLUNA_TEMPO}"
+    if limite:
+        consulta += f" LIMIT {int(limite)}"
+    df = pd.read_sql_query(consulta, conn, params=parametros)
+    return ingestao.decodificar_colunas(conn, tabela, df)
+
+
+def contar_por_grupo(conn, tabela_consulta, tabela, coluna_grupo, onde=None, parametros=()):
+    """
+    Linhas de cada grupo (classe) em `tabela_consulta` (a principal ou a cópia ordenada),
+    com um filtro opcional. Os códigos são traduzidos pela tabela principal.
+    """
+    where = f"WHERE {onde}" if onde else ''
+    contagens = pd.read_sql_query(
+        f'SELECT "{coluna_grupo}", COUNT(*) AS count FROM {tabela_consulta} {where} '
+        f'GROUP BY "{coluna_grupo}"', conn, params=parametros)
+    contagens = ingestao.decodificar_colunas(conn, tabela, contagens)
+    return contagens.set_index(coluna_grupo)['count']
+
+def contar_por_janela(conn, tabela_consulta, tabela, coluna_grupo, coluna_tempo, segundos=60, onde=None, parametros=()):
+    """
+    Linhas de cada grupo por janela de `segundos` lidas direto de `tabela_consulta`, com a
+    coluna de tempo em epoch: o cálculo que os agregados por tempo guardam, mas percorrendo
+    as linhas. Retorna um DataFrame com as colunas inicio (data), grupo e fluxos.
+    """
+    where = f"WHERE {onde}" if onde else ''
+    janelas = pd.read_sql_query(
+        f'SELECT "{coluna_tempo}" / {segundos} * {segundos} AS inicio, "{coluna_grupo}", COUNT(*) AS fluxos '
+        f'FROM {tabela_consulta} {where} GROUP BY 1, 2', conn, params=parametros)
+    janelas = ingestao.decodificar_colunas(conn, tabela, janelas).rename(columns={coluna_grupo: 'grupo'})
+    janelas = janelas.dropna(subset=['inicio'])
+    janelas['inicio'] = pd.to_datetime(janelas['inicio'], unit='s')
+    return janelas
@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# Os módulos do projeto são importados pelo nome, como nos scripts de análise
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import motor # noqa: E402
+
+# ==============================================================================
+# DADOS SINTÉTICOS (MESMO FORMATO DOS CSVs DO CIC-IDS2018)
+# ==============================================================================
+COLUNAS = ['Dst Port', 'Flow Duration', 'Tot Fwd Pkts', 'Flow Byts/s', 'Label']
+CLASSES = ['Benign', 'DDoS', 'Bot']
+
+
+def escrever_csv(caminho, linhas, semente, cabecalho_a_cada=None, infinitos=0):
+    """
+    Grava um CSV com `linhas` fluxos aleatórios. Com `cabecalho_a_cada`, o cabeçalho é
+    repetido no meio do arquivo a cada tantas linhas; `infinitos` linhas têm 'inf' em
+    'Flow Byts/s'. Retorna quantos cabeçalhos repetidos foram escritos.
+    """
+    rng = np.random.default_rng(semente)
+    classes = rng.choice(CLASSES, size=linhas, p=[0.7, 0.25, 0.05])
+    com_infinito = set(rng.choice(linhas, size=infinitos, replace=False).tolist())
+    cabecalho = ','.join(COLUNAS)
+    repetidos = 0
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(cabecalho + '\n')
+        for i in range(linhas):
+            if cabecalho_a_cada and i and i % cabecalho_a_cada == 0:
+                f.write(cabecalho + '\n')
+                repetidos += 1
+            bytes_por_segundo = 'inf' if i in com_infinito else f"{rng.uniform(0, 1e6):.3f}"
+            f.write(f"{rng.choice([53, 80, 443, 3389])},{rng.integers(1, 10**6)},{rng.integers(1, 50)},"
+                    f"{bytes_por_segundo},{classes[i]}\n")
+    return repetidos
+
+
+@pytest.fixture
+def dados(tmp_path):
+    """
+    Pasta com dois CSVs sintéticos (o segundo com cabeçalhos repetidos e infinitos) e o
+    que a carga deve encontrar neles: linhas de dados, cabeçalhos repetidos e infinitos.
+    """
+    pasta = tmp_path / 'dados'
+    pasta.mkdir()
+    escrever_csv(pasta / 'dia1.csv', 1500, semente=1)
+    repetidos = escrever_csv(pasta / 'dia2.csv', 1800, semente=2, cabecalho_a_cada=400, infinitos=7)
+    return SimpleNamespace(pasta=pasta, linhas=1500 + 1800, cabecalhos_repetidos=repetidos, infinitos=7)
+
+
+@pytest.fixture
+def nova_config(dados):
+    """Cria configurações de teste com a pasta sintética, em série e sem gráficos."""
+    def criar(**ajustes):
+        opcoes = dict(nome='Teste', caminho_zip=dados.pasta / 'ausente.zip', caminho_pasta_csv=dados.pasta,
+                      nome_db='teste.db', tabela='fluxos', coluna_classe='Label',
+                      tamanhos_amostra={'padrao': 50, 'Benign': 200}, carga_paralela=False)
+        opcoes.update(ajustes)
+        return motor.ConfiguracaoDataset(**opcoes)
+    return criar
@@ -0,0 +1,133 @@
+import functools
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import ingestao
+import motor
+
+# ==============================================================================
+# CARGA E RETOMADA APÓS UMA QUEDA
+# ==============================================================================
+BLOCO_PEQUENO = 8 * 1024 # ~230 linhas por pedaço: vários pedaços e checkpoints por arquivo
+
+
+class QuedaSimulada(Exception):
+    """Interrompe a carga no meio, como um processo encerrado."""
+
+
+def carregar(config):
+    # A etapa resumos completa o resumo por classe dos arquivos retomados
+    motor.executar(config, ['--etapa', 'carga', '--etapa', 'resumos'])
+
+
+def ler_banco(config):
+    """Linhas da tabela (ordenadas), correções da limpeza, resumo por classe e amostra."""
+    conn = sqlite3.connect(config.caminho_db)
+    colunas = ', '.join(f'"{col}"' for col in ['Dst Port', 'Flow Duration', 'Tot Fwd Pkts', 'Flow Byts/s', 'Label'])
+    linhas = pd.read_sql_query(f"SELECT {colunas} FROM {config.tabela} ORDER BY {colunas}", conn)
+    correcoes = ingestao.ler_correcoes(conn).sort_values(['coluna', 'tipo']).reset_index(drop=True)
+    resumo = ingestao.contar_por_grupo(conn).sort_index()
+    amostra = pd.read_sql_query(f"SELECT Label, COUNT(*) AS n FROM {config.tabela_amostra} GROUP BY Label",
+                                conn).set_index('Label')['n']
+    conn.close()
+    return linhas, correcoes, resumo, amostra
+
+
+@pytest.fixture
+def blocos_pequenos(monkeypatch):
+    """Pedaços pequenos e um COMMIT a cada ~300 linhas, para a queda cair no meio de um arquivo."""
+    carregar_csvs = ingestao.carregar_csvs
+    monkeypatch.setattr(ingestao, 'carregar_csvs',
+                        lambda *args, **kwargs: carregar_csvs(*args, **dict(kwargs, tamanho_bloco=BLOCO_PEQUENO)))
+    monkeypatch.setattr(ingestao, 'escrever_pedacos',
+                        functools.partial(ingestao.escrever_pedacos, linhas_por_transacao=300))
+
+
+def test_carga_completa(nova_config, dados, blocos_pequenos):
+    config = nova_config()
+    carregar(config)
+    linhas, correcoes, resumo, amostra = ler_banco(config)
+
+    assert len(linhas) == dados.linhas
+    # Os números continuam números: nenhum cabeçalho repetido chegou à inferência de tipos
+    conn = sqlite3.connect(config.caminho_db)
+    tipos = ingestao.tipos_da_tabela(conn, config.tabela)
+    conn.close()
+    assert tipos['Dst Port'] == 'INTEGER' and tipos['Flow Byts/s'] == 'REAL'
+    assert linhas['Flow Byts/s'].isna().sum() == dados.infinitos
+    assert resumo.sum() == dados.linhas
+    assert resumo.to_dict() == linhas['Label'].value_counts().to_dict()
+    esperado = {classe: min(n, config.tamanhos_amostra.get(classe, config.tamanhos_amostra['padrao']))
+                for classe, n in resumo.items()}
+    assert amostra.to_dict() == esperado
+    infinitos = correcoes.loc[correcoes['tipo'] == 'infinito', 'quantidade'].sum()
+    assert infinitos == dados.infinitos
+
+
+def test_carga_retomada_apos_queda(nova_config, dados, blocos_pequenos, monkeypatch):
+    referencia = nova_config(nome_db='referencia.db')
+    carregar(referencia)
+
+    config = nova_config()
+    gravar_checkpoint = ingestao.gravar_checkpoint
+    chamadas = []
+
+    def gravar_e_cair(conn, *args):
+        chamadas.append(args)
+        if len(chamadas) > 10: # O primeiro arquivo (7 pedaços) termina; o segundo cai no meio
+            raise QuedaSimulada()
+        return gravar_checkpoint(conn, *args)
+
+    monkeypatch.setattr(ingestao, 'gravar_checkpoint', gravar_e_cair)
+    with pytest.raises(QuedaSimulada):
+        carregar(config)
+    conn = sqlite3.connect(config.caminho_db)
+    situacoes = dict(conn.execute(f"SELECT caminho, situacao FROM {ingestao.TABELA_MANIFESTO}"))
+    parciais = conn.execute(f"SELECT COUNT(*) FROM {config.tabela}").fetchone()[0]
+    conn.close()
+    assert sorted(situacoes.values()) == ['carregando', 'ok']
+    assert 0 < parciais < dados.linhas
+
+    monkeypatch.setattr(ingestao, 'gravar_checkpoint', gravar_checkpoint)
+    carregar(config)
+    conn = sqlite3.connect(config.caminho_db)
+    assert {situacao for (situacao,) in conn.execute(f"SELECT situacao FROM {ingestao.TABELA_MANIFESTO}")} == {'ok'}
+    assert not ingestao.cargas_retomaveis(conn)
+    conn.close()
+
+    # A carga retomada termina igual a uma carga sem queda
+    linhas, correcoes, resumo, amostra = ler_banco(config)
+    linhas_ref, correcoes_ref, resumo_ref, amostra_ref = ler_banco(referencia)
+    pd.testing.assert_frame_equal(linhas, linhas_ref)
+    pd.testing.assert_frame_equal(correcoes, correcoes_ref)
+    pd.testing.assert_series_equal(resumo, resumo_ref)
+    pd.testing.assert_series_equal(amostra.sort_index(), amostra_ref.sort_index())
+
+# ==============================================================================
+# CABEÇALHOS REPETIDOS NO MEIO DO ARQUIVO
+# ==============================================================================
+def test_remover_linhas_de_cabecalho():
+    cabecalho = b'Dst Port,Label\r\n'
+    bloco = b'Dst Port,Label\r\n80,Benign\r\nDst Port,Label\r\n443,Bot\r\nDst Port,Label'
+    limpo, removidas = ingestao._remover_linhas_de_cabecalho(bloco, cabecalho)
+    assert removidas == 3
+    assert limpo == b'80,Benign\r\n443,Bot\r'
+    assert ingestao._remover_linhas_de_cabecalho(b'80,Benign\n', cabecalho) == (b'80,Benign\n', 0)
+
+
+@pytest.mark.parametrize('leitor', ['pandas', 'pyarrow'])
+def test_cabecalhos_repetidos_saem_antes_da_leitura(nova_config, dados, blocos_pequenos, leitor, capsys):
+    if leitor == 'pyarrow' and ingestao.pa is None:
+        pytest.skip("pyarrow não instalado")
+    config = nova_config(leitor_csv=leitor)
+    carregar(config)
+    linhas, correcoes, _, _ = ler_banco(config)
+
+    assert len(linhas) == dados.linhas
+    assert not (linhas['Label'] == 'Label').any()
+    repetidos = correcoes.loc[correcoes['tipo'] == 'cabecalho_repetido', 'quantidade'].sum()
+    assert repetidos == dados.cabecalhos_repetidos
+    # Sem cabeçalhos no bloco, o pyarrow lê cada pedaço já com os tipos (sem voltar ao texto)
+    assert 'valor fora do tipo esperado' not in capsys.readouterr().out
@@ -0,0 +1,40 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import exportacao_npy
+import ingestao
+import motor
+
+# ==============================================================================
+# EXPORTAÇÃO .npy: CÓDIGOS DA CLASSE E COLUNAS IGUAIS AO QUE ESTÁ NA TABELA
+# ==============================================================================
+@pytest.mark.parametrize('compacto', [False, True])
+def test_exportar_npy_igual_a_tabela(nova_config, compacto):
+    config = nova_config(armazenamento_compacto=compacto)
+    motor.executar(config, ['--etapa', 'carga', '--etapa', 'resumos', '--etapa', 'exportar'])
+    arrays, codigos, metadados = exportacao_npy.abrir_npy(config.caminho_npy)
+
+    conn = sqlite3.connect(config.caminho_db)
+    tabela = pd.read_sql_query(f'SELECT "Label", "Dst Port", "Flow Byts/s" FROM {config.tabela} '
+                               f'WHERE "Label" IS NOT NULL', conn)
+    gravados = tabela['Label'].copy()
+    tabela = ingestao.decodificar_colunas(conn, config.tabela, tabela)
+    conn.close()
+
+    # Os códigos exportados são a posição da classe na lista ordenada, qualquer que seja o
+    # código gravado no banco
+    assert metadados['classes'] == sorted(tabela['Label'].unique())
+    assert codigos.dtype == np.int32 and len(codigos) == metadados['linhas'] == len(tabela)
+    np.testing.assert_array_equal(np.array(metadados['classes'])[codigos], tabela['Label'])
+    if compacto:
+        # Os códigos do banco seguem a ordem de chegada: a tradução precisa ter mudado algum
+        assert (gravados.to_numpy() != codigos).any()
+
+    assert arrays['Dst Port'].dtype == np.int32
+    np.testing.assert_array_equal(arrays['Dst Port'], tabela['Dst Port'])
+    assert arrays['Flow Byts/s'].dtype == np.float32
+    np.testing.assert_array_equal(arrays['Flow Byts/s'], tabela['Flow Byts/s'].to_numpy('float32'))
+    assert np.isnan(arrays['Flow Byts/s']).sum() == tabela['Flow Byts/s'].isna().sum() > 0
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import ranking_atributos
+
+# ==============================================================================
+# ESTATÍSTICAS JUNTADAS PEDAÇO A PEDAÇO (CHAN/WELFORD) CONTRA O PANDAS
+# ==============================================================================
+@pytest.fixture
+def fluxos():
+    """Atributos com escalas bem diferentes, nulos, infinitos e uma coluna quase toda nula."""
+    rng = np.random.default_rng(7)
+    linhas = 5000
+    classes = rng.choice(['Benign', 'DDoS', 'Bot'], size=linhas, p=[0.7, 0.25, 0.05])
+    df = pd.DataFrame({
+        'duracao': rng.exponential(1e6, linhas) + 1e9, # Média grande: a soma dos quadrados perderia precisão
+        'pacotes': rng.integers(1, 50, linhas).astype('float64'),
+        'bytes_s': rng.normal(0, 1, linhas),
+        'rara': np.where(rng.random(linhas) < 0.02, rng.normal(5, 2, linhas), np.nan),
+    })
+    df['correlata'] = 3 * df['bytes_s'] + rng.normal(0, 0.1, linhas)
+    df.loc[rng.choice(linhas, 200, replace=False), 'pacotes'] = np.nan
+    df.loc[rng.choice(linhas, 30, replace=False), 'bytes_s'] = np.inf
+    return classes, df
+
+
+def test_acumulador_igual_ao_pandas(fluxos):
+    classes, df = fluxos
+    acumulador = ranking_atributos.AcumuladorAtributos(df.columns)
+    # Pedaços de tamanhos diferentes; no primeiro falta a classe rara
+    cortes = [0, 40, 1300, 1301, 3700, len(df)]
+    primeiro = classes[:cortes[1]] != 'Bot'
+    acumulador.processar(classes[:cortes[1]][primeiro], df.iloc[:cortes[1]][primeiro].to_numpy())
+    for inicio, fim in zip(cortes[1:], cortes[2:]):
+        acumulador.processar(classes[inicio:fim], df.iloc[inicio:fim].to_numpy())
+    manter = np.r_[primeiro, np.ones(len(df) - cortes[1], dtype=bool)]
+    classes, df = classes[manter], df[manter].replace([np.inf, -np.inf], np.nan)
+
+    ranking = acumulador.ranking().loc[df.columns]
+    assert acumulador.linhas == len(df)
+    np.testing.assert_array_equal(ranking['n'], df.count())
+    np.testing.assert_array_equal(ranking['nulos'], df.isna().sum())
+    np.testing.assert_allclose(ranking['media'], df.mean(), rtol=1e-12)
+    np.testing.assert_allclose(ranking['variancia'], df.var(), rtol=1e-9)
+    por_classe = df.groupby(classes).mean()
+    for classe in por_classe.index:
+        np.testing.assert_allclose(ranking[f'media_{classe}'], por_classe.loc[classe], rtol=1e-12)
+
+    # F da ANOVA e eta² a partir das médias e variâncias de cada classe
+    grupos = df.groupby(classes)
+    n_c, medias_c, variancias_c = grupos.count(), grupos.mean(), grupos.var().fillna(0)
+    entre = (n_c * (medias_c - df.mean()) ** 2).sum()
+    dentro = ((n_c - 1) * variancias_c).sum()
+    k = (n_c > 0).sum()
+    np.testing.assert_allclose(ranking['f_anova'], (entre / (k - 1)) / (dentro / (df.count() - k)), rtol=1e-8)
+    np.testing.assert_allclose(ranking['eta2'], entre / (entre + dentro), rtol=1e-8)
+
+    # Correlação por par, nas linhas com os dois atributos preenchidos (como o DataFrame.corr)
+    np.testing.assert_allclose(acumulador.correlacao().loc[df.columns, df.columns], df.corr(), atol=1e-9)
+    assert ranking.loc['correlata', 'mais_correlacionado'] == 'bytes_s' or \
+        ranking.loc['bytes_s', 'mais_correlacionado'] == 'correlata'
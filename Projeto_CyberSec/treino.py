@@ -0,0 +1,345 @@
+import pickle
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import ingestao
+import conexoes # Conexão somente leitura (mmap) para percorrer a tabela por classe
+
+# Dependência opcional: modelos com treino incremental (partial_fit)
+try:
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.naive_bayes import GaussianNB
+except ImportError:
+    SGDClassifier = GaussianNB = None
+
+# Pico de memória do processo (não existe no Windows)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# ==============================================================================
+# TREINO INCREMENTAL DE CLASSIFICADORES (FORA DA MEMÓRIA)
+# ==============================================================================
+# A tabela nunca é carregada inteira: cada classe é lida em pedaços (do SQLite ou do
+# cache Parquet), já em float32, e os minilotes juntam de cada classe uma cota
+# proporcional ao seu tamanho. Assim todo minilote tem todas as classes, mesmo com as
+# linhas gravadas arquivo por arquivo. Os modelos aprendem com partial_fit, um minilote
+# de cada vez, e a memória usada depende do tamanho do lote, não do tamanho da tabela.
+# Média e desvio padrão da padronização vêm do resumo por classe (sem ler a tabela), e a
+# validação usa 1 de cada DIVISOR_VALIDACAO linhas de cada classe, sempre as mesmas.
+
+TAMANHO_LOTE_TREINO = 8192 # Linhas por minilote (somando todas as classes)
+DIVISOR_VALIDACAO = 10 # 1 linha a cada 10 de cada classe fica fora do treino (validação)
+TAMANHO_LEITURA = 50000 # Linhas buscadas por vez do cursor de cada classe
+SUFIXO_MODELO = '_modelo.pkl'
+
+
+# Modelos disponíveis: nome -> função que cria o modelo (todos com partial_fit)
+MODELOS = {
+    'sgd': lambda: SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42), # Regressão logística
+    'naive_bayes': lambda: GaussianNB(),
+}
+
+
+def colunas_de_atributos(dtypes, coluna_classe, excluidas=()):
+    """Colunas numéricas do esquema de tipos usadas como atributos (sem a classe e as internas)."""
+    return [col for col, dtype in dtypes.items()
+            if dtype not in ('object', 'category') and col != coluna_classe
+            and col not in ingestao.COLUNAS_INTERNAS and col not in excluidas]
+
+
+def estatisticas_padronizacao(conn, colunas):
+    """Média e desvio padrão de cada coluna na população inteira, somando o resumo de todas as classes."""
+    resumo = ingestao.ler_resumo(conn, colunas).groupby('coluna')[['n', 'soma', 'soma_quadrados']].sum()
+    resumo = resumo.reindex(colunas)
+    media = (resumo['soma'] / resumo['n']).fillna(0)
+    variancia = resumo['soma_quadrados'] / resumo['n'] - media ** 2
+    desvio = np.sqrt(variancia.clip(lower=0)).fillna(0)
+    # Colunas constantes (ou vazias) ficam só centralizadas
+    desvio[desvio == 0] = 1
+    return media.to_numpy('float32'), desvio.to_numpy('float32')
+
+
+def padronizar(X, media, desvio):
+    """Padroniza os atributos; nulos viram a média (0 depois da padronização)."""
+    X = (X - media) / desvio
+    return np.nan_to_num(X, nan=0.0, posinf=0.0, neginf=0.0, copy=False)
+
+# ==============================================================================
+# LEITURA DE CADA CLASSE EM PEDAÇOS E MINILOTES ESTRATIFICADOS
+# ==============================================================================
+def blocos_sqlite(conn, tabela, coluna_classe, colunas, valor_classe, tamanho=TAMANHO_LEITURA):
+    """Percorre as linhas de uma classe na tabela (pelo índice da coluna de classe) como arrays float32."""
+    lista = ', '.join(f'"{col}"' for col in colunas)
+    cursor = conn.execute(f'SELECT {lista} FROM {tabela} WHERE "{coluna_classe}" = ?', (valor_classe,))
+    while True:
+        linhas = cursor.fetchmany(tamanho)
+        if not linhas:
+            break
+        # coerce_float: NULL vira NaN em vez de None
+        yield pd.DataFrame.from_records(linhas, columns=colunas, coerce_float=True).to_numpy('float32', na_value=np.nan)
+
+
+def blocos_parquet(pasta, coluna_classe, colunas, classe, tamanho=TAMANHO_LEITURA):
+    """Percorre as linhas de uma classe no cache Parquet (só a partição dela) como arrays float32."""
+    filtro = ingestao.ds.field(coluna_classe) == classe
+    for lote in ingestao.abrir_parquet(pasta).to_batches(columns=colunas, filter=filtro, batch_size=tamanho):
+        if lote.num_rows:
+            yield lote.to_pandas().to_numpy('float32', na_value=np.nan)
+
+
+class FluxoClasse:
+    """Entrega as linhas de uma classe em partes do tamanho pedido, marcando as de validação."""
+
+    def __init__(self, blocos):
+        self.blocos = iter(blocos)
+        self.bloco = None
+        self.posicao = 0 # Linhas da classe já entregues (define quais são de validação)
+        self.esgotado = False
+
+    def pegar(self, quantidade):
+        """Retorna até `quantidade` linhas e a máscara das linhas de validação."""
+        partes, faltam = [], quantidade
+        while faltam > 0:
+            if self.bloco is None or not len(self.bloco):
+                self.bloco = next(self.blocos, None)
+                if self.bloco is None:
+                    self.esgotado = True
+                    break
+            parte, self.bloco = self.bloco[:faltam], self.bloco[faltam:]
+            partes.append(parte)
+            faltam -= len(parte)
+        X = np.concatenate(partes) if partes else None
+        if X is None:
+            return None, None
+        validacao = (self.posicao + np.arange(len(X))) % DIVISOR_VALIDACAO == 0
+        self.posicao += len(X)
+        return X, validacao
+
+
+def cotas_por_classe(contagens, tamanho_lote):
+    """Linhas de cada classe por minilote, proporcionais ao tamanho da classe (no mínimo 1)."""
+    total = sum(contagens)
+    return [max(1, round(tamanho_lote * n / total)) for n in contagens]
+
+
+def lotes_estratificados(fluxos, cotas, parte='treino', semente=42):
+    """
+    Junta a cota de cada classe em um minilote embaralhado: (X, y), com y = índice da
+    classe. `parte` escolhe as linhas de treino ou as de validação.
+    """
+    rng = np.random.default_rng(semente)
+    while not all(fluxo.esgotado for fluxo in fluxos):
+        partes_X, partes_y = [], []
+        for indice, (fluxo, cota) in enumerate(zip(fluxos, cotas)):
+            if fluxo.esgotado:
+                continue
+            X, validacao = fluxo.pegar(cota)
+            if X is None:
+                continue
+            manter = validacao if parte == 'validacao' else ~validacao
+            partes_X.append(X[manter])
+            partes_y.append(np.full(int(manter.sum()), indice, dtype='int32'))
+        if not partes_y or not sum(len(y) for y in partes_y):
+            continue
+        X, y = np.concatenate(partes_X), np.concatenate(partes_y)
+        ordem = rng.permutation(len(y))
+        yield X[ordem], y[ordem]
+
+# ==============================================================================
+# TREINO, AVALIAÇÃO E MÉTRICAS
+# ==============================================================================
+class FonteTreino:
+    """Abre os fluxos de cada classe a partir do SQLite ou do cache Parquet."""
+
+    def __init__(self, caminho_db, tabela, coluna_classe, colunas, classes, pasta_parquet=None):
+        self.caminho_db = caminho_db
+        self.tabela = tabela
+        self.coluna_classe = coluna_classe
+        self.colunas = list(colunas)
+        self.classes = list(classes)
+        self.pasta_parquet = pasta_parquet
+        self.conn = None
+        if pasta_parquet is None:
+            self.conn = conexoes.abrir_leitura(caminho_db)
+            # Armazenamento compacto: a coluna de classe guarda códigos inteiros
+            gravados = ingestao.valores_gravados(self.conn, tabela, coluna_classe, self.classes)
+            self.valores_classes = [gravados[classe] for classe in self.classes]
+
+    def fluxos(self):
+        """Um fluxo novo (do início) para cada classe, na ordem de `classes`."""
+        if self.pasta_parquet is not None:
+            return [FluxoClasse(blocos_parquet(self.pasta_parquet, self.coluna_classe, self.colunas, classe))
+                    for classe in self.classes]
+        return [FluxoClasse(blocos_sqlite(self.conn, self.tabela, self.coluna_classe, self.colunas, valor))
+                for valor in self.valores_classes]
+
+    def fechar(self):
+        if self.conn is not None:
+            self.conn.close()
+
+
+def pesos_balanceados(contagens):
+    """Peso de cada classe para que todas pesem o mesmo no treino (como class_weight='balanced')."""
+    contagens = np.asarray(contagens, dtype='float64')
+    return contagens.sum() / (len(contagens) * contagens)
+
+
+def treinar_modelos(fonte, contagens, media, desvio, nomes_modelos, tamanho_lote=TAMANHO_LOTE_TREINO,
+                    epocas=1, balancear=True):
+    """Treina os modelos pedidos com os mesmos minilotes (cada lote é lido uma vez para todos)."""
+    modelos = {nome: MODELOS[nome]() for nome in nomes_modelos}
+    indices_classes = np.arange(len(contagens))
+    pesos = pesos_balanceados(contagens) if balancear else None
+    cotas = cotas_por_classe(contagens, tamanho_lote)
+    for epoca in range(epocas):
+        inicio, linhas, lotes = time.perf_counter(), 0, 0
+        for X, y in lotes_estratificados(fonte.fluxos(), cotas, 'treino', semente=42 + epoca):
+            X = padronizar(X, media, desvio)
+            pesos_linhas = pesos[y] if pesos is not None else None
+            for modelo in modelos.values():
+                modelo.partial_fit(X, y, classes=indices_classes, sample_weight=pesos_linhas)
+            linhas += len(y)
+            lotes += 1
+        segundos = time.perf_counter() - inicio
+        print(f"  - Época {epoca + 1}/{epocas}: {ingestao.formatar_numero(linhas)} linhas em {lotes} minilotes, "
+              f"{segundos:.1f}s ({ingestao.formatar_numero(linhas / max(segundos, 1e-9))} linhas/s)")
+    return modelos
+
+
+def avaliar_modelos(fonte, contagens, media, desvio, modelos, tamanho_lote=TAMANHO_LOTE_TREINO):
+    """Matriz de confusão (real x previsto) de cada modelo nas linhas de validação, lote a lote."""
+    k = len(contagens)
+    matrizes = {nome: np.zeros((k, k), dtype='int64') for nome in modelos}
+    for X, y in lotes_estratificados(fonte.fluxos(), cotas_por_classe(contagens, tamanho_lote), 'validacao'):
+        X = padronizar(X, media, desvio)
+        for nome, modelo in modelos.items():
+            previsto = modelo.predict(X)
+            matrizes[nome] += np.bincount(y * k + previsto, minlength=k * k).reshape(k, k)
+    return matrizes
+
+
+def metricas_da_matriz(matriz, classes):
+    """Precisão, revocação e F1 de cada classe, mais acurácia, acurácia balanceada e F1 macro."""
+    acertos = np.diag(matriz).astype('float64')
+    reais, previstos = matriz.sum(axis=1), matriz.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precisao = np.where(previstos > 0, acertos / previstos, 0.0)
+        revocacao = np.where(reais > 0, acertos / reais, 0.0)
+        f1 = np.where(precisao + revocacao > 0, 2 * precisao * revocacao / (precisao + revocacao), 0.0)
+    por_classe = pd.DataFrame({'linhas': reais, 'precisao': precisao, 'revocacao': revocacao, 'f1': f1},
+                              index=pd.Index(classes, name='classe'))
+    com_linhas = reais > 0
+    gerais = {
+        'linhas': int(matriz.sum()),
+        'acuracia': float(acertos.sum() / max(matriz.sum(), 1)),
+        'acuracia_balanceada': float(revocacao[com_linhas].mean()) if com_linhas.any() else 0.0,
+        'f1_macro': float(f1[com_linhas].mean()) if com_linhas.any() else 0.0,
+    }
+    return por_classe, gerais
+
+
+def memoria_pico_processo_mb():
+    """Maior memória residente do processo até agora, em MiB (None se o sistema não informa)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB; macOS, em bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def treinar(caminho_db, tabela, coluna_classe, dtypes, caminho_modelo, nomes_modelos=('sgd', 'naive_bayes'),
+            pasta_parquet=None, tamanho_lote=TAMANHO_LOTE_TREINO, epocas=1, colunas_excluidas=(), balancear=True):
+    """
+    Treina, avalia e salva os modelos. `dtypes` é o esquema de tipos salvo na etapa de
+    resumos; com `pasta_parquet`, as linhas vêm do cache Parquet em vez do SQLite.
+    Retorna o pacote salvo (modelos, colunas, padronização, classes e métricas).
+    """
+    if SGDClassifier is None:
+        raise ImportError("O treino dos modelos precisa do pacote 'scikit-learn' (pip install scikit-learn).")
+    if pasta_parquet is not None and ingestao.pa is None:
+        raise ImportError("Ler o cache Parquet precisa do pacote 'pyarrow' (pip install pyarrow).")
+    desconhecidos = [nome for nome in nomes_modelos if nome not in MODELOS]
+    if desconhecidos:
+        raise ValueError(f"Modelos desconhecidos: {desconhecidos}. Disponíveis: {list(MODELOS)}")
+
+    colunas = colunas_de_atributos(dtypes, coluna_classe, colunas_excluidas)
+    conn = conexoes.abrir_leitura(caminho_db)
+    contagens = ingestao.contar_por_grupo(conn)
+    media, desvio = estatisticas_padronizacao(conn, colunas)
+    conn.close()
+    # Linhas sem classe não entram no treino
+    contagens = contagens[contagens.index.notna() & (contagens > 0)].sort_index()
+    classes = [str(classe) for classe in contagens.index]
+    origem = f"do cache Parquet '{pasta_parquet}'" if pasta_parquet is not None else f"da tabela '{tabela}'"
+    print(f"Treinando {', '.join(nomes_modelos)} com {len(colunas)} atributos e {len(classes)} classes "
+          f"({ingestao.formatar_numero(int(contagens.sum()))} linhas, lidas {origem})...")
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    fonte = FonteTreino(caminho_db, tabela, coluna_classe, colunas, classes, pasta_parquet)
+    try:
+        modelos = treinar_modelos(fonte, contagens.to_list(), media, desvio, nomes_modelos,
+                                  tamanho_lote, epocas, balancear)
+        segundos_treino = time.perf_counter() - inicio
+        matrizes = avaliar_modelos(fonte, contagens.to_list(), media, desvio, modelos, tamanho_lote)
+    finally:
+        fonte.fechar()
+        _, pico_alocado = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    segundos_total = time.perf_counter() - inicio
+
+    linhas_treino = int(contagens.sum()) * epocas
+    print(f"\nTreino: {segundos_treino:.1f}s ({ingestao.formatar_numero(linhas_treino / max(segundos_treino, 1e-9))} "
+          f"linhas/s, todas as épocas) | treino + validação: {segundos_total:.1f}s")
+    texto_pico = f"Memória de pico: {pico_alocado / (1024 * 1024):.1f} MiB alocados pelo treino (Python/numpy)"
+    pico_processo = memoria_pico_processo_mb()
+    if pico_processo is not None:
+        texto_pico += f", {pico_processo:.0f} MiB residentes no processo"
+    print(texto_pico + ".")
+
+    metricas = {}
+    for nome, matriz in matrizes.items():
+        por_classe, gerais = metricas_da_matriz(matriz, classes)
+        metricas[nome] = gerais
+        print(f"\n--- Validação: {nome} ({ingestao.formatar_numero(gerais['linhas'])} linhas) ---")
+        print(f"Acurácia: {gerais['acuracia']:.4f} | Acurácia balanceada: {gerais['acuracia_balanceada']:.4f} "
+              f"| F1 macro: {gerais['f1_macro']:.4f}")
+        print(por_classe.round(4).to_string())
+
+    # O melhor modelo (F1 macro na validação) é o usado por padrão na pontuação
+    melhor = max(metricas, key=lambda nome: metricas[nome]['f1_macro'])
+    pacote = {
+        'tabela': tabela,
+        'coluna_classe': coluna_classe,
+        'colunas': colunas,
+        'dtypes': {col: dtypes[col] for col in colunas},
+        'media': media,
+        'desvio': desvio,
+        'classes': classes,
+        'modelos': modelos,
+        'melhor': melhor,
+        'metricas': metricas,
+        'treinado_em': datetime.now().isoformat(timespec='seconds'),
+    }
+    salvar_modelo(caminho_modelo, pacote)
+    print(f"\nModelos salvos em: {caminho_modelo} (melhor na validação: '{melhor}').")
+    return pacote
+
+
+def salvar_modelo(caminho, pacote):
+    """Grava o pacote do modelo com pickle."""
+    with open(caminho, 'wb') as f:
+        pickle.dump(pacote, f)
+
+
+def carregar_modelo(caminho):
+    """Lê o pacote gravado por salvar_modelo."""
+    with open(caminho, 'rb') as f:
+        return pickle.load(f)